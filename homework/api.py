@@ -0,0 +1,165 @@
+"""
+JSON read API of the homework lists, for polling clients.
+
+Every endpoint computes a cheap validator first: the version token of the
+student's or teacher's list, or the count and latest date of the latest
+answers. A client sending it back in If-None-Match or If-Modified-Since
+gets a 304 before the list is queried or serialized.
+
+The version tokens live in the cache, they are only used as validators with
+a cache shared by every worker (SHARED_CACHE): a worker's local memory cache
+does not see the invalidations of the others and would answer 304 for a
+changed list.
+"""
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+
+from .cache import student_list_version, teacher_list_version
+from .models import Homework, Answer
+from .pagination import KeysetPaginator
+
+PAGE_SIZE = 10
+CURSOR_KWARG = 'cursor'
+
+
+def user_type_required(user_type):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.user.user_type != user_type:
+                raise PermissionDenied
+            return view(request, *args, **kwargs)
+        return login_required(require_GET(wrapper))
+    return decorator
+
+
+def paginated_response(request, queryset, ordering, serialize):
+    """Keyset paginated JSON list of `queryset`."""
+    paginator = KeysetPaginator(queryset, ordering, PAGE_SIZE)
+    try:
+        page = paginator.page(request.GET.get(CURSOR_KWARG))
+    except ValueError:
+        raise Http404("Invalid page cursor.")
+    return JsonResponse({
+        'results': [serialize(obj) for obj in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def owned_homework(request, pk):
+    """The homework `pk` of the requesting teacher, fetched once."""
+    if getattr(request, 'homework', None) is None:
+        homework = get_object_or_404(Homework, id=int(pk))
+        if homework.teacher_id != request.user.id:
+            raise PermissionDenied
+        request.homework = homework
+    return request.homework
+
+
+def student_homework_etag(request):
+    if not settings.SHARED_CACHE:
+        return None
+    return '%s-%s' % (student_list_version(request.user.id),
+                      request.GET.get(CURSOR_KWARG, ''))
+
+
+@user_type_required('student')
+@condition(etag_func=student_homework_etag)
+def student_homework_list(request):
+    """Homework assigned to the student, mirrors StudentHomeworkListView."""
+    homeworks = Homework.objects.filter(
+        student=request.user).with_student_status(request.user)
+    return paginated_response(
+        request, homeworks, ('due_date', 'id'), lambda homework: {
+            'id': homework.id,
+            'title': homework.title,
+            'question': homework.question,
+            'due_date': isoformat(homework.due_date),
+            'answered': bool(homework.answered),
+            'answer_count': homework.answer_count,
+            'last_answered_at': isoformat(homework.last_answered_at),
+        })
+
+
+def teacher_homework_etag(request):
+    if not settings.SHARED_CACHE:
+        return None
+    # Homework become overdue at midnight
+    return '%s-%s-%s' % (teacher_list_version(request.user.id),
+                         date.today().isoformat(),
+                         request.GET.get(CURSOR_KWARG, ''))
+
+
+@user_type_required('teacher')
+@condition(etag_func=teacher_homework_etag)
+def teacher_homework_list(request):
+    """Teacher's homework with their figures, mirrors HomeworkListView."""
+    homeworks = Homework.objects.filter(
+        teacher=request.user).with_stats()
+    return paginated_response(
+        request, homeworks, ('-pub_date', '-id'), lambda homework: {
+            'id': homework.id,
+            'title': homework.title,
+            'question': homework.question,
+            'due_date': isoformat(homework.due_date),
+            'pub_date': isoformat(homework.pub_date),
+            'assigned_count': homework.assigned_count,
+            'answered_count': homework.answered_count,
+            'last_answered_at': isoformat(homework.last_answered_at),
+            'overdue': bool(homework.overdue),
+        })
+
+
+def latest_answers_state(request, pk):
+    """Count and date of the latest answers, from the LatestAnswer index."""
+    homework = owned_homework(request, pk)
+    if getattr(request, 'latest_answers_state', None) is None:
+        request.latest_answers_state = Answer.objects.filter(
+            latest__homework=homework).aggregate(
+                count=Count('id'), last=Max('pub_date'))
+    return request.latest_answers_state
+
+
+def latest_answers_etag(request, pk):
+    state = latest_answers_state(request, pk)
+    return '%d-%s-%s' % (state['count'], isoformat(state['last']),
+                         request.GET.get(CURSOR_KWARG, ''))
+
+
+def latest_answers_last_modified(request, pk):
+    return latest_answers_state(request, pk)['last']
+
+
+@user_type_required('teacher')
+@condition(etag_func=latest_answers_etag,
+           last_modified_func=latest_answers_last_modified)
+def latest_answers(request, pk):
+    """Latest answer of each student, mirrors HomeworkLatestAnswersView."""
+    answers = Answer.objects.filter(
+        latest__homework=owned_homework(request, pk)
+    ).select_related('student')
+    return paginated_response(
+        request, answers, ('student', 'id'), lambda answer: {
+            'id': answer.id,
+            'student': {
+                'id': answer.student.id,
+                'username': answer.student.username,
+                'first_name': answer.student.first_name,
+                'last_name': answer.student.last_name,
+            },
+            'description': answer.description,
+            'pub_date': isoformat(answer.pub_date),
+        })
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class HomeworkConfig(AppConfig):
+    name = 'homework'
+
+    def ready(self):
+        from homework import signals  # noqa
@@ -0,0 +1,126 @@
+"""
+Per-student cache of the student homework list.
+
+Each student has a version token; cached pages are keyed by it, so bumping
+the token makes every cached page of that student unreachable at once.
+Teachers have a version token of their homework list as well, the JSON
+API uses both as ETags.
+
+Tokens are bumped once the transaction of the change commits, so a page
+read before the commit is never stored under the new token. Pages are only
+cached with a cache shared by every worker (SHARED_CACHE), otherwise the
+workers would not see each other's invalidations.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'homework:student_list:version:%s'
+TEACHER_VERSION_KEY = 'homework:teacher_list:version:%s'
+PAGE_KEY = 'homework:student_list:page:%s:%s:%s'
+HITS_KEY = 'homework:student_list:hits'
+MISSES_KEY = 'homework:student_list:misses'
+DUPLICATES_KEY = 'homework:duplicates:%s:%s:%s'
+
+
+def new_version():
+    # Never reuse a token, even after the version key has been evicted
+    return uuid.uuid4().hex
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        version = new_version()
+        cache.set(key, version, None)
+    return version
+
+
+def _invalidate(key, ids):
+    ids = list(ids)
+    transaction.on_commit(lambda: cache.set_many(
+        dict((key % id, new_version()) for id in ids), None))
+
+
+def student_list_version(student_id):
+    """Current version token of `student_id`'s homework list."""
+    return _version(VERSION_KEY % student_id)
+
+
+def invalidate_student_lists(student_ids):
+    """Bump the version token of every student of `student_ids`."""
+    _invalidate(VERSION_KEY, student_ids)
+
+
+def teacher_list_version(teacher_id):
+    """Current version token of `teacher_id`'s homework list."""
+    return _version(TEACHER_VERSION_KEY % teacher_id)
+
+
+def invalidate_teacher_lists(teacher_ids):
+    """Bump the version token of every teacher of `teacher_ids`."""
+    _invalidate(TEACHER_VERSION_KEY, teacher_ids)
+
+
+def page_key(student_id, cursor):
+    """
+    Key of a page for the current version token. Read it once before
+    querying the page, so that a page computed while the token is bumped is
+    stored under the old token.
+    """
+    return PAGE_KEY % (student_id, student_list_version(student_id),
+                       cursor or '')
+
+
+def get_page(key):
+    """Cached page data or None, counting hits/misses."""
+    data = cache.get(key)
+    _count(HITS_KEY if data is not None else MISSES_KEY)
+    return data
+
+
+def set_page(key, data):
+    cache.set(key, data, settings.STUDENT_LIST_CACHE_TIMEOUT)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def cache_stats():
+    """Hits, misses and hit ratio of the student homework list cache."""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': float(hits) / total if total else None,
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def duplicates_key(stats):
+    """
+    Key of the duplicate answers of the `stats` homework. It changes with
+    every answer added or deleted, so it works with a per worker cache.
+    """
+    return DUPLICATES_KEY % (stats.homework_id, stats.answer_count,
+                             stats.last_answer_at and
+                             stats.last_answer_at.isoformat())
+
+
+def get_duplicates(key):
+    return cache.get(key)
+
+
+def set_duplicates(key, pairs):
+    cache.set(key, pairs, settings.DUPLICATES_CACHE_TIMEOUT)
@@ -0,0 +1,84 @@
+"""
+Streaming export of the answers of a homework.
+
+Answers are fetched by chunks of EXPORT_CHUNK_SIZE rows filtered on the
+last id seen, so that neither the database driver nor the Python process
+ever holds the whole result set, and rows are written out as soon as
+their chunk is fetched.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.utils import six
+
+from .models import Answer
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+COLUMNS = ('answer_id', 'student_id', 'username', 'first_name', 'last_name',
+           'pub_date', 'description')
+
+
+def export_queryset(homework, history=False):
+    """Latest answer of every student, or every answer when `history`."""
+    if history:
+        answers = Answer.objects.filter(homework=homework)
+    else:
+        answers = Answer.objects.filter(latest__homework=homework)
+    return answers.select_related('student')
+
+
+def iter_chunks(queryset, chunk_size=None):
+    """Iterate `queryset` in id order, one query per chunk."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by('id')[
+            :chunk_size])
+        for obj in chunk:
+            yield obj
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].id
+
+
+def answer_row(answer):
+    student = answer.student
+    return (answer.id, student.id, student.username, student.first_name,
+            student.last_name, answer.pub_date.isoformat(),
+            answer.description)
+
+
+class Echo(object):
+    """File-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(answers):
+    writer = csv.writer(Echo())
+    if six.PY2:
+        encode = lambda row: [six.text_type(value).encode('utf-8')
+                              for value in row]
+    else:
+        encode = lambda row: row
+    yield writer.writerow(encode(COLUMNS))
+    for answer in answers:
+        yield writer.writerow(encode(answer_row(answer)))
+
+
+def jsonl_lines(answers):
+    for answer in answers:
+        yield json.dumps(dict(zip(COLUMNS, answer_row(answer)))) + '\n'
+
+
+def export_lines(homework, export_format, history=False):
+    """Lines of the export of `homework` in 'csv' or 'jsonl' format."""
+    answers = iter_chunks(export_queryset(homework, history))
+    if export_format == 'csv':
+        return csv_lines(answers)
+    return jsonl_lines(answers)
@@ -2,8 +2,10 @@ from .models import Homework, Answer
 import floppyforms.__future__ as forms
 from floppyforms.widgets import TextInput, HiddenInput, Textarea, DateInput
 
+from teacher2student.form_rendering import MemoizedRenderingMixin
 
-class HomeworkCreateForm(forms.ModelForm):
+
+class HomeworkCreateForm(MemoizedRenderingMixin, forms.ModelForm):
     """Form for Homework creation and update."""
 
     class Meta:
@@ -17,7 +19,7 @@ class HomeworkCreateForm(forms.ModelForm):
             'due_date': DateInput(attrs={'placeholder': 'YYYY-MM-DD or MM/DD/YYYY'})
         }
 
-class AnswerCreateForm(forms.ModelForm):
+class AnswerCreateForm(MemoizedRenderingMixin, forms.ModelForm):
     """Form for Answer creation and update."""
 
     class Meta:
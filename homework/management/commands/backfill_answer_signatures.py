@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from homework.models import Answer
+from homework.similarity import minhash
+
+
+class Command(BaseCommand):
+    help = ("Compute the MinHash signatures of the answers without one, "
+            "e.g. answers created before duplicate detection.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of answers signed per transaction.")
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Sign every answer again.")
+
+    def handle(self, *args, **options):
+        answers = Answer.objects.all()
+        if not options['all']:
+            answers = answers.filter(signature__isnull=True)
+        last_id = 0
+        signed = 0
+        while True:
+            batch = list(answers.filter(id__gt=last_id).order_by(
+                'id').values_list('id', 'description')[
+                    :options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                for answer_id, description in batch:
+                    Answer.objects.filter(id=answer_id).update(
+                        signature=minhash(description))
+            signed += len(batch)
+            last_id = batch[-1][0]
+        self.stdout.write("Signed %d answers." % signed)
@@ -0,0 +1,74 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test.utils import override_settings
+
+from homework.forms import HomeworkCreateForm, AnswerCreateForm
+from teacher2student import form_rendering
+from users.forms import SignupForm, SigninForm
+
+LAYOUT = ('{% load floppyforms memoized_forms %}'
+          '{% form form using "floppyforms/layouts/bootstrap.html" %}')
+# Form, initial data and template of each form as rendered by its page
+FORMS = (
+    (HomeworkCreateForm, {'teacher': 1},
+     '{% load floppyforms memoized_forms %}'
+     '{% formrow form.title using "floppyforms/rows/bootstrap.html" %}'
+     '{% formrow form.question using "floppyforms/rows/bootstrap.html" %}'
+     '{% formrow form.due_date %}{{ form.teacher }}'),
+    (AnswerCreateForm, {'homework': 1, 'student': 1}, LAYOUT),
+    (SignupForm, {'user_type': 'student', 'username': 'teacher'}, LAYOUT),
+    (SigninForm, {},
+     '{% load floppyforms memoized_forms %}{% form form using '
+     '"floppyforms/layouts/bootstrap_no_label.html" %}'),
+)
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Name, template loaders and memoization of each mode
+MODES = (
+    ('default', LOADERS, False),
+    ('cached', [('django.template.loaders.cached.Loader', LOADERS)], False),
+    ('memoized', [('django.template.loaders.cached.Loader', LOADERS)], True),
+)
+
+
+class Command(BaseCommand):
+    help = ("Measure the render time of the forms with the default template "
+            "loaders, the cached loader, and the cached loader with the "
+            "memoized widgets and rows.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help="Number of renders per form and mode.")
+
+    def handle(self, *args, **options):
+        timings = dict((form_class, []) for form_class, i, t in FORMS)
+        for name, loaders, memoize in MODES:
+            templates = copy.deepcopy(settings.TEMPLATES)
+            templates[0]['OPTIONS']['loaders'] = loaders
+            form_rendering.rendered_widgets.clear()
+            with override_settings(TEMPLATES=templates,
+                                   FORM_RENDER_CACHE=memoize):
+                for form_class, initial, source in FORMS:
+                    timings[form_class].append(self.benchmark(
+                        form_class, initial, source, options['repeat']))
+        self.stdout.write("%-20s %12s %12s %12s" % (
+            ("Form",) + tuple("%s (ms)" % name for name, l, m in MODES)))
+        for form_class, i, t in FORMS:
+            self.stdout.write("%-20s %12.2f %12.2f %12.2f" % (
+                (form_class.__name__,) + tuple(timings[form_class])))
+
+    def benchmark(self, form_class, initial, source, repeat):
+        """Mean milliseconds per render, after a first render."""
+        template = engines['django'].from_string(source)
+        template.render({'form': form_class(initial=initial)})
+        start = time.time()
+        for i in range(repeat):
+            template.render({'form': form_class(initial=initial)})
+        return (time.time() - start) * 1000 / repeat
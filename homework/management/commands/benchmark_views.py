@@ -0,0 +1,132 @@
+import json
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from homework import urls as homework_urls
+from homework.models import Homework, Answer
+from teacher2student.instrumentation import percentile
+from users import urls as users_urls
+from users.models import SchoolUser
+
+URLCONFS = (('homework', homework_urls), ('users', users_urls))
+# Views that would end the benchmark session
+SKIPPED = ('users:logout',)
+
+
+class Command(BaseCommand):
+    help = ("Request every named URL of the homework and users apps as a "
+            "teacher and as a student, report latency and query counts.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help="Number of requests per URL and user.")
+        parser.add_argument(
+            '--teacher', help="Username of the teacher, defaults to the "
+                              "teacher with the most homework.")
+        parser.add_argument(
+            '--student', help="Username of the student, defaults to one "
+                              "with answers for that teacher's homework.")
+        parser.add_argument(
+            '--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        teacher, student, homework = self.pick_users(options)
+        url_kwargs = {'pk': homework.id, 'student': student.id}
+        results = []
+        # Expected 403/404/405 responses would flood the output
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for user in (teacher, student):
+                    client = Client()
+                    client.force_login(user)
+                    for name, url in self.urls(url_kwargs):
+                        results.append(self.benchmark(
+                            client, user, name, url, options['repeat']))
+        finally:
+            request_logger.setLevel(level)
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'date': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'repeat': options['repeat'],
+                    'rows': {
+                        'users': SchoolUser.objects.count(),
+                        'homeworks': Homework.objects.count(),
+                        'assignments':
+                            Homework.student.through.objects.count(),
+                        'answers': Answer.objects.count(),
+                    },
+                    'results': results,
+                }, output, indent=2, sort_keys=True)
+            self.stdout.write("Results written to %s" % options['output'])
+
+    def pick_users(self, options):
+        """Return the benchmark teacher, student and homework."""
+        teachers = SchoolUser.objects.filter(user_type='teacher')
+        if options['teacher']:
+            teachers = teachers.filter(username=options['teacher'])
+        teacher = teachers.annotate(
+            homeworks=Count('homework')).order_by('-homeworks').first()
+        if teacher is None:
+            raise CommandError("No teacher found, run seed_school first.")
+        answers = Answer.objects.filter(homework__teacher=teacher)
+        if options['student']:
+            answers = answers.filter(student__username=options['student'])
+        answer = answers.select_related('homework', 'student').first()
+        if answer is None:
+            raise CommandError("No student answered this teacher's homework.")
+        return teacher, answer.student, answer.homework
+
+    def urls(self, url_kwargs):
+        """Name and reversed URL of every named pattern."""
+        for namespace, urlconf in URLCONFS:
+            for pattern in urlconf.urlpatterns:
+                name = '%s:%s' % (namespace, pattern.name)
+                if name in SKIPPED:
+                    continue
+                kwargs = dict((key, url_kwargs[key])
+                              for key in pattern.regex.groupindex)
+                yield name, reverse(name, kwargs=kwargs)
+
+    def benchmark(self, client, user, name, url, repeat):
+        timings = []
+        queries = []
+        for i in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.time()
+                response = client.get(url)
+                timings.append((time.time() - start) * 1000)
+            queries.append(len(captured))
+        timings.sort()
+        return {
+            'view': name,
+            'url': url,
+            'user_type': user.user_type,
+            'status': response.status_code,
+            'queries': max(queries),
+            'p50_ms': percentile(timings, 0.50),
+            'p95_ms': percentile(timings, 0.95),
+            'max_ms': timings[-1],
+        }
+
+    def report(self, results):
+        self.stdout.write("%-32s %-8s %6s %7s %9s %9s" % (
+            "View", "User", "Status", "Queries", "p50 (ms)", "p95 (ms)"))
+        for result in results:
+            self.stdout.write("%-32s %-8s %6d %7d %9.1f %9.1f" % (
+                result['view'], result['user_type'], result['status'],
+                result['queries'], result['p50_ms'], result['p95_ms']))
@@ -0,0 +1,111 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import reverse
+from django.db.models import Count
+from django.test import Client
+from django.utils.six.moves.urllib.request import Request, urlopen
+
+from homework.models import Homework
+from teacher2student.instrumentation import percentile
+from users.models import SchoolUser
+
+VIEWS = ('homework:list', 'homework:latest_answers')
+
+
+class Command(BaseCommand):
+    help = ("Load a running server with concurrent authenticated requests "
+            "to the teacher views and report the throughput and latency.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'url', nargs='?', default='http://127.0.0.1:8000',
+            help="Base URL of the server.")
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help="Number of concurrent clients.")
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help="Total number of requests.")
+        parser.add_argument(
+            '--teacher', help="Username of the teacher, defaults to the "
+                              "teacher with the most homework.")
+        parser.add_argument(
+            '--host', default=settings.ALLOWED_HOSTS[0],
+            help="Host header of the requests.")
+
+    def handle(self, *args, **options):
+        teacher = self.pick_teacher(options['teacher'])
+        homework = Homework.objects.filter(teacher=teacher).annotate(
+            answers=Count('answer')).order_by('-answers').first()
+        paths = [reverse(VIEWS[0]),
+                 reverse(VIEWS[1], kwargs={'pk': homework.id})]
+        client = Client()
+        client.force_login(teacher)
+        headers = {
+            'Host': options['host'],
+            'Cookie': '%s=%s' % (
+                settings.SESSION_COOKIE_NAME,
+                client.cookies[settings.SESSION_COOKIE_NAME].value),
+        }
+        urls = [options['url'].rstrip('/') + path for path in paths]
+        # Every client takes the next request number until they are all done
+        counter = iter(range(options['requests']))
+        lock = threading.Lock()
+        timings = []
+        errors = []
+
+        def run():
+            while True:
+                with lock:
+                    number = next(counter, None)
+                if number is None:
+                    return
+                url = urls[number % len(urls)]
+                start = time.time()
+                try:
+                    response = urlopen(Request(url, headers=headers))
+                    response.read()
+                    status = response.getcode()
+                except IOError as error:
+                    status = getattr(error, 'code', None)
+                elapsed = (time.time() - start) * 1000
+                with lock:
+                    if status == 200:
+                        timings.append(elapsed)
+                    else:
+                        errors.append(status)
+
+        threads = [threading.Thread(target=run)
+                   for i in range(options['concurrency'])]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+        timings.sort()
+        self.stdout.write("Requests: %d, errors: %d, concurrency: %d" % (
+            options['requests'], len(errors), options['concurrency']))
+        if errors:
+            self.stdout.write("Error statuses: %s" % sorted(set(
+                str(status) for status in errors)))
+        if timings:
+            self.stdout.write("%.1f requests/s, p50 %.1f ms, p95 %.1f ms, "
+                              "p99 %.1f ms" % (
+                                  len(timings) / elapsed,
+                                  percentile(timings, 0.50),
+                                  percentile(timings, 0.95),
+                                  percentile(timings, 0.99)))
+
+    def pick_teacher(self, username):
+        teachers = SchoolUser.objects.filter(user_type='teacher')
+        if username:
+            teachers = teachers.filter(username=username)
+        teacher = teachers.annotate(
+            homeworks=Count('homework')).order_by('-homeworks').first()
+        if teacher is None:
+            raise CommandError("No teacher found, run seed_school first.")
+        return teacher
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from homework.models import Homework, LatestAnswer
+
+
+class Command(BaseCommand):
+    help = "Rebuild the latest answer pointers from the answer history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--homework', type=int, action='append', dest='homeworks',
+            help="Only rebuild this homework id (can be repeated).")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of pointers inserted per query.")
+
+    def handle(self, *args, **options):
+        homeworks = None
+        if options['homeworks']:
+            homeworks = Homework.objects.filter(id__in=options['homeworks'])
+        written = LatestAnswer.objects.rebuild(
+            homeworks=homeworks, batch_size=options['batch_size'])
+        self.stdout.write("Rebuilt %d latest answer pointers." % written)
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from homework import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the homework and answers."
+
+    def handle(self, *args, **options):
+        if search.backend() is None:
+            self.stdout.write("The database has no full-text index.")
+            return
+        start = time.time()
+        with transaction.atomic():
+            search.rebuild()
+        self.stdout.write("Rebuilt the search index in %.1fs." % (
+            time.time() - start))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from homework.models import HomeworkStats
+
+
+class Command(BaseCommand):
+    help = ("Recompute the homework statistics from scratch and report how "
+            "far the stored rows drifted.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--homework', type=int, action='append', dest='homeworks',
+            help="Only check this homework id (can be repeated).")
+        parser.add_argument(
+            '--fix', action='store_true',
+            help="Rewrite the rows that drifted.")
+
+    def handle(self, *args, **options):
+        drift = HomeworkStats.objects.reconcile(
+            options['homeworks'], fix=options['fix'])
+        for homework_id, field, stored, computed in drift:
+            if field is None:
+                self.stdout.write("Homework %d: no statistics." % homework_id)
+            else:
+                self.stdout.write("Homework %d: %s is %s instead of %s." % (
+                    homework_id, field, stored, computed))
+        homeworks = len(set(homework_id for homework_id, field, stored,
+                            computed in drift))
+        self.stdout.write("%d homeworks drifted%s." % (
+            homeworks, ", fixed" if options['fix'] and homeworks else ""))
@@ -0,0 +1,139 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from homework.models import Homework, Answer, LatestAnswer, HomeworkStats
+from users.models import SchoolUser
+
+
+class Command(BaseCommand):
+    help = ("Seed a synthetic school with bulk inserts: teachers, students, "
+            "homeworks, assignments and answer history.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=10)
+        parser.add_argument('--students', type=int, default=300)
+        parser.add_argument(
+            '--homeworks', type=int, default=20,
+            help="Number of homeworks per teacher.")
+        parser.add_argument(
+            '--density', type=float, default=0.5,
+            help="Fraction of the students assigned to each homework.")
+        parser.add_argument(
+            '--answer-rate', type=float, default=0.7,
+            help="Fraction of the assigned students who answer.")
+        parser.add_argument(
+            '--history', type=int, default=3,
+            help="Maximum number of answers per student and homework.")
+        parser.add_argument(
+            '--prefix', default='seed',
+            help="Prefix of the usernames, must be new for every run.")
+        parser.add_argument(
+            '--password', default='password',
+            help="Password of every seeded user.")
+        parser.add_argument('--random-seed', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if SchoolUser.objects.filter(
+                username__startswith=options['prefix'] + '_').exists():
+            raise CommandError(
+                "Users prefixed by '%s' already exist." % options['prefix'])
+        self.random = random.Random(options['random_seed'])
+        self.batch_size = options['batch_size']
+        start = time.time()
+        with transaction.atomic():
+            teachers, students = self.create_users(options)
+            homeworks = self.create_homeworks(teachers, options)
+            assignments = self.assign(homeworks, students, options)
+            answers = self.answer(assignments, options)
+            seeded = Homework.objects.filter(teacher__in=teachers)
+            LatestAnswer.objects.rebuild(homeworks=seeded)
+            HomeworkStats.objects.refresh(seeded)
+        self.stdout.write(
+            "Seeded %d teachers, %d students, %d homeworks, %d assignments "
+            "and %d answers in %.1fs." % (
+                len(teachers), len(students), len(homeworks),
+                sum(len(ids) for ids in assignments.values()), answers,
+                time.time() - start))
+
+    def create_users(self, options):
+        """Create the users, hashing the shared password only once."""
+        prefix = options['prefix']
+        password = make_password(options['password'])
+        users = []
+        for user_type, count in (('teacher', options['teachers']),
+                                 ('student', options['students'])):
+            for i in range(count):
+                username = '%s_%s%d' % (prefix, user_type, i)
+                users.append(SchoolUser(
+                    username=username,
+                    email='%s@example.com' % username,
+                    email_normalized='%s@example.com' % username.lower(),
+                    first_name=user_type.capitalize(),
+                    last_name='%s %d' % (prefix, i),
+                    user_type=user_type,
+                    password=password))
+        SchoolUser.objects.bulk_create(users, batch_size=self.batch_size)
+        seeded = SchoolUser.objects.filter(username__startswith=prefix + '_')
+        return (list(seeded.filter(user_type='teacher')),
+                list(seeded.filter(user_type='student').values_list(
+                    'id', flat=True)))
+
+    def create_homeworks(self, teachers, options):
+        today = date.today()
+        Homework.objects.bulk_create([
+            Homework(title='Homework #%d' % i,
+                     question='Question %d of %s?' % (i, teacher.username),
+                     teacher=teacher,
+                     due_date=today + timedelta(
+                         days=self.random.randint(-30, 30)))
+            for teacher in teachers
+            for i in range(options['homeworks'])
+        ], batch_size=self.batch_size)
+        return list(Homework.objects.filter(
+            teacher__in=teachers).values_list('id', flat=True))
+
+    def assign(self, homeworks, students, options):
+        """Assign a random sample of students to every homework."""
+        through = Homework.student.through
+        per_homework = int(round(len(students) * options['density']))
+        assignments = {}
+        rows = []
+        for homework_id in homeworks:
+            assignments[homework_id] = self.random.sample(
+                students, per_homework)
+            rows.extend(through(homework_id=homework_id, schooluser_id=s)
+                        for s in assignments[homework_id])
+            if len(rows) >= self.batch_size:
+                through.objects.bulk_create(rows)
+                rows = []
+        through.objects.bulk_create(rows)
+        return assignments
+
+    def answer(self, assignments, options):
+        """Create the answer history, returns the number of answers."""
+        if options['history'] < 1:
+            return 0
+        count = 0
+        rows = []
+        for homework_id, student_ids in assignments.items():
+            for student_id in student_ids:
+                if self.random.random() >= options['answer_rate']:
+                    continue
+                for version in range(
+                        self.random.randint(1, options['history'])):
+                    rows.append(Answer(
+                        homework_id=homework_id,
+                        student_id=student_id,
+                        description='Answer version %d' % (version + 1)))
+                if len(rows) >= self.batch_size:
+                    Answer.objects.bulk_create(rows)
+                    count += len(rows)
+                    rows = []
+        Answer.objects.bulk_create(rows)
+        return count + len(rows)
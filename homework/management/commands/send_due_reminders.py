@@ -0,0 +1,42 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from homework.models import SentReminder
+from jobs.queue import enqueue
+
+
+class Command(BaseCommand):
+    help = ("Queue a reminder for every assigned student who has not "
+            "answered a homework due soon. Students are reminded only once "
+            "per homework, so the command can be scheduled freely.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=1,
+            help="Remind the homework due within this number of days.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of reminders per insert and per job.")
+
+    def handle(self, *args, **options):
+        start = time.time()
+        today = date.today()
+        pending = list(SentReminder.objects.pending(
+            today, today + timedelta(days=options['days'])))
+        batch_size = options['batch_size']
+        batches = 0
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            # The reminders are recorded with the job that sends them
+            with transaction.atomic():
+                SentReminder.objects.bulk_create([
+                    SentReminder(homework_id=homework_id,
+                                 student_id=student_id)
+                    for homework_id, student_id in batch])
+                enqueue('homework.remind_due', {'assignments': batch})
+            batches += 1
+        self.stdout.write("Queued %d reminders in %d jobs in %.1fs." % (
+            len(pending), batches, time.time() - start))
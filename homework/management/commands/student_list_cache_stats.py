@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from homework.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show the hit/miss counters of the student homework list cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true', default=False,
+            help="Reset the counters after showing them.")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        ratio = stats['hit_ratio']
+        self.stdout.write("Hits: %d, misses: %d, hit ratio: %s" % (
+            stats['hits'], stats['misses'],
+            "%.1f%%" % (ratio * 100) if ratio is not None else "-"))
+        if options['reset']:
+            reset_cache_stats()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 13:32
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_latest_answers(apps, schema_editor):
+    """Point every (homework, student) pair to its latest answer."""
+    Answer = apps.get_model('homework', 'Answer')
+    LatestAnswer = apps.get_model('homework', 'LatestAnswer')
+    latest_ids = Answer.objects.values('homework', 'student').annotate(
+        answer_id=models.Max('id')).order_by()
+    LatestAnswer.objects.bulk_create([
+        LatestAnswer(homework_id=row['homework'], student_id=row['student'],
+                     answer_id=row['answer_id'])
+        for row in latest_ids
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('homework', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestAnswer',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='latest', to='homework.Answer', verbose_name='Answer')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='homework',
+            name='question',
+            field=models.CharField(max_length=200, verbose_name='Question'),
+        ),
+        migrations.AddField(
+            model_name='latestanswer',
+            name='homework',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='homework.Homework', verbose_name='Homework'),
+        ),
+        migrations.AddField(
+            model_name='latestanswer',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Student'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='latestanswer',
+            unique_together=set([('homework', 'student')]),
+        ),
+        migrations.RunPython(
+            backfill_latest_answers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 13:33
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0002_latest_answer'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='answer',
+            index_together=set([('homework', 'student', 'pub_date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='homework',
+            index_together=set([('teacher', 'pub_date')]),
+        ),
+    ]
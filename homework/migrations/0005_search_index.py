@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+SQLITE_TABLES = [
+    "CREATE VIRTUAL TABLE homework_homework_search USING fts5("
+    "title, question, teacher_id UNINDEXED,"
+    " tokenize = 'unicode61 remove_diacritics 1')",
+    "CREATE VIRTUAL TABLE homework_answer_search USING fts5("
+    "description, homework_id UNINDEXED, teacher_id UNINDEXED,"
+    " student_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 1')",
+]
+
+SQLITE_INDEX = [
+    "INSERT INTO homework_homework_search (rowid, title, question,"
+    " teacher_id) SELECT id, title, question, teacher_id FROM {homework}",
+    "INSERT INTO homework_answer_search (rowid, description, homework_id,"
+    " teacher_id, student_id) SELECT a.id, a.description, a.homework_id,"
+    " h.teacher_id, a.student_id FROM {answer} a"
+    " JOIN {homework} h ON h.id = a.homework_id",
+]
+
+POSTGRESQL_TABLES = [
+    "CREATE TABLE homework_homework_search ("
+    "homework_id integer PRIMARY KEY, teacher_id integer NOT NULL,"
+    " document tsvector NOT NULL)",
+    "CREATE INDEX homework_homework_search_document"
+    " ON homework_homework_search USING GIN (document)",
+    "CREATE INDEX homework_homework_search_teacher"
+    " ON homework_homework_search (teacher_id)",
+    "CREATE TABLE homework_answer_search ("
+    "answer_id integer PRIMARY KEY, homework_id integer NOT NULL,"
+    " teacher_id integer NOT NULL, student_id integer NOT NULL,"
+    " document tsvector NOT NULL)",
+    "CREATE INDEX homework_answer_search_document"
+    " ON homework_answer_search USING GIN (document)",
+    "CREATE INDEX homework_answer_search_teacher"
+    " ON homework_answer_search (teacher_id)",
+    "CREATE INDEX homework_answer_search_student"
+    " ON homework_answer_search (student_id)",
+]
+
+POSTGRESQL_INDEX = [
+    "INSERT INTO homework_homework_search (homework_id, teacher_id,"
+    " document) SELECT id, teacher_id,"
+    " setweight(to_tsvector('english', title), 'A') ||"
+    " setweight(to_tsvector('english', question), 'B') FROM {homework}",
+    "INSERT INTO homework_answer_search (answer_id, homework_id, teacher_id,"
+    " student_id, document) SELECT a.id, a.homework_id, h.teacher_id,"
+    " a.student_id, to_tsvector('english', a.description) FROM {answer} a"
+    " JOIN {homework} h ON h.id = a.homework_id",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Create the index tables of the database and index the rows."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = SQLITE_TABLES + SQLITE_INDEX
+    elif vendor == 'postgresql':
+        statements = POSTGRESQL_TABLES + POSTGRESQL_INDEX
+    else:
+        return
+    tables = {
+        'homework': apps.get_model('homework', 'Homework')._meta.db_table,
+        'answer': apps.get_model('homework', 'Answer')._meta.db_table,
+    }
+    for statement in statements:
+        schema_editor.execute(statement.format(**tables))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE homework_homework_search")
+        schema_editor.execute("DROP TABLE homework_answer_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0004_sent_reminder'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 13:56
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='signature',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 13:59
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0006_answer_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='feedback',
+            field=models.TextField(blank=True, verbose_name='Feedback'),
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Score'),
+        ),
+        migrations.AlterIndexTogether(
+            name='answer',
+            index_together=set([('homework', 'student', 'pub_date'), ('homework', 'score')]),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 14:01
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_homework_stats(apps, schema_editor):
+    """Compute the statistics of every homework in two grouped queries."""
+    Homework = apps.get_model('homework', 'Homework')
+    Answer = apps.get_model('homework', 'Answer')
+    HomeworkStats = apps.get_model('homework', 'HomeworkStats')
+    stats = dict((homework_id, HomeworkStats(homework_id=homework_id))
+                 for homework_id in Homework.objects.values_list(
+                     'id', flat=True))
+    assigned = Homework.student.through.objects.values(
+        'homework_id').annotate(count=models.Count('id')).order_by()
+    for row in assigned:
+        stats[row['homework_id']].assigned_count = row['count']
+    answers = Answer.objects.values('homework_id').annotate(
+        answer_count=models.Count('id'),
+        answered_count=models.Count('student', distinct=True),
+        first_answer_at=models.Min('pub_date'),
+        last_answer_at=models.Max('pub_date')).order_by()
+    for row in answers:
+        homework_stats = stats[row.pop('homework_id')]
+        for field, value in row.items():
+            setattr(homework_stats, field, value)
+    HomeworkStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('homework', '0007_answer_grade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HomeworkStats',
+            fields=[
+                ('homework', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='homework.Homework', verbose_name='Homework')),
+                ('assigned_count', models.PositiveIntegerField(default=0)),
+                ('answer_count', models.PositiveIntegerField(default=0)),
+                ('answered_count', models.PositiveIntegerField(default=0)),
+                ('first_answer_at', models.DateTimeField(null=True)),
+                ('last_answer_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_homework_stats,
+                             migrations.RunPython.noop),
+    ]
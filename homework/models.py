@@ -1,6 +1,91 @@
-from django.db import models
+from datetime import date
+
+from django.db import models, transaction
+from django.db.models import Case, When, Value, Max, Min, Avg, Count, F
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+from django.db.models.expressions import RawSQL
 from django.utils.translation import ugettext_lazy as _
 from users.models import SchoolUser
+from .similarity import minhash
+
+MAX_SCORE = 100
+
+
+class HomeworkQuerySet(models.QuerySet):
+    """Homework queries that compute their figures in SQL."""
+
+    def _homework_subquery(self, sql, output_field, params=()):
+        """
+        Correlated subquery on the homework row, `sql` can use the
+        {homework}, {answer} and {assigned} table names.
+        """
+        tables = {
+            'homework': Homework._meta.db_table,
+            'answer': Answer._meta.db_table,
+            'assigned': Homework.student.through._meta.db_table,
+        }
+        return RawSQL(
+            "(%s)" % sql.format(**tables), params, output_field=output_field)
+
+    def with_teacher_stats(self):
+        """
+        Annotate each homework with `assigned_count`, `answered_count`,
+        `last_answered_at` and `overdue` within the list query itself.
+        """
+        return self.annotate(
+            assigned_count=self._homework_subquery(
+                "SELECT COUNT(*) FROM {assigned}"
+                " WHERE {assigned}.homework_id = {homework}.id",
+                models.IntegerField()),
+            answered_count=self._homework_subquery(
+                "SELECT COUNT(DISTINCT {answer}.student_id) FROM {answer}"
+                " WHERE {answer}.homework_id = {homework}.id",
+                models.IntegerField()),
+            last_answered_at=self._homework_subquery(
+                "SELECT MAX({answer}.pub_date) FROM {answer}"
+                " WHERE {answer}.homework_id = {homework}.id",
+                models.DateTimeField()),
+            overdue=Case(
+                When(due_date__lt=date.today(), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField()),
+        )
+
+    def with_stats(self):
+        """
+        Annotate each homework with the figures of `with_teacher_stats`,
+        read from its HomeworkStats row instead of being computed.
+        """
+        return self.annotate(
+            assigned_count=Coalesce(F('stats__assigned_count'), Value(0)),
+            answered_count=Coalesce(F('stats__answered_count'), Value(0)),
+            last_answered_at=F('stats__last_answer_at'),
+            overdue=Case(
+                When(due_date__lt=date.today(), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField()),
+        )
+
+    def with_student_status(self, student):
+        """
+        Annotate each homework with `answered`, `answer_count` and
+        `last_answered_at` for `student` within the list query itself.
+        """
+        student_answers = (" FROM {answer} WHERE {answer}.homework_id ="
+                           " {homework}.id AND {answer}.student_id = %s")
+        return self.annotate(
+            answered=self._homework_subquery(
+                "EXISTS (SELECT 1" + student_answers + ")",
+                models.BooleanField(), (student.id,)),
+            answer_count=self._homework_subquery(
+                "SELECT COUNT(*)" + student_answers,
+                models.IntegerField(), (student.id,)),
+            last_answered_at=self._homework_subquery(
+                "SELECT MAX({answer}.pub_date)" + student_answers,
+                models.DateTimeField(), (student.id,)),
+        )
+
 
 class Homework(models.Model):
     title = models.CharField(_("Title"), max_length=200)
@@ -13,11 +98,77 @@ class Homework(models.Model):
     due_date = models.DateField(_("Due date"))
     pub_date = models.DateTimeField(auto_now_add=True)
 
+    objects = HomeworkQuerySet.as_manager()
+
+    class Meta:
+        index_together = [
+            # Teacher's homework list, newest first
+            ('teacher', 'pub_date'),
+        ]
+
     def __str__(self):
         return self.title
 
     def has_answered(self, student):
-        return student.id in self.answer_set.values_list('student', flat=True)
+        return self.answer_set.filter(student=student).exists()
+
+    def assign_students(self, students):
+        """
+        Assign every student of the `students` queryset in one bulk insert.
+        Users that are not students are ignored.
+        """
+        student_ids = students.filter(
+            user_type='student').values_list('id', flat=True)
+        self.student.add(*student_ids)
+
+    def unassign_students(self, students):
+        """Remove every student of the `students` queryset in one delete."""
+        student_ids = students.filter(
+            user_type='student').values_list('id', flat=True)
+        self.student.remove(*student_ids)
+
+    def grade_stats(self):
+        """
+        Count, average, min and max score of the graded answers, read from
+        the (homework, score) index.
+        """
+        return self.answer_set.filter(score__isnull=False).aggregate(
+            graded=Count('score'), average=Avg('score'), lowest=Min('score'),
+            highest=Max('score'))
+
+
+class AnswerManager(models.Manager):
+
+    def grade(self, grades, batch_size=100):
+        """
+        Apply the (answer id, score, feedback) `grades` with one UPDATE per
+        `batch_size` answers, all in one transaction. A None score removes
+        the grade and its date. Returns the number of answers graded.
+        """
+        graded = 0
+        now = timezone.now()
+        with transaction.atomic():
+            for start in range(0, len(grades), batch_size):
+                batch = grades[start:start + batch_size]
+                graded += self.filter(
+                    id__in=[answer_id for answer_id, score, feedback
+                            in batch]
+                ).update(
+                    score=Case(*[
+                        When(id=answer_id, then=Value(score))
+                        for answer_id, score, feedback in batch
+                    ], output_field=models.PositiveSmallIntegerField()),
+                    feedback=Case(*[
+                        When(id=answer_id, then=Value(feedback))
+                        for answer_id, score, feedback in batch
+                    ], output_field=models.TextField()),
+                    graded_at=Case(*[
+                        When(id=answer_id, then=Value(None))
+                        for answer_id, score, feedback in batch
+                        if score is None
+                    ], default=Value(now),
+                        output_field=models.DateTimeField()))
+        return graded
 
 
 class Answer(models.Model):
@@ -27,6 +178,291 @@ class Answer(models.Model):
     homework = models.ForeignKey(
         Homework, verbose_name=_("Student"))
     pub_date = models.DateTimeField(auto_now_add=True)
+    # MinHash signature of the description, see similarity
+    signature = models.BinaryField(null=True, editable=False)
+    score = models.PositiveSmallIntegerField(
+        _("Score"), null=True, blank=True)
+    feedback = models.TextField(_("Feedback"), blank=True)
+    graded_at = models.DateTimeField(null=True, blank=True)
+
+    objects = AnswerManager()
+
+    class Meta:
+        index_together = [
+            # Submission history of a student for a homework
+            ('homework', 'student', 'pub_date'),
+            # Grade statistics of a homework
+            ('homework', 'score'),
+        ]
 
     def __str__(self):
         return str(self.id)
+
+    def save(self, *args, **kwargs):
+        """
+        Sign the description and keep the student's latest answer pointer
+        and the homework statistics in the same transaction.
+        """
+        created = self.pk is None
+        self.signature = minhash(self.description)
+        with transaction.atomic():
+            super(Answer, self).save(*args, **kwargs)
+            if created:
+                latest, first = LatestAnswer.objects.update_or_create(
+                    homework_id=self.homework_id,
+                    student_id=self.student_id,
+                    defaults={'answer': self})
+                HomeworkStats.objects.answer_added(self, first)
+
+
+class LatestAnswerManager(models.Manager):
+
+    def answer_deleted(self, answer):
+        """
+        Point back to the newest remaining answer of the student after
+        `answer` is deleted, its pointer goes with it.
+        """
+        answer_id = Answer.objects.filter(
+            homework_id=answer.homework_id, student_id=answer.student_id
+        ).order_by('-id').values_list('id', flat=True).first()
+        if answer_id is not None:
+            self.update_or_create(
+                homework_id=answer.homework_id, student_id=answer.student_id,
+                defaults={'answer_id': answer_id})
+
+    def rebuild(self, homeworks=None, batch_size=1000):
+        """
+        Recompute the pointers from the answer history, optionally only for
+        the `homeworks` queryset. Answers ids grow with their pub_date so the
+        latest answer is the one with the highest id.
+        Returns the number of pointers written.
+        """
+        answers = Answer.objects.all()
+        latest = self.all()
+        if homeworks is not None:
+            answers = answers.filter(homework__in=homeworks)
+            latest = latest.filter(homework__in=homeworks)
+        latest_ids = answers.values('homework', 'student').annotate(
+            answer_id=Max('id')).order_by()
+        written = 0
+        pointers = []
+        with transaction.atomic():
+            latest.delete()
+            for row in latest_ids.iterator():
+                pointers.append(LatestAnswer(
+                    homework_id=row['homework'],
+                    student_id=row['student'],
+                    answer_id=row['answer_id']))
+                if len(pointers) == batch_size:
+                    self.bulk_create(pointers)
+                    written += len(pointers)
+                    pointers = []
+            self.bulk_create(pointers)
+            written += len(pointers)
+        return written
+
+
+class LatestAnswer(models.Model):
+    """Pointer to the latest answer of a student for a homework."""
+    homework = models.ForeignKey(
+        Homework, verbose_name=_("Homework"))
+    student = models.ForeignKey(
+        SchoolUser, verbose_name=_("Student"))
+    answer = models.OneToOneField(
+        Answer, verbose_name=_("Answer"), related_name="latest")
+
+    objects = LatestAnswerManager()
+
+    class Meta:
+        unique_together = ('homework', 'student')
+
+    def __str__(self):
+        return str(self.answer_id)
+
+
+class SentReminderManager(models.Manager):
+
+    def pending(self, due_from, due_to):
+        """
+        (homework id, student id) of the assignments due between `due_from`
+        and `due_to` whose student neither answered nor got a reminder,
+        in one query.
+        """
+        through = Homework.student.through
+        not_exists = (
+            "NOT EXISTS (SELECT 1 FROM {table}"
+            " WHERE {table}.homework_id = {assigned}.homework_id"
+            " AND {table}.student_id = {assigned}.schooluser_id)")
+        return through.objects.filter(
+            homework__due_date__range=(due_from, due_to)
+        ).extra(where=[
+            not_exists.format(table=table, assigned=through._meta.db_table)
+            for table in (LatestAnswer._meta.db_table,
+                          self.model._meta.db_table)
+        ]).order_by('homework_id', 'schooluser_id').values_list(
+            'homework_id', 'schooluser_id')
+
+
+class SentReminder(models.Model):
+    """Due date reminder sent to a student for a homework."""
+    homework = models.ForeignKey(
+        Homework, verbose_name=_("Homework"))
+    student = models.ForeignKey(
+        SchoolUser, verbose_name=_("Student"))
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SentReminderManager()
+
+    class Meta:
+        unique_together = ('homework', 'student')
+
+    def __str__(self):
+        return '%s: %s' % (self.homework_id, self.student_id)
+
+
+STATS_FIELDS = ('assigned_count', 'answer_count', 'answered_count',
+                'first_answer_at', 'last_answer_at')
+
+
+class HomeworkStatsManager(models.Manager):
+
+    def computed(self, homework_ids=None):
+        """
+        Statistics computed from the assignments and answers, by homework
+        id, in two grouped queries. `homework_ids` can be a queryset.
+        """
+        homeworks = Homework.objects.all()
+        if homework_ids is not None:
+            homeworks = homeworks.filter(id__in=homework_ids)
+        stats = dict(
+            (homework_id, {
+                'assigned_count': 0,
+                'answer_count': 0,
+                'answered_count': 0,
+                'first_answer_at': None,
+                'last_answer_at': None,
+            }) for homework_id in homeworks.values_list('id', flat=True))
+        assigned = Homework.student.through.objects.filter(
+            homework__in=homeworks).values('homework_id').annotate(
+                count=Count('id')).order_by()
+        for row in assigned:
+            stats[row['homework_id']]['assigned_count'] = row['count']
+        answers = Answer.objects.filter(
+            homework__in=homeworks).values('homework_id').annotate(
+                answer_count=Count('id'),
+                answered_count=Count('student', distinct=True),
+                first_answer_at=Min('pub_date'),
+                last_answer_at=Max('pub_date')).order_by()
+        for row in answers:
+            stats[row.pop('homework_id')].update(row)
+        return stats
+
+    def reconcile(self, homework_ids=None, fix=False):
+        """
+        Compare the rows with the computed statistics. Returns the drift as
+        (homework id, field, stored, computed) tuples, a missing row has
+        None as field. With `fix` the rows are rewritten.
+        """
+        computed = self.computed(homework_ids)
+        rows = self.all()
+        if homework_ids is not None:
+            rows = rows.filter(homework_id__in=homework_ids)
+        stored = dict((row.pop('homework_id'), row) for row in rows.values(
+            'homework_id', *STATS_FIELDS))
+        drift = []
+        with transaction.atomic():
+            missing = []
+            for homework_id, values in sorted(computed.items()):
+                row = stored.get(homework_id)
+                if row is None:
+                    drift.append((homework_id, None, None, values))
+                    missing.append(self.model(homework_id=homework_id,
+                                              **values))
+                    continue
+                fields = [field for field in STATS_FIELDS
+                          if row[field] != values[field]]
+                drift.extend((homework_id, field, row[field], values[field])
+                             for field in fields)
+                if fix and fields:
+                    self.filter(homework_id=homework_id).update(**values)
+            if fix:
+                self.bulk_create(missing)
+        return drift
+
+    def refresh(self, homework_ids):
+        """Rewrite the rows of `homework_ids` from the computed statistics."""
+        self.reconcile(homework_ids, fix=True)
+
+    def _bump(self, homework_ids, **changes):
+        """Apply `changes` to the rows, create the ones missing."""
+        updated = self.filter(homework_id__in=homework_ids).update(**changes)
+        if updated != len(homework_ids):
+            self.refresh(homework_ids)
+
+    def answer_added(self, answer, first):
+        """Count a new `answer`, `first` if the student had none before."""
+        pub_date = Value(answer.pub_date, output_field=models.DateTimeField())
+        # Commits may come in any order, the dates only ever widen
+        self._bump(
+            [answer.homework_id],
+            answer_count=F('answer_count') + 1,
+            answered_count=F('answered_count') + int(first),
+            first_answer_at=Least(Coalesce(F('first_answer_at'), pub_date),
+                                  pub_date),
+            last_answer_at=Greatest(Coalesce(F('last_answer_at'), pub_date),
+                                    pub_date))
+
+    def answer_deleted(self, answer):
+        """
+        Uncount a deleted `answer`. The answered count and the dates are
+        only read again when the answer was the student's last one or the
+        first or last answer of the homework.
+        """
+        rows = self.filter(homework_id=answer.homework_id)
+        dates = rows.values_list('first_answer_at', 'last_answer_at').first()
+        if dates is None:
+            return
+        answers = Answer.objects.filter(homework_id=answer.homework_id)
+        changes = {'answer_count': F('answer_count') - 1}
+        if not answers.filter(student_id=answer.student_id).exists():
+            changes['answered_count'] = F('answered_count') - 1
+        if answer.pub_date in dates:
+            changes.update(answers.aggregate(
+                first_answer_at=Min('pub_date'),
+                last_answer_at=Max('pub_date')))
+        rows.update(**changes)
+
+    def assigned(self, homework_ids, count):
+        """Add `count` assignments, negative for removals, to homework."""
+        self._bump(homework_ids,
+                   assigned_count=F('assigned_count') + count)
+
+
+class HomeworkStats(models.Model):
+    """Figures of a homework, maintained as answers and assignments change."""
+    homework = models.OneToOneField(
+        Homework, primary_key=True, related_name='stats',
+        verbose_name=_("Homework"))
+    assigned_count = models.PositiveIntegerField(default=0)
+    answer_count = models.PositiveIntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
+    first_answer_at = models.DateTimeField(null=True)
+    last_answer_at = models.DateTimeField(null=True)
+
+    objects = HomeworkStatsManager()
+
+    def __str__(self):
+        return str(self.homework_id)
+
+    @property
+    def submission_rate(self):
+        """Fraction of the assigned students who answered."""
+        if not self.assigned_count:
+            return None
+        return float(self.answered_count) / self.assigned_count
+
+    @property
+    def answers_per_student(self):
+        if not self.answered_count:
+            return None
+        return float(self.answer_count) / self.answered_count
@@ -0,0 +1,180 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(direction, values):
+    """Opaque URL-safe cursor for the `values` of a row's ordering keys."""
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value
+              for value in values]
+    data = json.dumps([direction, values]).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (direction, values) of a cursor, raise ValueError if bad."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        data = base64.urlsafe_b64decode((cursor + padding).encode('ascii'))
+        direction, values = json.loads(data.decode('utf-8'))
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return direction, values
+
+
+class KeysetPaginator(object):
+    """
+    Paginate a queryset on a unique ordering, e.g. ('-pub_date', '-id'),
+    by filtering on the keys of the last row seen instead of using OFFSET.
+    Every page costs the same whatever its depth.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count=False):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+        self.keys = [(field.lstrip('-'), field.startswith('-'))
+                     for field in ordering]
+        self.count = queryset.count() if count else None
+
+    def key_values(self, obj):
+        """Values of the ordering keys for `obj`."""
+        values = []
+        for field, descending in self.keys:
+            try:
+                # Use the raw id of foreign keys
+                field = obj._meta.get_field(field).attname
+            except FieldDoesNotExist:
+                pass
+            values.append(getattr(obj, field))
+        return values
+
+    def cursor_values(self, values):
+        """
+        Cursor `values` converted by their ordering fields, raise ValueError
+        if one does not fit its field.
+        """
+        converted = []
+        for (field, descending), value in zip(self.keys, values):
+            try:
+                field = self.queryset.model._meta.get_field(field)
+            except FieldDoesNotExist:
+                converted.append(value)
+                continue
+            try:
+                converted.append(field.to_python(value))
+            except (ValidationError, TypeError):
+                raise ValueError("Invalid cursor")
+        return converted
+
+    def page_queryset(self, cursor=None):
+        """
+        Queryset of the page after (or before) `cursor`, with one extra row
+        to know if there is a following page.
+        """
+        queryset = self.queryset
+        backwards = False
+        if cursor:
+            direction, values = decode_cursor(cursor)
+            if len(values) != len(self.keys):
+                raise ValueError("Invalid cursor")
+            backwards = direction == 'prev'
+            queryset = queryset.filter(
+                self._after(self.cursor_values(values), backwards))
+        ordering = [
+            ('-' if descending != backwards else '') + field
+            for field, descending in self.keys
+        ]
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def _after(self, values, backwards):
+        """Rows strictly after `values` in the (maybe reversed) ordering."""
+        condition = Q()
+        for i, (field, descending) in enumerate(self.keys):
+            lookup = 'lt' if descending != backwards else 'gt'
+            term = Q(**{'%s__%s' % (field, lookup): values[i]})
+            for j in range(i):
+                term &= Q(**{self.keys[j][0]: values[j]})
+            condition |= term
+        return condition
+
+    def page(self, cursor=None):
+        """Return the KeysetPage for `cursor`."""
+        rows = list(self.page_queryset(cursor))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        backwards = bool(cursor) and decode_cursor(cursor)[0] == 'prev'
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=has_more)
+        return KeysetPage(rows, self, has_next=has_more,
+                          has_previous=bool(cursor))
+
+
+class KeysetPage(object):
+    """Page of a KeysetPaginator, with the cursors of its neighbours."""
+    cursor_based = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return encode_cursor(
+                'next', self.paginator.key_values(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            return encode_cursor(
+                'prev', self.paginator.key_values(self.object_list[0]))
+
+
+class KeysetPaginationMixin(object):
+    """
+    ListView mixin replacing OFFSET pagination with keyset pagination on
+    `keyset_ordering`, which must end with a unique field such as 'id'.
+    Set `keyset_count` to also compute the total number of items.
+    """
+    keyset_ordering = ('-pub_date', '-id')
+    keyset_count = False
+    cursor_kwarg = 'cursor'
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return KeysetPaginator(queryset, self.keyset_ordering, per_page,
+                               count=self.keyset_count)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        try:
+            page = paginator.page(cursor)
+        except ValueError:
+            raise Http404("Invalid page cursor.")
+        return (paginator, page, page.object_list, page.has_other_pages())
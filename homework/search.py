@@ -0,0 +1,193 @@
+"""
+Full-text search of the homework and answers.
+
+The documents live in two index tables keyed by the homework and answer
+ids, created by migration 0005: FTS5 virtual tables on SQLite, tables with
+a GIN indexed tsvector on PostgreSQL. They are kept up to date by the
+homework signals and rebuilt with `manage.py rebuild_search_index`. Other
+databases fall back to unranked substring matching.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Homework, Answer
+
+HOMEWORK_TABLE = 'homework_homework_search'
+ANSWER_TABLE = 'homework_answer_search'
+# Text search configuration of PostgreSQL
+PG_CONFIG = 'english'
+
+
+def backend():
+    if connection.vendor in ('postgresql', 'sqlite'):
+        return connection.vendor
+    return None
+
+
+def execute(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        if cursor.description is not None:
+            return cursor.fetchall()
+
+
+def index_homework(homework):
+    if backend() == 'sqlite':
+        execute("DELETE FROM %s WHERE rowid = %%s" % HOMEWORK_TABLE,
+                [homework.id])
+        execute("INSERT INTO %s (rowid, title, question, teacher_id)"
+                " VALUES (%%s, %%s, %%s, %%s)" % HOMEWORK_TABLE,
+                [homework.id, homework.title, homework.question,
+                 homework.teacher_id])
+    elif backend() == 'postgresql':
+        execute("DELETE FROM %s WHERE homework_id = %%s" % HOMEWORK_TABLE,
+                [homework.id])
+        execute("INSERT INTO %s (homework_id, teacher_id, document) VALUES"
+                " (%%s, %%s, setweight(to_tsvector(%%s, %%s), 'A') ||"
+                " setweight(to_tsvector(%%s, %%s), 'B'))" % HOMEWORK_TABLE,
+                [homework.id, homework.teacher_id, PG_CONFIG, homework.title,
+                 PG_CONFIG, homework.question])
+
+
+def index_answer(answer):
+    teacher_id = answer.homework.teacher_id
+    if backend() == 'sqlite':
+        execute("DELETE FROM %s WHERE rowid = %%s" % ANSWER_TABLE,
+                [answer.id])
+        execute("INSERT INTO %s (rowid, description, homework_id,"
+                " teacher_id, student_id) VALUES (%%s, %%s, %%s, %%s, %%s)"
+                % ANSWER_TABLE,
+                [answer.id, answer.description, answer.homework_id,
+                 teacher_id, answer.student_id])
+    elif backend() == 'postgresql':
+        execute("DELETE FROM %s WHERE answer_id = %%s" % ANSWER_TABLE,
+                [answer.id])
+        execute("INSERT INTO %s (answer_id, homework_id, teacher_id,"
+                " student_id, document) VALUES (%%s, %%s, %%s, %%s,"
+                " to_tsvector(%%s, %%s))" % ANSWER_TABLE,
+                [answer.id, answer.homework_id, teacher_id,
+                 answer.student_id, PG_CONFIG, answer.description])
+
+
+def unindex_homework(homework_id):
+    if backend() is not None:
+        key = 'rowid' if backend() == 'sqlite' else 'homework_id'
+        execute("DELETE FROM %s WHERE %s = %%s" % (HOMEWORK_TABLE, key),
+                [homework_id])
+
+
+def unindex_answer(answer_id):
+    if backend() is not None:
+        key = 'rowid' if backend() == 'sqlite' else 'answer_id'
+        execute("DELETE FROM %s WHERE %s = %%s" % (ANSWER_TABLE, key),
+                [answer_id])
+
+
+def rebuild():
+    """Reindex every homework and answer with two INSERT ... SELECT."""
+    tables = {
+        'homework_search': HOMEWORK_TABLE,
+        'answer_search': ANSWER_TABLE,
+        'homework': Homework._meta.db_table,
+        'answer': Answer._meta.db_table,
+    }
+    if backend() == 'sqlite':
+        statements = [
+            "DELETE FROM {homework_search}",
+            "DELETE FROM {answer_search}",
+            "INSERT INTO {homework_search} (rowid, title, question,"
+            " teacher_id) SELECT id, title, question, teacher_id"
+            " FROM {homework}",
+            "INSERT INTO {answer_search} (rowid, description, homework_id,"
+            " teacher_id, student_id) SELECT a.id, a.description,"
+            " a.homework_id, h.teacher_id, a.student_id FROM {answer} a"
+            " JOIN {homework} h ON h.id = a.homework_id",
+            "INSERT INTO {homework_search} ({homework_search})"
+            " VALUES ('optimize')",
+            "INSERT INTO {answer_search} ({answer_search})"
+            " VALUES ('optimize')",
+        ]
+        params = ()
+    elif backend() == 'postgresql':
+        statements = [
+            "TRUNCATE {homework_search}, {answer_search}",
+            "INSERT INTO {homework_search} (homework_id, teacher_id,"
+            " document) SELECT id, teacher_id,"
+            " setweight(to_tsvector(%(config)s, title), 'A') ||"
+            " setweight(to_tsvector(%(config)s, question), 'B')"
+            " FROM {homework}",
+            "INSERT INTO {answer_search} (answer_id, homework_id,"
+            " teacher_id, student_id, document) SELECT a.id, a.homework_id,"
+            " h.teacher_id, a.student_id,"
+            " to_tsvector(%(config)s, a.description) FROM {answer} a"
+            " JOIN {homework} h ON h.id = a.homework_id",
+        ]
+        params = {'config': PG_CONFIG}
+    else:
+        return
+    for statement in statements:
+        execute(statement.format(**tables), params)
+
+
+def fts5_query(text):
+    """Quoted FTS5 query matching all the words of `text`."""
+    return ' '.join('"%s"' % word for word in re.findall(
+        r'\w+', text, re.UNICODE))
+
+
+def ranked_ids(table, key, scope, text, limit):
+    """Ids of the `table` rows matching `text` within `scope`, best first."""
+    conditions = ''.join(' AND %s = %%s' % column for column in scope)
+    scope_params = list(scope.values())
+    if backend() == 'sqlite':
+        query = fts5_query(text)
+        if not query:
+            return []
+        rows = execute(
+            "SELECT rowid FROM {table} WHERE {table} MATCH %s{conditions}"
+            " ORDER BY rank LIMIT %s".format(table=table,
+                                            conditions=conditions),
+            [query] + scope_params + [limit])
+    else:
+        rows = execute(
+            "SELECT {key} FROM {table}, plainto_tsquery(%s, %s) query"
+            " WHERE document @@ query{conditions}"
+            " ORDER BY ts_rank(document, query) DESC, {key} DESC"
+            " LIMIT %s".format(table=table, key=key, conditions=conditions),
+            [PG_CONFIG, text] + scope_params + [limit])
+    return [row[0] for row in rows]
+
+
+def in_order(objects, ids):
+    return [objects[id] for id in ids if id in objects]
+
+
+def search(user, text, limit=20):
+    """
+    Homework and answers matching `text` that `user` can see, best matches
+    first: a teacher's homework and their answers, or a student's own
+    answers.
+    """
+    homeworks = []
+    if user.user_type == 'teacher':
+        scope = {'teacher_id': user.id}
+    else:
+        scope = {'student_id': user.id}
+    answers = Answer.objects.select_related('homework', 'student')
+    if backend() is None:
+        if user.user_type == 'teacher':
+            homeworks = list(Homework.objects.filter(
+                Q(title__icontains=text) | Q(question__icontains=text),
+                teacher=user)[:limit])
+            answers = answers.filter(homework__teacher=user)
+        else:
+            answers = answers.filter(student=user)
+        return homeworks, list(answers.filter(
+            description__icontains=text)[:limit])
+    if user.user_type == 'teacher':
+        ids = ranked_ids(HOMEWORK_TABLE, 'homework_id', scope, text, limit)
+        homeworks = in_order(Homework.objects.in_bulk(ids), ids)
+    ids = ranked_ids(ANSWER_TABLE, 'answer_id', scope, text, limit)
+    return homeworks, in_order(answers.in_bulk(ids), ids)
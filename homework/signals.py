@@ -0,0 +1,159 @@
+import threading
+
+from django.db.models.signals import (
+    m2m_changed, post_save, pre_delete, post_delete)
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+from . import search
+from .cache import invalidate_student_lists, invalidate_teacher_lists
+from .models import Homework, Answer, LatestAnswer, HomeworkStats
+
+
+def homework_teachers(homework_ids):
+    return set(Homework.objects.filter(
+        id__in=homework_ids).values_list('teacher_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Homework.student.through)
+def assignments_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate the student and teacher lists the assignments are on."""
+    if action == 'pre_clear':
+        # The cleared rows are gone by post_clear, collect them now
+        if reverse:
+            instance._cleared_students = [instance.id]
+            instance._cleared_teachers = homework_teachers(
+                instance.assigned_homeworks.values_list('id', flat=True))
+        else:
+            instance._cleared_students = list(
+                instance.student.values_list('id', flat=True))
+            instance._cleared_teachers = [instance.teacher_id]
+    elif action == 'post_clear':
+        invalidate_student_lists(getattr(instance, '_cleared_students', []))
+        invalidate_teacher_lists(getattr(instance, '_cleared_teachers', []))
+    elif action in ('post_add', 'post_remove'):
+        if reverse:
+            invalidate_student_lists([instance.id])
+            invalidate_teacher_lists(homework_teachers(pk_set))
+        else:
+            invalidate_student_lists(pk_set)
+            invalidate_teacher_lists([instance.teacher_id])
+
+
+@receiver(post_save, sender=Homework)
+@receiver(pre_delete, sender=Homework)
+def homework_changed(sender, instance, created=False, **kwargs):
+    invalidate_teacher_lists([instance.teacher_id])
+    if not created:
+        invalidate_student_lists(
+            instance.student.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Answer)
+def answer_saved(sender, instance, **kwargs):
+    invalidate_student_lists([instance.student_id])
+    invalidate_teacher_lists(homework_teachers([instance.homework_id]))
+
+
+@receiver(m2m_changed, sender=Homework.student.through)
+def notify_assigned(sender, instance, action, reverse, pk_set, **kwargs):
+    """Queue the notification of the newly assigned students."""
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        for homework_id in pk_set:
+            enqueue('homework.notify_assigned', {
+                'homework_id': homework_id, 'student_ids': [instance.id]})
+    else:
+        enqueue('homework.notify_assigned', {
+            'homework_id': instance.id, 'student_ids': sorted(pk_set)})
+
+
+@receiver(post_save, sender=Answer)
+def notify_answer(sender, instance, created, **kwargs):
+    """Queue the notification of the teacher."""
+    if created:
+        enqueue('homework.notify_answer', {'answer_id': instance.id})
+
+
+@receiver(post_save, sender=Homework)
+def index_homework(sender, instance, **kwargs):
+    search.index_homework(instance)
+
+
+@receiver(post_save, sender=Answer)
+def index_answer(sender, instance, **kwargs):
+    search.index_answer(instance)
+
+
+@receiver(post_delete, sender=Homework)
+def unindex_homework(sender, instance, **kwargs):
+    search.unindex_homework(instance.id)
+
+
+@receiver(post_delete, sender=Answer)
+def unindex_answer(sender, instance, **kwargs):
+    search.unindex_answer(instance.id)
+
+
+@receiver(post_save, sender=Homework)
+def create_stats(sender, instance, created, **kwargs):
+    if created:
+        HomeworkStats.objects.create(homework=instance)
+
+
+@receiver(m2m_changed, sender=Homework.student.through)
+def assigned_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    """Count the assignments of the homework statistics."""
+    if action == 'pre_remove' and pk_set:
+        # pk_set holds every id passed to remove(), assigned or not
+        if reverse:
+            instance._removed_homeworks = list(sender.objects.filter(
+                schooluser_id=instance.id, homework_id__in=pk_set
+            ).values_list('homework_id', flat=True))
+        else:
+            instance._removed_count = sender.objects.filter(
+                homework_id=instance.id, schooluser_id__in=pk_set).count()
+    elif action == 'post_remove' and pk_set:
+        if reverse:
+            removed = getattr(instance, '_removed_homeworks', [])
+            if removed:
+                HomeworkStats.objects.assigned(removed, -1)
+        else:
+            removed = getattr(instance, '_removed_count', 0)
+            if removed:
+                HomeworkStats.objects.assigned([instance.id], -removed)
+    elif action == 'post_add' and pk_set:
+        if reverse:
+            HomeworkStats.objects.assigned(list(pk_set), 1)
+        else:
+            HomeworkStats.objects.assigned([instance.id], len(pk_set))
+    elif action == 'pre_clear' and reverse:
+        instance._cleared_homeworks = list(
+            instance.assigned_homeworks.values_list('id', flat=True))
+    elif action == 'post_clear':
+        HomeworkStats.objects.refresh(
+            getattr(instance, '_cleared_homeworks', []) if reverse
+            else [instance.id])
+
+
+# Ids of the homework being deleted by this thread
+deleting = threading.local()
+
+
+@receiver(pre_delete, sender=Homework)
+def homework_deleting(sender, instance, **kwargs):
+    deleting.__dict__.setdefault('homework_ids', set()).add(instance.id)
+
+
+@receiver(post_delete, sender=Homework)
+def homework_deleted(sender, instance, **kwargs):
+    deleting.__dict__.setdefault('homework_ids', set()).discard(instance.id)
+
+
+@receiver(post_delete, sender=Answer)
+def answer_deleted(sender, instance, **kwargs):
+    # The pointers and statistics of a homework being deleted go with it
+    if instance.homework_id not in getattr(deleting, 'homework_ids', ()):
+        LatestAnswer.objects.answer_deleted(instance)
+        HomeworkStats.objects.answer_deleted(instance)
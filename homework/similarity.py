@@ -0,0 +1,111 @@
+"""
+Near-duplicate detection of answers with MinHash and LSH.
+
+Every answer gets a MinHash signature of its character shingles when it is
+saved. The fraction of equal values of two signatures estimates the Jaccard
+similarity of the answers. To avoid comparing every pair, signatures are
+cut in bands and only answers sharing a whole band are compared.
+
+NumPy, listed in the requirements, computes the signatures. They are
+computed in pure Python when it is missing, both give the same values.
+"""
+import random
+import re
+import struct
+import zlib
+from itertools import combinations, islice
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+SHINGLE_SIZE = 5
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+# Answers at least that similar are reported
+THRESHOLD = 0.7
+PRIME = (1 << 61) - 1
+MAX_HASH = 0xffffffff
+
+# Coefficients of the permutations, a * x stays below 2 ** 63
+_random = random.Random(2016)
+PERMUTATIONS = [(_random.randint(1, 1 << 31), _random.randint(0, 1 << 31))
+                for i in range(NUM_PERM)]
+if numpy is not None:
+    _A = numpy.array([a for a, b in PERMUTATIONS], dtype=numpy.uint64)
+    _B = numpy.array([b for a, b in PERMUTATIONS], dtype=numpy.uint64)
+
+
+def shingles(text):
+    """32 bit hashes of the character shingles of the normalized text."""
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    if not text:
+        return set()
+    encoded = text.encode('utf-8')
+    return set(zlib.crc32(encoded[i:i + SHINGLE_SIZE]) & MAX_HASH
+               for i in range(max(1, len(encoded) - SHINGLE_SIZE + 1)))
+
+
+def minhash(text):
+    """Packed MinHash signature of `text`, None for blank texts."""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    if numpy is not None:
+        values = numpy.array(sorted(hashes), dtype=numpy.uint64)
+        signature = ((numpy.outer(_A, values) + _B[:, None]) % PRIME
+                     ).min(axis=1) & MAX_HASH
+        signature = [int(value) for value in signature]
+    else:
+        signature = [min((a * value + b) % PRIME for value in hashes)
+                     & MAX_HASH for a, b in PERMUTATIONS]
+    return struct.pack('<%dI' % NUM_PERM, *signature)
+
+
+def unpack(signature):
+    return struct.unpack('<%dI' % NUM_PERM, bytes(signature))
+
+
+def estimate(signature, other):
+    """Estimated Jaccard similarity of two unpacked signatures."""
+    return sum(1 for a, b in zip(signature, other) if a == b) / float(
+        NUM_PERM)
+
+
+def duplicates(rows, threshold=THRESHOLD, limit=None):
+    """
+    Pairs of (key, other key, similarity) at least `threshold` similar
+    among the (key, packed signature) `rows`, most similar first. Keys
+    with the same signature are only compared with each other, so many
+    equal answers cost no more than one.
+    """
+    groups = {}
+    for key, signature in rows:
+        if signature is not None:
+            groups.setdefault(bytes(signature), []).append(key)
+    exact = []
+    signatures = {}
+    for signature, keys in groups.items():
+        keys.sort()
+        exact.extend(islice(combinations(keys, 2), limit))
+        signatures[keys[0]] = unpack(signature)
+    pairs = [(key, other, 1.0) for key, other in sorted(exact)]
+    buckets = {}
+    for key, signature in signatures.items():
+        for band in range(BANDS):
+            buckets.setdefault(
+                (band, signature[band * ROWS:(band + 1) * ROWS]), []
+            ).append(key)
+    candidates = set()
+    for keys in buckets.values():
+        candidates.update(combinations(sorted(keys), 2))
+    near = []
+    for key, other in candidates:
+        similarity = estimate(signatures[key], signatures[other])
+        if similarity >= threshold:
+            near.append((key, other, similarity))
+    near.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+    pairs.extend(near)
+    return pairs[:limit] if limit is not None else pairs
@@ -0,0 +1,83 @@
+"""Background jobs of the homework app, see jobs.queue."""
+from django.core.mail import send_mass_mail
+from django.utils.translation import ugettext as _
+
+from jobs.queue import register
+from users.models import SchoolUser
+from .models import Homework, Answer
+
+
+@register('homework.notify_assigned', batch_size=100)
+def notify_assigned(payloads):
+    """Email the students newly assigned to a homework."""
+    homeworks = Homework.objects.in_bulk(
+        set(payload['homework_id'] for payload in payloads))
+    emails = dict(SchoolUser.objects.filter(
+        id__in=set(student_id for payload in payloads
+                   for student_id in payload['student_ids'])
+    ).exclude(email='').values_list('id', 'email'))
+    messages = []
+    for payload in payloads:
+        # The homework may have been deleted since
+        homework = homeworks.get(payload['homework_id'])
+        if homework is None:
+            continue
+        subject = _("New homework: %s") % homework.title
+        body = _("%(question)s\n\nDue on %(due_date)s.") % {
+            'question': homework.question,
+            'due_date': homework.due_date,
+        }
+        messages.extend(
+            (subject, body, None, [emails[student_id]])
+            for student_id in payload['student_ids'] if student_id in emails)
+    # One connection for the whole batch
+    send_mass_mail(messages)
+
+
+@register('homework.notify_answer', batch_size=100)
+def notify_answer(payloads):
+    """Email each teacher one digest of the new answers to their homework."""
+    answers = Answer.objects.filter(
+        id__in=[payload['answer_id'] for payload in payloads]
+    ).select_related('homework__teacher', 'student').order_by('id')
+    by_teacher = {}
+    for answer in answers:
+        by_teacher.setdefault(answer.homework.teacher, []).append(answer)
+    messages = []
+    for teacher, teacher_answers in by_teacher.items():
+        if not teacher.email:
+            continue
+        lines = [_("%(student)s answered %(homework)s: %(answer)s") % {
+            'student': answer.student,
+            'homework': answer.homework,
+            'answer': answer.description,
+        } for answer in teacher_answers]
+        messages.append((
+            _("New answers to your homework"),
+            '\n'.join(lines), None, [teacher.email]))
+    send_mass_mail(messages)
+
+
+@register('homework.remind_due', batch_size=10)
+def remind_due(payloads):
+    """Email the due date reminders of the students."""
+    assignments = [assignment for payload in payloads
+                   for assignment in payload['assignments']]
+    homeworks = Homework.objects.in_bulk(
+        set(homework_id for homework_id, student_id in assignments))
+    emails = dict(SchoolUser.objects.filter(
+        id__in=set(student_id for homework_id, student_id in assignments)
+    ).exclude(email='').values_list('id', 'email'))
+    messages = []
+    for homework_id, student_id in assignments:
+        homework = homeworks.get(homework_id)
+        if homework is None or student_id not in emails:
+            continue
+        messages.append((
+            _("Reminder: %s") % homework.title,
+            _("%(question)s\n\nDue on %(due_date)s.") % {
+                'question': homework.question,
+                'due_date': homework.due_date,
+            },
+            None, [emails[student_id]]))
+    send_mass_mail(messages)
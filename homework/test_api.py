@@ -0,0 +1,141 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from users.models import SchoolUser
+from .models import Homework, Answer
+
+
+@override_settings(SHARED_CACHE=True)
+class ConditionalApiTests(TransactionTestCase):
+    """JSON lists answer 304 without running the list query."""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = self.create_user('teacher@test.com', 'teacher')
+        self.student = self.create_user('student@test.com', 'student')
+        self.homeworks = [
+            Homework.objects.create(
+                title='Homework #%d' % i,
+                question='How are you?',
+                teacher=self.teacher,
+                due_date=date.today() + timedelta(days=i),
+            )
+            for i in range(12)
+        ]
+        for homework in self.homeworks:
+            homework.student.add(self.student)
+        self.homework = self.homeworks[0]
+        Answer.objects.create(description='Fine', homework=self.homework,
+                              student=self.student)
+
+    def create_user(self, username, user_type):
+        user = SchoolUser.objects.create(username=username,
+                                         user_type=user_type)
+        user.set_password('1234')
+        user.save()
+        return user
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, **headers)
+        # Page queries are the only ones with a LIMIT
+        list_queries = [query for query in captured
+                        if 'LIMIT' in query['sql']]
+        return response, list_queries
+
+    def assertNotModified(self, url, **headers):
+        response, list_queries = self.get(url, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(list_queries, [])
+        self.assertEqual(response.content, b'')
+
+    def test_student_homework(self):
+        url = reverse('homework:api_student_homework')
+        self.client.login(username=self.student.username, password='1234')
+        response, list_queries = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(list_queries), 1)
+        data = response.json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(data['results'][0]['id'], self.homework.id)
+        self.assertTrue(data['results'][0]['answered'])
+        self.assertIsNone(data['previous_cursor'])
+        etag = response['ETag']
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+        # Every page has its own ETag
+        page = self.client.get(url, {'cursor': data['next_cursor']})
+        self.assertEqual(len(page.json()['results']), 2)
+        self.assertNotEqual(page['ETag'], etag)
+        # A new answer changes the list
+        Answer.objects.create(description='Better', homework=self.homework,
+                              student=self.student)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['answer_count'], 2)
+
+    def test_teacher_homework(self):
+        url = reverse('homework:api_teacher_homework')
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        first = response.json()['results'][-1]
+        self.assertEqual(first['id'], self.homeworks[2].id)
+        etag = response['ETag']
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+        # Answers and assignments change the teacher's figures
+        Answer.objects.create(description='Fine', homework=self.homework,
+                              student=self.student)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.homework.student.remove(self.student)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_local_cache(self):
+        # The tokens of a local cache are not shared, no validator is sent
+        for url, user in ((reverse('homework:api_student_homework'),
+                           self.student),
+                          (reverse('homework:api_teacher_homework'),
+                           self.teacher)):
+            self.client.login(username=user.username, password='1234')
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('ETag'))
+            self.assertEqual(self.client.get(
+                url, HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+    def test_latest_answers(self):
+        url = reverse('homework:api_latest_answers',
+                      kwargs={'pk': self.homework.pk})
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['student']['username'],
+                         self.student.username)
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertNotModified(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+    def test_permissions(self):
+        self.client.login(username=self.student.username, password='1234')
+        self.assertEqual(self.client.get(
+            reverse('homework:api_teacher_homework')).status_code, 403)
+        other = self.create_user('other@test.com', 'teacher')
+        self.client.login(username=other.username, password='1234')
+        self.assertEqual(self.client.get(
+            reverse('homework:api_student_homework')).status_code, 403)
+        self.assertEqual(self.client.get(reverse(
+            'homework:api_latest_answers',
+            kwargs={'pk': self.homework.pk})).status_code, 403)
+        self.assertEqual(self.client.get(
+            reverse('homework:api_teacher_homework'),
+            {'cursor': 'bad'}).status_code, 404)
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+from datetime import date
+
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils.six import StringIO
+
+from .cache import cache_stats, student_list_version
+from .models import Homework, Answer
+from users.models import SchoolUser
+
+
+# The versions are bumped on commit, which TestCase never does
+@override_settings(SHARED_CACHE=True)
+class StudentListCacheTest(TransactionTestCase):
+    """Test the cached student homework list is never stale."""
+
+    def setUp(self):
+        django_cache.clear()
+        self.student = SchoolUser.objects.create(
+            username='student@test.com',
+            email='student@test.com',
+            user_type='student',
+        )
+        self.student.set_password("1234")
+        self.student.save()
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com',
+            email='teacher@test.com',
+            user_type='teacher',
+        )
+        self.homework = Homework.objects.create(
+            title='Homework #1',
+            question='How are you?',
+            teacher=self.teacher,
+            due_date=date.today(),
+        )
+        self.homework.student.add(self.student)
+        self.url = reverse('homework:student_list_homework')
+        self.client.login(username=self.student.username, password="1234")
+
+    def homework_list(self):
+        return list(self.client.get(self.url).context['homework_list'])
+
+    def check_invalidation(self):
+        """Run every change that must show up on the next page load."""
+        self.assertEqual(self.homework_list(), [self.homework])
+        self.assertEqual(self.homework_list(), [self.homework])
+        self.assertEqual(cache_stats()['hits'], 1)
+        # Homework update
+        self.homework.title = 'Homework #1 updated'
+        self.homework.save()
+        self.assertEqual(self.homework_list()[0].title, self.homework.title)
+        # Answer shows the answered status
+        Answer.objects.create(description='Fine', homework=self.homework,
+                              student=self.student)
+        self.assertTrue(self.homework_list()[0].answered)
+        # Assignment through both sides of the relation
+        other = Homework.objects.create(
+            title='Homework #2',
+            question='Why?',
+            teacher=self.teacher,
+            due_date=date.today(),
+        )
+        self.student.assigned_homeworks.add(other)
+        self.assertEqual(len(self.homework_list()), 2)
+        other.student.remove(self.student)
+        self.assertEqual(len(self.homework_list()), 1)
+        self.homework.student.clear()
+        self.assertEqual(self.homework_list(), [])
+        stats = cache_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 6)
+
+    def test_locmem_cache(self):
+        self.check_invalidation()
+
+    def test_file_cache(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        caches = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }
+        }
+        with override_settings(CACHES=caches):
+            self.check_invalidation()
+
+    def test_stats_command(self):
+        self.homework_list()
+        self.homework_list()
+        out = StringIO()
+        call_command('student_list_cache_stats', reset=True, stdout=out)
+        self.assertIn('Hits: 1, misses: 1, hit ratio: 50.0%', out.getvalue())
+        self.assertEqual(cache_stats()['hits'], 0)
+
+    def test_bumped_on_commit(self):
+        version = student_list_version(self.student.id)
+        with transaction.atomic():
+            self.homework.save()
+            self.assertEqual(student_list_version(self.student.id), version)
+        self.assertNotEqual(student_list_version(self.student.id), version)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_not_shared(self):
+        self.homework_list()
+        self.homework_list()
+        stats = cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (0, 0))
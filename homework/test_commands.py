@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+
+from datetime import date, timedelta
+
+from django.core import mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from .models import Homework, Answer, LatestAnswer, SentReminder
+from jobs.models import Job
+from jobs.queue import run_pending
+from users.models import SchoolUser
+
+
+class SeedAndBenchmarkTest(TestCase):
+    """Test the synthetic school and view benchmark commands."""
+
+    def seed(self, **options):
+        out = StringIO()
+        call_command('seed_school', teachers=2, students=10, homeworks=3,
+                     density=0.5, answer_rate=1, history=2, random_seed=1,
+                     stdout=out, **options)
+        return out.getvalue()
+
+    def test_seed_school(self):
+        self.assertIn('Seeded 2 teachers, 10 students, 6 homeworks, '
+                      '30 assignments', self.seed())
+        self.assertEqual(SchoolUser.objects.filter(
+            user_type='student').count(), 10)
+        self.assertEqual(Homework.student.through.objects.count(), 30)
+        # Every assigned student answered and has a latest answer pointer
+        self.assertEqual(LatestAnswer.objects.count(), 30)
+        self.assertGreaterEqual(Answer.objects.count(), 30)
+        self.assertRaises(CommandError, self.seed)
+
+    def test_benchmark_views(self):
+        self.seed()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, 'bench.json')
+        call_command('benchmark_views', repeat=1, output=output,
+                     stdout=StringIO())
+        with open(output) as results_file:
+            results = json.load(results_file)
+        self.assertEqual(results['rows']['homeworks'], 6)
+        statuses = dict(((result['view'], result['user_type']),
+                         result['status']) for result in results['results'])
+        self.assertEqual(statuses[('homework:list', 'teacher')], 200)
+        self.assertEqual(statuses[('homework:list', 'student')], 403)
+        self.assertEqual(
+            statuses[('homework:student_list_homework', 'student')], 200)
+        self.assertNotIn(('users:logout', 'teacher'), statuses)
+
+
+class DueRemindersTest(TestCase):
+    """Test the due date reminders are sent once to students who have not
+    answered."""
+
+    def setUp(self):
+        teacher = SchoolUser.objects.create(
+            username='teacher@test.com', user_type='teacher')
+        self.students = [
+            SchoolUser.objects.create(
+                username='student%d@test.com' % i,
+                email='student%d@test.com' % i, user_type='student')
+            for i in range(3)
+        ]
+        self.due = Homework.objects.create(
+            title='Due tomorrow', question='How are you?', teacher=teacher,
+            due_date=date.today() + timedelta(days=1))
+        later = Homework.objects.create(
+            title='Due later', question='How are you?', teacher=teacher,
+            due_date=date.today() + timedelta(days=10))
+        for homework in (self.due, later):
+            homework.assign_students(SchoolUser.objects.all())
+        Answer.objects.create(description='Fine', homework=self.due,
+                              student=self.students[0])
+        # Drop the assignment and answer notifications
+        Job.objects.all().delete()
+
+    def remind(self, **options):
+        out = StringIO()
+        call_command('send_due_reminders', stdout=out, **options)
+        return out.getvalue()
+
+    def test_reminders(self):
+        self.assertIn('Queued 2 reminders in 2 jobs',
+                      self.remind(batch_size=1))
+        self.assertEqual(
+            sorted(SentReminder.objects.values_list('student', flat=True)),
+            [self.students[1].id, self.students[2].id])
+        run_pending()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['student1@test.com', 'student2@test.com'])
+        self.assertEqual(mail.outbox[0].subject, 'Reminder: Due tomorrow')
+        # Reruns are idempotent
+        self.assertIn('Queued 0 reminders in 0 jobs', self.remind())
+        self.assertIn('Queued 3 reminders in 1 jobs', self.remind(days=10))
+
+    def test_latest_answer_deleted(self):
+        """A student keeps their answered status after deleting an answer."""
+        Answer.objects.create(description='Better', homework=self.due,
+                              student=self.students[0]).delete()
+        today = date.today()
+        self.assertEqual(
+            list(SentReminder.objects.pending(
+                today, today + timedelta(days=1))),
+            [(self.due.id, self.students[1].id),
+             (self.due.id, self.students[2].id)])
+
+    def test_pending_query(self):
+        today = date.today()
+        with self.assertNumQueries(1):
+            pending = list(SentReminder.objects.pending(
+                today, today + timedelta(days=1)))
+        self.assertEqual(pending, [(self.due.id, self.students[1].id),
+                                   (self.due.id, self.students[2].id)])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+from datetime import date
+
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils import six
+
+from users.models import SchoolUser
+from .export import iter_chunks, export_queryset
+from .models import Homework, Answer
+
+
+class AnswerExportTests(TestCase):
+
+    def setUp(self):
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com', user_type='teacher')
+        self.teacher.set_password('1234')
+        self.teacher.save()
+        self.homework = Homework.objects.create(
+            title='Homework #1',
+            question='How are you?',
+            teacher=self.teacher,
+            due_date=date.today(),
+        )
+        self.students = []
+        for i in range(3):
+            student = SchoolUser.objects.create(
+                username='student%d@test.com' % i, user_type='student',
+                first_name=u'Jos\xe9', last_name='Student %d' % i)
+            self.students.append(student)
+            for version in range(2):
+                Answer.objects.create(
+                    homework=self.homework, student=student,
+                    description=u'Answer, "v%d"\n\xe9' % version)
+        self.url = reverse('homework:export_answers',
+                           kwargs={'pk': self.homework.pk})
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    @override_settings(EXPORT_CHUNK_SIZE=4)
+    def test_chunks(self):
+        answers = iter_chunks(export_queryset(self.homework, history=True))
+        # One query per chunk, the student comes with the answer
+        with self.assertNumQueries(2):
+            rows = [(answer.id, answer.student.username)
+                    for answer in answers]
+        self.assertEqual([row[0] for row in rows], sorted(
+            Answer.objects.values_list('id', flat=True)))
+
+    def test_csv_latest(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="homework-%d-latest.csv"'
+                         % self.homework.id)
+        content = self.content(response)
+        if six.PY2:
+            rows = [[value.decode('utf-8') for value in row] for row in
+                    csv.reader(content.encode('utf-8').splitlines(True))]
+        else:
+            rows = list(csv.reader(content.splitlines(True)))
+        self.assertEqual(rows[0][:3], ['answer_id', 'student_id', 'username'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][3], u'Jos\xe9')
+        self.assertEqual(rows[1][6], u'Answer, "v1"\n\xe9')
+
+    def test_jsonl_history(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.get(self.url,
+                                   {'format': 'jsonl', 'history': '1'})
+        rows = [json.loads(line)
+                for line in self.content(response).splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['username'], 'student0@test.com')
+        self.assertEqual(rows[0]['description'], u'Answer, "v0"\n\xe9')
+
+    def test_permissions(self):
+        other = SchoolUser.objects.create(
+            username='other@test.com', user_type='teacher')
+        other.set_password('1234')
+        other.save()
+        self.client.login(username=other.username, password='1234')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.students[0].set_password('1234')
+        self.students[0].save()
+        self.client.login(username=self.students[0].username,
+                          password='1234')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.login(username=self.teacher.username, password='1234')
+        self.assertEqual(
+            self.client.get(self.url, {'format': 'xml'}).status_code, 400)
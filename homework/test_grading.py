@@ -0,0 +1,117 @@
+import json
+from datetime import date
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from users.models import SchoolUser
+from .models import Homework, Answer
+
+
+class BulkGradingTests(TestCase):
+
+    def setUp(self):
+        self.teacher = self.create_user('teacher@test.com', 'teacher')
+        self.other_teacher = self.create_user('other@test.com', 'teacher')
+        self.homework = Homework.objects.create(
+            title='Homework #1', question='How are you?',
+            teacher=self.teacher, due_date=date.today())
+        self.other_homework = Homework.objects.create(
+            title='Homework #2', question='And you?',
+            teacher=self.other_teacher, due_date=date.today())
+        self.answers = []
+        for i in range(3):
+            student = self.create_user('student%d@test.com' % i, 'student')
+            self.answers.append(Answer.objects.create(
+                description='Fine', homework=self.homework, student=student))
+        self.other_answer = Answer.objects.create(
+            description='Fine', homework=self.other_homework,
+            student=student)
+        self.url = reverse('homework:bulk_grade')
+
+    def create_user(self, username, user_type):
+        user = SchoolUser.objects.create(username=username,
+                                         user_type=user_type)
+        user.set_password('1234')
+        user.save()
+        return user
+
+    def post(self, grades, user=None):
+        user = user or self.teacher
+        self.client.login(username=user.username, password='1234')
+        return self.client.post(self.url, json.dumps({'grades': grades}),
+                                content_type='application/json')
+
+    def test_grade(self):
+        grades = [
+            {'answer_id': answer.id, 'score': score, 'feedback': feedback}
+            for answer, score, feedback in zip(
+                self.answers, [90, 40, None], ['Good', 'Short', ''])
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.post(grades)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'graded': 3})
+        # One UPDATE for every answer
+        updates = [query for query in captured
+                   if query['sql'].startswith('UPDATE "homework_answer"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(Answer.objects.filter(homework=self.homework).order_by(
+                'id').values_list('score', 'feedback')),
+            [(90, 'Good'), (40, 'Short'), (None, '')])
+        self.assertIsNotNone(Answer.objects.get(
+            id=self.answers[0].id).graded_at)
+        # Ungraded answers have no grading date
+        self.assertIsNone(Answer.objects.get(
+            id=self.answers[2].id).graded_at)
+        self.assertEqual(self.homework.grade_stats(), {
+            'graded': 2, 'average': 65.0, 'lowest': 40, 'highest': 90})
+
+    def test_batches(self):
+        grades = [(answer.id, 50 + i, 'Batch') for i, answer
+                  in enumerate(self.answers)]
+        self.assertEqual(Answer.objects.grade(grades, batch_size=2), 3)
+        self.assertEqual(self.homework.grade_stats()['highest'], 52)
+
+    def test_ungrade(self):
+        Answer.objects.grade([(self.answers[0].id, 70, 'Fine')])
+        Answer.objects.grade([(self.answers[0].id, None, '')])
+        answer = Answer.objects.get(id=self.answers[0].id)
+        self.assertIsNone(answer.score)
+        self.assertIsNone(answer.graded_at)
+        self.assertEqual(self.homework.grade_stats()['graded'], 0)
+
+    def test_ownership(self):
+        grades = [{'answer_id': self.answers[0].id, 'score': 90},
+                  {'answer_id': self.other_answer.id, 'score': 90}]
+        self.assertEqual(self.post(grades).status_code, 403)
+        self.assertEqual(self.homework.grade_stats()['graded'], 0)
+        student = self.answers[0].student
+        self.assertEqual(self.post(grades[:1], student).status_code, 403)
+
+    def test_bad_data(self):
+        answer_id = self.answers[0].id
+        for grades in ([{'answer_id': answer_id, 'score': 101}],
+                       [{'answer_id': answer_id, 'score': 'A'}],
+                       [{'answer_id': answer_id, 'score': 79.9}],
+                       [{'answer_id': answer_id, 'score': True}],
+                       [{'answer_id': answer_id, 'score': '80'}],
+                       [{'score': 10}],
+                       [{'answer_id': answer_id}, {'answer_id': answer_id}],
+                       'grades'):
+            self.assertEqual(self.post(grades).status_code, 400)
+
+    def test_pages(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        Answer.objects.grade([(self.answers[0].id, 80, 'Nice')])
+        response = self.client.get(reverse(
+            'homework:student_answers',
+            kwargs={'pk': self.homework.pk,
+                    'student': self.answers[0].student.pk}))
+        self.assertContains(response, 'Nice')
+        response = self.client.get(reverse(
+            'homework:latest_answers', kwargs={'pk': self.homework.pk}))
+        self.assertContains(response, '1 graded answers, average score 80.0')
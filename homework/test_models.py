@@ -1,6 +1,8 @@
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from django.test import TestCase
-from .models import Homework, Answer
+from django.core.management import call_command
+from django.utils.six import StringIO
+from .models import Homework, Answer, LatestAnswer
 from users.models import SchoolUser
 
 class HomeworkTest(TestCase):
@@ -47,3 +49,102 @@ class HomeworkTest(TestCase):
     def test_answer(self):
         self.assertEqual(str(self.answer),
                          str(self.answer.id))
+
+    def test_teacher_stats(self):
+        other_student = SchoolUser.objects.create(
+            username='student2@test.com',
+            email='student2@test.com',
+            user_type='student',
+        )
+        self.homework.student.add(self.student, other_student)
+        last_answer = Answer.objects.create(
+            description='Even better!',
+            homework=self.homework,
+            student=self.student
+        )
+        homework = Homework.objects.with_teacher_stats().get(
+            id=self.homework.id)
+        self.assertEqual(homework.assigned_count, 2)
+        # Two answers from the same student count once
+        self.assertEqual(homework.answered_count, 1)
+        self.assertEqual(homework.last_answered_at, last_answer.pub_date)
+        self.assertFalse(homework.overdue)
+        self.homework.due_date = date.today() - timedelta(days=1)
+        self.homework.save()
+        homework = Homework.objects.with_teacher_stats().get(
+            id=self.homework.id)
+        self.assertTrue(homework.overdue)
+
+    def test_student_status(self):
+        other_student = SchoolUser.objects.create(
+            username='student2@test.com',
+            email='student2@test.com',
+            user_type='student',
+        )
+        last_answer = Answer.objects.create(
+            description='Even better!',
+            homework=self.homework,
+            student=self.student
+        )
+        homework = Homework.objects.with_student_status(self.student).get(
+            id=self.homework.id)
+        self.assertTrue(homework.answered)
+        self.assertEqual(homework.answer_count, 2)
+        self.assertEqual(homework.last_answered_at, last_answer.pub_date)
+        homework = Homework.objects.with_student_status(other_student).get(
+            id=self.homework.id)
+        self.assertFalse(homework.answered)
+        self.assertEqual(homework.answer_count, 0)
+        self.assertIsNone(homework.last_answered_at)
+        self.assertFalse(self.homework.has_answered(other_student))
+
+    def test_latest_answer(self):
+        latest = LatestAnswer.objects.get(
+            homework=self.homework, student=self.student)
+        self.assertEqual(latest.answer, self.answer)
+        new_answer = Answer.objects.create(
+            description='Even better!',
+            homework=self.homework,
+            student=self.student
+        )
+        latest = LatestAnswer.objects.get(
+            homework=self.homework, student=self.student)
+        self.assertEqual(latest.answer, new_answer)
+        # Updating an old answer does not move the pointer
+        self.answer.description = 'Fine'
+        self.answer.save()
+        self.assertEqual(LatestAnswer.objects.get().answer, new_answer)
+
+    def test_latest_answer_deleted(self):
+        new_answer = Answer.objects.create(
+            description='Even better!',
+            homework=self.homework,
+            student=self.student
+        )
+        # Deleting the latest answer points back to the previous one
+        new_answer.delete()
+        self.assertEqual(LatestAnswer.objects.get().answer, self.answer)
+        # Deleting an older answer keeps the pointer
+        newest = Answer.objects.create(
+            description='Best!',
+            homework=self.homework,
+            student=self.student
+        )
+        self.answer.delete()
+        self.assertEqual(LatestAnswer.objects.get().answer, newest)
+        newest.delete()
+        self.assertFalse(LatestAnswer.objects.exists())
+
+    def test_latest_answer_rebuild(self):
+        new_answer = Answer.objects.create(
+            description='Even better!',
+            homework=self.homework,
+            student=self.student
+        )
+        LatestAnswer.objects.all().delete()
+        self.assertEqual(LatestAnswer.objects.rebuild(batch_size=1), 1)
+        self.assertEqual(LatestAnswer.objects.get().answer, new_answer)
+        out = StringIO()
+        call_command('rebuild_latest_answers',
+                     homework=[self.homework.id], stdout=out)
+        self.assertIn('Rebuilt 1 latest answer pointers', out.getvalue())
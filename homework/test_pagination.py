@@ -0,0 +1,90 @@
+from datetime import date
+
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from .models import Homework
+from .pagination import KeysetPaginator, encode_cursor, decode_cursor
+from users.models import SchoolUser
+
+
+class KeysetPaginationTest(TestCase):
+    """Test keyset pagination of the list views."""
+
+    def setUp(self):
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com',
+            email='teacher@test.com',
+            user_type='teacher',
+        )
+        self.teacher.set_password("1234")
+        self.teacher.save()
+        for i in range(25):
+            Homework.objects.create(
+                title='Homework #%d' % i,
+                question='Why?',
+                teacher=self.teacher,
+                due_date=date.today(),
+            )
+        self.homeworks = Homework.objects.all()
+
+    def test_cursor(self):
+        cursor = encode_cursor('next', [date(2016, 4, 8), 3])
+        self.assertEqual(decode_cursor(cursor), ('next', ['2016-04-08', 3]))
+        self.assertRaises(ValueError, decode_cursor, 'not a cursor')
+        self.assertRaises(ValueError, decode_cursor, encode_cursor('up', []))
+
+    def test_bad_cursor_values(self):
+        """Cursor values that do not fit their fields are a ValueError."""
+        paginator = KeysetPaginator(self.homeworks, ('-pub_date', '-id'), 10)
+        for values in (['not a date', 3], ['2016-04-08', 'x'],
+                       [['2016-04-08'], 3], ['2016-04-08', {}]):
+            self.assertRaises(ValueError, paginator.page,
+                              encode_cursor('next', values))
+        self.assertEqual(len(paginator.page(
+            encode_cursor('next', ['2016-04-08T10:00:00+00:00', '3']))), 0)
+
+    def test_pages(self):
+        """Walk forward then backward through all pages."""
+        paginator = KeysetPaginator(self.homeworks, ('-pub_date', '-id'), 10)
+        expected = list(self.homeworks.order_by('-pub_date', '-id'))
+        pages = [paginator.page()]
+        self.assertFalse(pages[0].has_previous())
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([obj for page in pages for obj in page], expected)
+        page = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(page), expected[10:20])
+        page = paginator.page(page.previous_cursor)
+        self.assertEqual(list(page), expected[:10])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertIsNone(paginator.count)
+
+    def test_same_sort_value(self):
+        """Rows sharing the first key are split on the id."""
+        paginator = KeysetPaginator(self.homeworks, ('due_date', 'id'), 10,
+                                    count=True)
+        page = paginator.page(paginator.page().next_cursor)
+        self.assertEqual(list(page),
+                         list(self.homeworks.order_by('id')[10:20]))
+        self.assertEqual(paginator.count, 25)
+
+    def test_list_view(self):
+        """Test the teacher's list view follows the cursors."""
+        self.client.login(username=self.teacher.username, password="1234")
+        response = self.client.get(reverse('homework:list'))
+        self.assertEqual(len(response.context['homework_list']), 10)
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertContains(response, '?cursor=%s' % next_cursor)
+        response = self.client.get(reverse('homework:list'),
+                                   {'cursor': next_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['page_obj'].has_previous())
+        response = self.client.get(reverse('homework:list'),
+                                   {'cursor': 'bad'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('homework:list'), {
+            'cursor': encode_cursor('next', ['yesterday', 'last'])})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,142 @@
+import re
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, RequestFactory
+
+from .models import Homework, Answer, LatestAnswer
+from .views import (HomeworkListView, HomeworkAssignView,
+                    HomeworkStudentAnswersView, HomeworkLatestAnswersView,
+                    StudentHomeworkListView)
+from users.models import SchoolUser
+
+# Tables that grow with the school and must never be scanned in full.
+LARGE_TABLES = (
+    Homework._meta.db_table,
+    Homework.student.through._meta.db_table,
+    Answer._meta.db_table,
+    LatestAnswer._meta.db_table,
+    SchoolUser._meta.db_table,
+)
+
+
+class QueryPlanTest(TestCase):
+    """Check with EXPLAIN that every list view query is served by an index."""
+
+    teachers = 5
+    students = 200
+    homeworks_per_teacher = 20
+    answers_per_homework = 40
+    resubmissions = 15
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed a school large enough for the planner to care."""
+        SchoolUser.objects.bulk_create(
+            [SchoolUser(username='teacher%d' % i, user_type='teacher',
+                        last_name='Teacher %d' % i)
+             for i in range(cls.teachers)] +
+            [SchoolUser(username='student%d' % i, user_type='student',
+                        last_name='Student %d' % i)
+             for i in range(cls.students)])
+        cls.teacher = SchoolUser.objects.filter(user_type='teacher')[0]
+        student_ids = list(SchoolUser.objects.filter(
+            user_type='student').values_list('id', flat=True))
+        cls.student = SchoolUser.objects.get(id=student_ids[0])
+        Homework.objects.bulk_create([
+            Homework(title='Homework %d' % i, question='Why?',
+                     teacher=teacher, due_date=date.today() + timedelta(i))
+            for teacher in SchoolUser.objects.filter(user_type='teacher')
+            for i in range(cls.homeworks_per_teacher)])
+        through = Homework.student.through
+        answers = []
+        assignments = []
+        for homework in Homework.objects.all():
+            # Most students answer once, the first one keeps resubmitting
+            for i in range(cls.answers_per_homework):
+                answers.append(Answer(
+                    homework=homework, description='Because',
+                    student_id=student_ids[i % len(student_ids)]))
+            for i in range(cls.resubmissions):
+                answers.append(Answer(
+                    homework=homework, description='Because',
+                    student_id=student_ids[0]))
+            assignments.extend(
+                through(homework_id=homework.id, schooluser_id=student_id)
+                for student_id in student_ids[:cls.answers_per_homework])
+        Answer.objects.bulk_create(answers, batch_size=500)
+        through.objects.bulk_create(assignments, batch_size=500)
+        LatestAnswer.objects.rebuild()
+        cls.homework = Homework.objects.filter(teacher=cls.teacher)[0]
+
+    def view_queryset(self, view_class, user, **attrs):
+        """Build the query of a view's second page for `user`."""
+        view = view_class()
+        view.request = RequestFactory().get('/')
+        view.request.user = user
+        view.kwargs = {}
+        for name, value in attrs.items():
+            setattr(view, name, value)
+        paginator = view.get_paginator(view.get_queryset(), view.paginate_by)
+        return paginator.page_queryset(paginator.page().next_cursor)
+
+    def explain(self, queryset):
+        """Return the query plan of `queryset` as a single string."""
+        sql, params = queryset.query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("ANALYZE")
+                # Only fall back to a full scan when no index can be used
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql, params)
+            elif connection.vendor == 'sqlite':
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            else:
+                self.skipTest("No query plan check for %s" % connection.vendor)
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, sorted_by_index=False):
+        """
+        Fail on full scans of the large tables, and on an extra sort step
+        if the ordering should come from an index.
+        """
+        plan = self.explain(queryset)
+        tables = "|".join(LARGE_TABLES)
+        if connection.vendor == 'postgresql':
+            full_scan = r"Seq Scan on (%s)\b" % tables
+            sort = r"\bSort\b"
+        else:
+            full_scan = r"\bSCAN (TABLE )?(%s)\b(?! USING (COVERING )?INDEX)" % tables
+            sort = r"TEMP B-TREE FOR ORDER BY"
+        self.assertIsNone(re.search(full_scan, plan), plan)
+        if sorted_by_index:
+            self.assertIsNone(re.search(sort, plan), plan)
+
+    def test_homework_list(self):
+        self.assertUsesIndex(
+            self.view_queryset(HomeworkListView, self.teacher),
+            sorted_by_index=True)
+
+    def test_homework_assign(self):
+        self.assertUsesIndex(self.view_queryset(
+            HomeworkAssignView, self.teacher, homework=self.homework),
+            sorted_by_index=True)
+
+    def test_student_answers(self):
+        self.assertUsesIndex(self.view_queryset(
+            HomeworkStudentAnswersView, self.teacher,
+            homework=self.homework, student=self.student),
+            sorted_by_index=True)
+
+    def test_latest_answers(self):
+        self.assertUsesIndex(self.view_queryset(
+            HomeworkLatestAnswersView, self.teacher, homework=self.homework))
+
+    def test_student_homework_list(self):
+        self.assertUsesIndex(
+            self.view_queryset(StudentHomeworkListView, self.student))
+
+    def test_grade_stats(self):
+        # The rows aggregated by Homework.grade_stats
+        self.assertUsesIndex(self.homework.answer_set.filter(
+            score__isnull=False).values_list('score'))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from users.models import SchoolUser
+from . import search
+from .models import Homework, Answer
+
+
+class SearchTests(TestCase):
+    """Test the full-text index and the scoping of the results."""
+
+    def setUp(self):
+        self.teacher = self.create_user('teacher@test.com', 'teacher')
+        self.other_teacher = self.create_user('other@test.com', 'teacher')
+        self.student = self.create_user('student@test.com', 'student')
+        self.other_student = self.create_user('other_student@test.com',
+                                              'student')
+        self.photosynthesis = Homework.objects.create(
+            title='Photosynthesis',
+            question='How do plants turn light into sugar?',
+            teacher=self.teacher, due_date=date.today())
+        self.plants = Homework.objects.create(
+            title='Plants', question='Name three plants.',
+            teacher=self.teacher, due_date=date.today())
+        self.other = Homework.objects.create(
+            title='Plants again', question='Which plants grow in winter?',
+            teacher=self.other_teacher, due_date=date.today())
+        self.answer = Answer.objects.create(
+            description=u'Plants use chlorophyll and light, caf\xe9',
+            homework=self.photosynthesis, student=self.student)
+        self.other_answer = Answer.objects.create(
+            description='Chlorophyll is green',
+            homework=self.photosynthesis, student=self.other_student)
+        Answer.objects.create(
+            description='Chlorophyll again', homework=self.other,
+            student=self.student)
+
+    def create_user(self, username, user_type):
+        user = SchoolUser.objects.create(username=username,
+                                         user_type=user_type)
+        user.set_password('1234')
+        user.save()
+        return user
+
+    def test_teacher_scope(self):
+        homeworks, answers = search.search(self.teacher, 'plants')
+        # The title match ranks first
+        self.assertEqual(homeworks, [self.plants, self.photosynthesis])
+        self.assertEqual(answers, [self.answer])
+        homeworks, answers = search.search(self.teacher, 'chlorophyll')
+        self.assertEqual(homeworks, [])
+        self.assertEqual(set(answers), set([self.answer, self.other_answer]))
+
+    def test_student_scope(self):
+        homeworks, answers = search.search(self.other_student, 'chlorophyll')
+        self.assertEqual((homeworks, answers), ([], [self.other_answer]))
+        # All the words must match, accents are ignored
+        self.assertEqual(search.search(self.student, 'light cafe')[1],
+                         [self.answer])
+        self.assertEqual(search.search(self.student, '"(*')[1], [])
+
+    def test_index_updates(self):
+        self.plants.question = 'Name three trees.'
+        self.plants.save()
+        self.assertEqual(search.search(self.teacher, 'trees')[0],
+                         [self.plants])
+        self.answer.delete()
+        self.assertEqual(search.search(self.student, 'light')[1], [])
+
+    def test_rebuild(self):
+        search.execute("DELETE FROM %s" % search.ANSWER_TABLE)
+        self.assertEqual(search.search(self.student, 'light')[1], [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Rebuilt the search index', out.getvalue())
+        self.assertEqual(search.search(self.student, 'light')[1],
+                         [self.answer])
+
+    def test_view(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.get(reverse('homework:search'),
+                                   {'q': 'plants'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['homeworks'],
+                         [self.plants, self.photosynthesis])
+        self.assertNotContains(response, 'Plants again')
@@ -0,0 +1,128 @@
+from datetime import date
+
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from users.models import SchoolUser
+from . import similarity
+from .models import Homework, Answer
+from .pagination import encode_cursor
+
+ESSAY = ("Photosynthesis is the process used by plants to convert light "
+         "energy into chemical energy that is stored in glucose.")
+
+
+class SimilarityTests(TestCase):
+
+    def test_minhash(self):
+        signature = similarity.unpack(similarity.minhash(ESSAY))
+        self.assertEqual(len(signature), similarity.NUM_PERM)
+        # Case and spacing are ignored
+        self.assertEqual(similarity.minhash(ESSAY),
+                         similarity.minhash('  ' + ESSAY.upper()))
+        self.assertIsNone(similarity.minhash(' \n'))
+        close = similarity.unpack(similarity.minhash(
+            ESSAY.replace('plants', 'the plants')))
+        other = similarity.unpack(similarity.minhash(
+            "Plants need water, sunlight and soil to grow."))
+        self.assertGreater(similarity.estimate(signature, close), 0.7)
+        self.assertLess(similarity.estimate(signature, other), 0.2)
+
+    def test_pure_python(self):
+        """NumPy and pure Python give the same signatures."""
+        numpy = similarity.numpy
+        if numpy is None:
+            self.skipTest("NumPy is not installed")
+        signature = similarity.minhash(ESSAY)
+        similarity.numpy = None
+        try:
+            self.assertEqual(similarity.minhash(ESSAY), signature)
+        finally:
+            similarity.numpy = numpy
+
+    def test_duplicates(self):
+        rows = [
+            (1, similarity.minhash(ESSAY)),
+            (2, similarity.minhash("Plants need water and sunlight.")),
+            (3, similarity.minhash(ESSAY + ' Yes.')),
+            (4, similarity.minhash(ESSAY)),
+            (5, None),
+        ]
+        pairs = similarity.duplicates(rows)
+        self.assertEqual([pair[:2] for pair in pairs],
+                         [(1, 4), (1, 3)])
+        self.assertEqual(pairs[0][2], 1.0)
+        self.assertEqual(len(similarity.duplicates(rows, limit=1)), 1)
+
+
+class DuplicatesViewTests(TestCase):
+
+    def setUp(self):
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com', user_type='teacher')
+        self.teacher.set_password('1234')
+        self.teacher.save()
+        self.homework = Homework.objects.create(
+            title='Homework #1', question='What is photosynthesis?',
+            teacher=self.teacher, due_date=date.today())
+        self.students = [
+            SchoolUser.objects.create(username='student%d@test.com' % i,
+                                      user_type='student')
+            for i in range(3)
+        ]
+        self.answers = [
+            Answer.objects.create(description=description,
+                                  homework=self.homework, student=student)
+            for description, student in zip(
+                [ESSAY, ESSAY + '!', 'I do not know.'], self.students)
+        ]
+
+    def test_panel(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.get(reverse(
+            'homework:latest_answers', kwargs={'pk': self.homework.pk}))
+        self.assertEqual(
+            [(answer, other) for answer, other, percent
+             in response.context['duplicates']],
+            [(self.answers[0], self.answers[1])])
+        self.assertContains(response, 'Possible duplicates')
+
+    def test_panel_cached(self):
+        """The pairs are computed again only when the answers change."""
+        django_cache.clear()
+        runs = []
+        duplicates = similarity.duplicates
+
+        def counted(*args, **kwargs):
+            runs.append(1)
+            return duplicates(*args, **kwargs)
+        similarity.duplicates = counted
+        self.addCleanup(setattr, similarity, 'duplicates', duplicates)
+        self.client.login(username=self.teacher.username, password='1234')
+        url = reverse('homework:latest_answers',
+                      kwargs={'pk': self.homework.pk})
+        for i in range(2):
+            response = self.client.get(url)
+            self.assertEqual(len(response.context['duplicates']), 1)
+        self.assertEqual(len(runs), 1)
+        Answer.objects.create(description=ESSAY, homework=self.homework,
+                              student=self.students[2])
+        self.assertEqual(len(self.client.get(url).context['duplicates']), 3)
+        self.assertEqual(len(runs), 2)
+        # Not computed for the following pages
+        response = self.client.get(url, {'cursor': encode_cursor(
+            'next', [self.students[0].id, self.answers[0].id])})
+        self.assertNotIn('duplicates', response.context)
+        self.assertEqual(len(runs), 2)
+
+    def test_backfill(self):
+        Answer.objects.update(signature=None)
+        out = StringIO()
+        call_command('backfill_answer_signatures', stdout=out)
+        self.assertEqual(out.getvalue(), "Signed 3 answers.\n")
+        self.assertEqual(
+            bytes(Answer.objects.get(id=self.answers[0].id).signature),
+            similarity.minhash(ESSAY))
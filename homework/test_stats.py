@@ -0,0 +1,174 @@
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from users.models import SchoolUser
+from .models import Homework, Answer, HomeworkStats
+
+
+class HomeworkStatsTests(TestCase):
+    """The incrementally maintained statistics match the computed ones."""
+
+    def setUp(self):
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com', user_type='teacher')
+        self.students = [
+            SchoolUser.objects.create(username='student%d@test.com' % i,
+                                      user_type='student')
+            for i in range(4)
+        ]
+        self.homework = Homework.objects.create(
+            title='Homework #1', question='How are you?',
+            teacher=self.teacher, due_date=date.today())
+        self.other = Homework.objects.create(
+            title='Homework #2', question='And you?',
+            teacher=self.teacher, due_date=date.today())
+
+    def stats(self, homework):
+        return HomeworkStats.objects.values(
+            'assigned_count', 'answer_count', 'answered_count').get(
+                homework=homework)
+
+    def assertConsistent(self):
+        self.assertEqual(HomeworkStats.objects.reconcile(), [])
+
+    def test_assignments(self):
+        self.homework.assign_students(SchoolUser.objects.all())
+        self.students[0].assigned_homeworks.add(self.other)
+        self.assertEqual(self.stats(self.homework)['assigned_count'], 4)
+        self.assertEqual(self.stats(self.other)['assigned_count'], 1)
+        self.homework.student.remove(self.students[1])
+        self.students[0].assigned_homeworks.remove(self.homework)
+        self.assertEqual(self.stats(self.homework)['assigned_count'], 2)
+        self.assertConsistent()
+        # Students and homework not assigned are not counted
+        self.homework.student.remove(self.students[1])
+        self.homework.student.remove(self.students[1], self.students[2])
+        self.students[1].assigned_homeworks.remove(self.homework, self.other)
+        self.assertEqual(self.stats(self.homework)['assigned_count'], 1)
+        self.assertEqual(self.stats(self.other)['assigned_count'], 1)
+        self.assertConsistent()
+        self.students[0].assigned_homeworks.clear()
+        self.homework.student.clear()
+        self.assertEqual(self.stats(self.homework)['assigned_count'], 0)
+        self.assertEqual(self.stats(self.other)['assigned_count'], 0)
+        self.assertConsistent()
+
+    def test_answers(self):
+        first = Answer.objects.create(description='Fine',
+                                      homework=self.homework,
+                                      student=self.students[0])
+        Answer.objects.create(description='Better', homework=self.homework,
+                              student=self.students[0])
+        last = Answer.objects.create(description='Good',
+                                     homework=self.homework,
+                                     student=self.students[1])
+        self.assertEqual(self.stats(self.homework), {
+            'assigned_count': 0, 'answer_count': 3, 'answered_count': 2})
+        stats = HomeworkStats.objects.get(homework=self.homework)
+        self.assertEqual(stats.first_answer_at, first.pub_date)
+        self.assertEqual(stats.last_answer_at, last.pub_date)
+        self.assertEqual(stats.answers_per_student, 1.5)
+        self.assertIsNone(stats.submission_rate)
+        self.assertConsistent()
+        last.delete()
+        self.assertConsistent()
+        # Deleting a homework deletes its statistics
+        self.homework.delete()
+        self.assertConsistent()
+
+    def test_deleted_answers(self):
+        answers = [
+            Answer.objects.create(description='Answer %d' % i,
+                                  homework=self.homework,
+                                  student=self.students[i % 2])
+            for i in range(4)
+        ]
+        answers[1].delete()
+        self.assertEqual(self.stats(self.homework), {
+            'assigned_count': 0, 'answer_count': 3, 'answered_count': 2})
+        answers[0].delete()
+        answers[3].delete()
+        self.assertEqual(self.stats(self.homework), {
+            'assigned_count': 0, 'answer_count': 1, 'answered_count': 1})
+        stats = HomeworkStats.objects.get(homework=self.homework)
+        self.assertEqual(stats.first_answer_at, answers[2].pub_date)
+        self.assertEqual(stats.last_answer_at, answers[2].pub_date)
+        self.assertConsistent()
+
+    def test_latest_answer_deleted(self):
+        first = Answer.objects.create(description='First',
+                                      homework=self.homework,
+                                      student=self.students[0])
+        Answer.objects.create(description='Second', homework=self.homework,
+                              student=self.students[0]).delete()
+        # Answering again is not a first answer
+        Answer.objects.create(description='Third', homework=self.homework,
+                              student=self.students[0])
+        self.assertEqual(self.stats(self.homework)['answered_count'], 1)
+        self.assertConsistent()
+        first.delete()
+        self.assertConsistent()
+
+    def test_dates_only_widen(self):
+        answer = Answer.objects.create(description='Fine',
+                                       homework=self.homework,
+                                       student=self.students[0])
+        # An older answer committed after a newer one
+        older = Answer(homework=self.homework, student=self.students[1],
+                       pub_date=answer.pub_date - timedelta(minutes=1))
+        HomeworkStats.objects.answer_added(older, True)
+        stats = HomeworkStats.objects.get(homework=self.homework)
+        self.assertEqual(stats.first_answer_at, older.pub_date)
+        self.assertEqual(stats.last_answer_at, answer.pub_date)
+
+    def test_delete_homework(self):
+        for i in range(10):
+            Answer.objects.create(description='Answer %d' % i,
+                                  homework=self.homework,
+                                  student=self.students[i % 4])
+        with CaptureQueriesContext(connection) as queries:
+            self.homework.delete()
+        # No statistics update for the answers of a deleted homework
+        stats_table = HomeworkStats._meta.db_table
+        self.assertEqual([query['sql'] for query in queries
+                          if stats_table in query['sql'] and
+                          not query['sql'].startswith('DELETE')], [])
+        self.assertConsistent()
+
+    def test_reconcile(self):
+        self.homework.assign_students(SchoolUser.objects.all())
+        HomeworkStats.objects.filter(homework=self.homework).update(
+            assigned_count=10)
+        HomeworkStats.objects.filter(homework=self.other).delete()
+        out = StringIO()
+        call_command('reconcile_homework_stats', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            "Homework %d: assigned_count is 10 instead of 4."
+            % self.homework.id,
+            "Homework %d: no statistics." % self.other.id,
+            "2 homeworks drifted.",
+        ])
+        call_command('reconcile_homework_stats', fix=True, stdout=out)
+        self.assertConsistent()
+        # Statistics missing are created on the next change
+        HomeworkStats.objects.filter(homework=self.other).delete()
+        self.other.student.add(self.students[0])
+        self.assertEqual(self.stats(self.other)['assigned_count'], 1)
+
+    def test_list(self):
+        self.homework.assign_students(SchoolUser.objects.all())
+        Answer.objects.create(description='Fine', homework=self.homework,
+                              student=self.students[0])
+        with self.assertNumQueries(1):
+            homework = Homework.objects.with_stats().get(id=self.homework.id)
+        computed = Homework.objects.with_teacher_stats().get(
+            id=self.homework.id)
+        for field in ('assigned_count', 'answered_count',
+                      'last_answered_at', 'overdue'):
+            self.assertEqual(getattr(homework, field),
+                             getattr(computed, field))
@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.core import mail
+from django.test import TestCase
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from users.models import SchoolUser
+from .models import Homework, Answer
+
+
+class NotificationTests(TestCase):
+    """Notifications are queued by the requests and sent by the worker."""
+
+    def setUp(self):
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com', email='teacher@test.com',
+            user_type='teacher')
+        self.students = [
+            SchoolUser.objects.create(
+                username='student%d@test.com' % i,
+                email='student%d@test.com' % i, user_type='student')
+            for i in range(3)
+        ]
+        self.homework = Homework.objects.create(
+            title='Homework #1',
+            question='How are you?',
+            teacher=self.teacher,
+            due_date=date(2016, 4, 8),
+        )
+
+    def test_notify_assigned(self):
+        self.homework.assign_students(SchoolUser.objects.all())
+        # Adding assigned students again queues nothing
+        self.homework.student.add(self.students[0])
+        self.students[0].assigned_homeworks.add(Homework.objects.create(
+            title='Homework #2', question='And now?', teacher=self.teacher,
+            due_date=date(2016, 4, 9)))
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+        run_pending()
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['student0@test.com', 'student0@test.com', 'student1@test.com',
+             'student2@test.com'])
+        self.assertEqual(mail.outbox[0].subject, 'New homework: Homework #1')
+        self.assertIn('Due on 2016-04-08.', mail.outbox[0].body)
+
+    def test_notify_answer(self):
+        for student in self.students:
+            Answer.objects.create(description='Fine', homework=self.homework,
+                                  student=student)
+        self.assertEqual(run_pending(), 3)
+        # One digest for the teacher
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['teacher@test.com'])
+        self.assertEqual(len(mail.outbox[0].body.splitlines()), 3)
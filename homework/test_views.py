@@ -3,6 +3,8 @@ from datetime import datetime, date
 from django.test import TestCase
 from django.contrib.auth.models import AnonymousUser
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from .models import Homework, Answer
 from users.models import SchoolUser
@@ -116,6 +118,27 @@ class HomeworkTest(TestCase):
         updated_homework = Homework.objects.get(id=self.homework.id)
         self.assertEqual(updated_homework.title, post_data['title'])
 
+    def test_homework_teacher_list(self):
+        """Test teacher Homework list shows dashboard columns."""
+        url = reverse('homework:list')
+        self.render_page(self.student, url, 403)
+        self.client.login(username=self.teacher.username, password="1234")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        homework = response.context['homework_list'][0]
+        self.assertEqual(homework.answered_count, 1)
+        # More homeworks must not add queries
+        for i in range(5):
+            Homework.objects.create(
+                title='Homework #%d' % i,
+                question='Why?',
+                teacher=self.teacher,
+                due_date=datetime.now(),
+            ).student.add(self.student)
+        with CaptureQueriesContext(connection) as more_queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), len(more_queries))
+
     def test_homework_assign(self):
         """Test Homework assign view rendering."""
         # Try to access page with invalid user profile
@@ -133,6 +156,30 @@ class HomeworkTest(TestCase):
                                  kwargs={'pk': self.homework.pk}),
                          200)
 
+    def test_homework_assign_queries(self):
+        """Test Homework assign view flags students in constant queries."""
+        url = reverse('homework:assign_student_list',
+                      kwargs={'pk': self.homework.pk})
+        self.homework.student.add(self.student)
+        self.client.login(username=self.teacher.username, password="1234")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        flags = dict((student.id, bool(student.is_assigned))
+                     for student in response.context['schooluser_list'])
+        self.assertEqual(flags, {self.student.id: True})
+        # More homeworks per student must not add queries
+        for i in range(5):
+            homework = Homework.objects.create(
+                title='Homework #%d' % i,
+                question='Why?',
+                teacher=self.teacher,
+                due_date=datetime.now(),
+            )
+            homework.student.add(self.student)
+        with CaptureQueriesContext(connection) as more_queries:
+            self.client.get(url)
+        self.assertEqual(len(queries), len(more_queries))
+
     def test_homework_add(self):
         """Test associating student to homework"""
         # Check that student is not associated
@@ -168,6 +215,85 @@ class HomeworkTest(TestCase):
         student_assigned = self.student in self.homework.student.all()
         self.assertFalse(student_assigned)
 
+    def test_homework_bulk_add(self):
+        """Test assigning many students to a homework at once."""
+        other_student = SchoolUser.objects.create(
+            username='student2@test.com',
+            email='student2@test.com',
+            user_type='student',
+        )
+        post_data = {
+            'homework_id': self.homework.id,
+            'action': 'add',
+            # Teachers are silently ignored
+            'student_ids': [self.student.id, other_student.id,
+                            self.teacher.id],
+        }
+        response = self.get_response(self.teacher,
+                                     reverse('homework:bulk_student'),
+                                     'POST', post_data=post_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json()['assigned']),
+                         sorted([self.student.id, other_student.id]))
+        self.assertEqual(self.homework.student.count(), 2)
+        # Assigning again does not duplicate rows
+        response = self.get_response(self.teacher,
+                                     reverse('homework:bulk_student'),
+                                     'POST', post_data=post_data)
+        self.assertEqual(self.homework.student.count(), 2)
+
+    def test_homework_bulk_all_and_remove(self):
+        """Test assigning all students then removing some of them."""
+        other_student = SchoolUser.objects.create(
+            username='student2@test.com',
+            email='student2@test.com',
+            user_type='student',
+        )
+        post_data = {
+            'homework_id': self.homework.id,
+            'action': 'add',
+            'all': 1,
+        }
+        self.post_data_to_page(self.teacher,
+                               reverse('homework:bulk_student'),
+                               post_data, 200)
+        self.assertEqual(self.homework.student.count(), 2)
+        post_data = {
+            'homework_id': self.homework.id,
+            'action': 'remove',
+            'student_ids': [other_student.id],
+        }
+        response = self.get_response(self.teacher,
+                                     reverse('homework:bulk_student'),
+                                     'POST', post_data=post_data)
+        self.assertEqual(response.json()['assigned'], [self.student.id])
+
+    def test_homework_bulk_permissions(self):
+        """Test bulk assignment is restricted to the homework's teacher."""
+        post_data = {
+            'homework_id': self.homework.id,
+            'action': 'add',
+            'all': 1,
+        }
+        self.post_data_to_page(self.student,
+                               reverse('homework:bulk_student'),
+                               post_data, 403)
+        other_teacher = SchoolUser.objects.create(
+            username='teacher2@test.com',
+            email='teacher2@test.com',
+            user_type='teacher',
+        )
+        other_teacher.set_password("1234")
+        other_teacher.save()
+        self.post_data_to_page(other_teacher,
+                               reverse('homework:bulk_student'),
+                               post_data, 403)
+        post_data['action'] = 'unknown'
+        self.post_data_to_page(self.teacher,
+                               reverse('homework:bulk_student'),
+                               post_data, 400)
+        self.assertEqual(self.homework.student.count(), 0)
+
     def test_student_answers(self):
         """Test Homework student's answers view rendering."""
         # Try to access page with invalid user profile
@@ -210,6 +336,14 @@ class HomeworkTest(TestCase):
                          reverse('homework:latest_answers',
                                  kwargs={'pk': self.homework.pk}),
                          200)
+        last_answer = Answer.objects.create(
+            description='Even better!',
+            homework=self.homework,
+            student=self.student
+        )
+        response = self.client.get(reverse('homework:latest_answers',
+                                           kwargs={'pk': self.homework.pk}))
+        self.assertEqual(list(response.context['answer_list']), [last_answer])
 
     def test_homework_list(self):
         """Test student Homework list view rendering."""
@@ -219,6 +353,10 @@ class HomeworkTest(TestCase):
                          reverse('users:signin'))
         # Access page as a Student
         self.render_page(self.student, reverse('homework:student_list_homework'), 200)
+        self.homework.student.add(self.student)
+        response = self.client.get(reverse('homework:student_list_homework'))
+        self.assertContains(response, 'Answered')
+        self.assertTrue(response.context['homework_list'][0].answered)
 
     def test_answer_create(self):
         """Test student Answer create view rendering and post."""
@@ -1,5 +1,5 @@
 from django.conf.urls import url
-from homework import views
+from homework import api, views
 
 urlpatterns = [
     # URL pattern for Homework creation view
@@ -38,12 +38,30 @@ urlpatterns = [
         view=views.homework_student_remove,
         name='remove_student'
     ),
+    # URL pattern for bulk adding/removing assignments
+    url(
+        regex=r'^student/bulk$',
+        view=views.homework_student_bulk,
+        name='bulk_student'
+    ),
+    # URL pattern for bulk grading
+    url(
+        regex=r'^answers/grade$',
+        view=views.answers_bulk_grade,
+        name='bulk_grade'
+    ),
     # URL pattern for latest answers
     url(
         regex=r'^(?P<pk>\d+)/answers$',
         view=views.HomeworkLatestAnswersView.as_view(),
         name='latest_answers'
     ),
+    # URL pattern for answers export
+    url(
+        regex=r'^(?P<pk>\d+)/answers/export$',
+        view=views.homework_answers_export,
+        name='export_answers'
+    ),
     # URL pattern for all answers for a student
     url(
         regex=r'^(?P<pk>\d+)/answers/(?P<student>\d+)$',
@@ -62,4 +80,28 @@ urlpatterns = [
         view=views.AnswerCreateView.as_view(),
         name='new_answer'
     ),
+    # URL pattern for search
+    url(
+        regex=r'^search$',
+        view=views.SearchView.as_view(),
+        name='search'
+    ),
+    # URL pattern for the JSON list of student's homework
+    url(
+        regex=r'^api/student/homework$',
+        view=api.student_homework_list,
+        name='api_student_homework'
+    ),
+    # URL pattern for the JSON list of teacher's homework
+    url(
+        regex=r'^api/homework$',
+        view=api.teacher_homework_list,
+        name='api_teacher_homework'
+    ),
+    # URL pattern for the JSON list of latest answers
+    url(
+        regex=r'^api/(?P<pk>\d+)/answers$',
+        view=api.latest_answers,
+        name='api_latest_answers'
+    ),
 ]
@@ -1,17 +1,30 @@
+import json
 from datetime import datetime, date
 
+from django.conf import settings
 from django.shortcuts import render, render_to_response, get_object_or_404
 from django.http import HttpResponse, HttpResponseRedirect
 from django.core.urlresolvers import reverse
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 from django.core.exceptions import PermissionDenied
-from django.views.generic import CreateView, UpdateView, ListView
-from django.http import Http404
-
-from .models import Homework, Answer
+from django.views.generic import (
+    CreateView, UpdateView, ListView, TemplateView)
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.http import StreamingHttpResponse
+from django.utils import six
+
+from .models import (
+    Homework, Answer, LatestAnswer, HomeworkStats, MAX_SCORE)
 from users.models import SchoolUser 
 from .forms import HomeworkCreateForm, AnswerCreateForm
+from .pagination import KeysetPaginationMixin, KeysetPage
+from . import cache, search, similarity
+from .export import FORMATS, export_lines
 
 
 ########## Helper functions views permission ##########
@@ -25,6 +38,25 @@ def check_student_user(request):
         raise PermissionDenied
     return request
 
+########## Teacher & Student Views ##########
+class SearchView(TemplateView):
+    """Ranked search of the user's homework and answers."""
+    template_name = 'homework/search.html'
+
+    @method_decorator(login_required)
+    def dispatch(self, request, *args, **kwargs):
+        return super(SearchView, self).dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super(SearchView, self).get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        if query:
+            context['homeworks'], context['answers'] = search.search(
+                self.request.user, query)
+        return context
+
+
 ########## Teacher Views ##########
 class HomeworkCreateView(CreateView):
     """Homework creation."""
@@ -75,7 +107,7 @@ class HomeworkUpdateView(UpdateView):
         return reverse('homework:list')
 
 
-class HomeworkListView(ListView):
+class HomeworkListView(KeysetPaginationMixin, ListView):
     """Teacher's homework List."""
     model = Homework
     template_name = 'homework/list.html'
@@ -88,13 +120,16 @@ class HomeworkListView(ListView):
             request, *args, **kwargs)
 
     def get_queryset(self):
-        return Homework.objects.filter(teacher=self.request.user)
+        return Homework.objects.filter(
+            teacher=self.request.user
+        ).with_stats()
 
-class HomeworkAssignView(ListView):
+class HomeworkAssignView(KeysetPaginationMixin, ListView):
     """Teacher can assign homework to students."""
     model = SchoolUser
     template_name = 'homework/assign_students.html'
     paginate_by = 10
+    keyset_ordering = ('last_name', 'id')
 
     @method_decorator(login_required)
     def dispatch(self, request, *args, **kwargs):
@@ -111,7 +146,23 @@ class HomeworkAssignView(ListView):
         return context
 
     def get_queryset(self):
-        return SchoolUser.objects.filter(user_type='student')
+        # Flag the assigned students with one EXISTS subquery instead of
+        # loading every student's homework list in the template.
+        through = Homework.student.through._meta
+        is_assigned = RawSQL(
+            "EXISTS (SELECT 1 FROM {table} WHERE {table}.{student} = {user}.id"
+            " AND {table}.{homework} = %s)".format(
+                table=through.db_table,
+                student=through.get_field('schooluser').column,
+                homework=through.get_field('homework').column,
+                user=SchoolUser._meta.db_table),
+            (self.homework.id,), output_field=BooleanField())
+        return assignable_students().annotate(is_assigned=is_assigned)
+
+
+def assignable_students():
+    """Students a teacher can assign a homework to."""
+    return SchoolUser.objects.filter(user_type='student')
 
 
 @login_required
@@ -146,7 +197,79 @@ def homework_student_remove(request):
     return HttpResponse("Removed")
 
 
-class HomeworkStudentAnswersView(ListView):
+@login_required
+@require_POST
+def homework_student_bulk(request):
+    """
+    Assign/Remove homework to/from many students in one request.
+
+    Expects `homework_id`, `action` ('add' or 'remove') and either a list of
+    `student_ids` or `all=1` to target every assignable student.
+    Returns the new list of assigned student ids.
+    """
+    request = check_teacher_user(request)
+    try:
+        homework_id = int(request.POST['homework_id'])
+        action = request.POST['action']
+        if request.POST.get('all') == '1':
+            students = assignable_students()
+        else:
+            student_ids = [int(student_id) for student_id
+                           in request.POST.getlist('student_ids')]
+            students = assignable_students().filter(id__in=student_ids)
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("Bad POST data for bulk assignment.")
+    homework = get_object_or_404(Homework, id=homework_id)
+    if homework.teacher_id != request.user.id:
+        raise PermissionDenied
+    if action == 'add':
+        homework.assign_students(students)
+    elif action == 'remove':
+        homework.unassign_students(students)
+    else:
+        return HttpResponseBadRequest("Unknown action: %s" % action)
+    assigned = list(homework.student.values_list('id', flat=True))
+    return JsonResponse({'homework_id': homework.id, 'assigned': assigned})
+
+
+@login_required
+@require_POST
+def answers_bulk_grade(request):
+    """
+    Grade many answers in one request.
+
+    Expects a JSON body {"grades": [{"answer_id": .., "score": ..,
+    "feedback": ..}, ..]}, a null score removes the grade. Every answer
+    must belong to the teacher's homework, or nothing is graded.
+    """
+    request = check_teacher_user(request)
+    try:
+        grades = []
+        for grade in json.loads(request.body.decode('utf-8'))['grades']:
+            score = grade.get('score')
+            if score is not None:
+                # int() would truncate floats and accept booleans
+                if (not isinstance(score, six.integer_types) or
+                        isinstance(score, bool)):
+                    raise ValueError("Score is not an integer: %r" % score)
+                if not 0 <= score <= MAX_SCORE:
+                    raise ValueError("Score out of range: %d" % score)
+            grades.append((int(grade['answer_id']), score,
+                           six.text_type(grade.get('feedback') or '')))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return HttpResponseBadRequest("Bad JSON data for bulk grading.")
+    answer_ids = set(answer_id for answer_id, score, feedback in grades)
+    if len(answer_ids) != len(grades):
+        return HttpResponseBadRequest("Answers graded more than once.")
+    # Check the ownership of every answer in one query
+    owned = Answer.objects.filter(
+        id__in=answer_ids, homework__teacher=request.user).count()
+    if owned != len(answer_ids):
+        raise PermissionDenied
+    return JsonResponse({'graded': Answer.objects.grade(grades)})
+
+
+class HomeworkStudentAnswersView(KeysetPaginationMixin, ListView):
     """All submission versions for a student for a homework."""
     model = Answer
     template_name = 'homework/answer_list.html'
@@ -168,6 +291,8 @@ class HomeworkStudentAnswersView(ListView):
     def get_context_data(self, **kwargs):
         context = super(HomeworkStudentAnswersView, self).get_context_data(**kwargs)
         context['student'] = self.student
+        context['homework'] = self.homework
+        context['max_score'] = MAX_SCORE
         return context
 
     def get_queryset(self):
@@ -178,17 +303,18 @@ class HomeworkStudentAnswersView(ListView):
         return answers
 
 
-class HomeworkLatestAnswersView(ListView):
+class HomeworkLatestAnswersView(KeysetPaginationMixin, ListView):
     """Teacher can see a list of latest submissions for a homework"""
     model = Answer
     template_name = 'homework/latest_answer_list.html'
     paginate_by = 10
+    keyset_ordering = ('student', 'id')
 
     @method_decorator(login_required)
     def dispatch(self, request, *args, **kwargs):
         request = check_teacher_user(request)
         self.homework = get_object_or_404(
-            Homework, id=int(self.kwargs['pk']))
+            Homework.objects.select_related('stats'), id=int(self.kwargs['pk']))
         # Check that the homework belong to the teacher
         if self.homework.teacher != request.user:
             raise PermissionDenied
@@ -198,22 +324,76 @@ class HomeworkLatestAnswersView(ListView):
     def get_context_data(self, **kwargs):
         context = super(HomeworkLatestAnswersView, self).get_context_data(**kwargs)
         context['homework'] = self.homework
+        context['grade_stats'] = self.homework.grade_stats()
+        try:
+            context['stats'] = self.homework.stats
+        except HomeworkStats.DoesNotExist:
+            context['stats'] = None
+        # Shown on the first page only
+        if not self.request.GET.get(self.cursor_kwarg):
+            context['duplicates'] = self.get_duplicates(context['stats'])
         return context
 
+    def get_duplicates(self, stats, limit=10):
+        """
+        Most similar pairs among the latest answers, as percentages, cached
+        until an answer is added or deleted.
+        """
+        key = cache.duplicates_key(stats) if stats is not None else None
+        pairs = cache.get_duplicates(key) if key is not None else None
+        if pairs is None:
+            signatures = Answer.objects.filter(
+                latest__homework=self.homework).values_list('id', 'signature')
+            pairs = similarity.duplicates(signatures, limit=limit)
+            if key is not None:
+                cache.set_duplicates(key, pairs)
+        if not pairs:
+            return []
+        answers = Answer.objects.select_related('student').in_bulk(
+            [answer_id for pair in pairs for answer_id in pair[:2]])
+        return [(answers[answer_id], answers[other_id],
+                 int(round(similar * 100)))
+                for answer_id, other_id, similar in pairs]
+
     def get_queryset(self):
         # Get only the latest answer for each student
         answers = Answer.objects.filter(
-            homework=self.homework, 
-        ).order_by('student', '-pub_date').distinct('student')
-        return answers 
+            latest__homework=self.homework,
+        ).select_related('student')
+        return answers
+
+
+@login_required
+def homework_answers_export(request, pk):
+    """
+    Stream the answers of a homework as CSV, or JSON lines with
+    `format=jsonl`. Only the latest answer of each student is exported
+    unless `history=1`.
+    """
+    request = check_teacher_user(request)
+    homework = get_object_or_404(Homework, id=int(pk))
+    if homework.teacher_id != request.user.id:
+        raise PermissionDenied
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest("Unknown format: %s" % export_format)
+    history = request.GET.get('history') == '1'
+    response = StreamingHttpResponse(
+        export_lines(homework, export_format, history),
+        content_type=FORMATS[export_format])
+    response['Content-Disposition'] = (
+        'attachment; filename="homework-%d-%s.%s"' % (
+            homework.id, 'history' if history else 'latest', export_format))
+    return response
 
 
 ########## Students Views ##########
-class StudentHomeworkListView(ListView):
+class StudentHomeworkListView(KeysetPaginationMixin, ListView):
     """List all the student's homework."""
     model = Homework
     template_name = 'homework/student_list_homework.html'
     paginate_by = 10
+    keyset_ordering = ('due_date', 'id')
 
     @method_decorator(login_required)
     def dispatch(self, request, *args, **kwargs):
@@ -223,9 +403,31 @@ class StudentHomeworkListView(ListView):
 
     def get_queryset(self):
         homeworks = Homework.objects.filter(
-            student=self.request.user)
+            student=self.request.user
+        ).with_student_status(self.request.user)
         return homeworks
 
+    def paginate_queryset(self, queryset, page_size):
+        """Serve the page from the student's cache when possible."""
+        if not settings.SHARED_CACHE:
+            return super(StudentHomeworkListView, self).paginate_queryset(
+                queryset, page_size)
+        key = cache.page_key(self.request.user.id,
+                             self.request.GET.get(self.cursor_kwarg))
+        data = cache.get_page(key)
+        if data is None:
+            paginator, page, object_list, is_paginated = super(
+                StudentHomeworkListView, self).paginate_queryset(
+                    queryset, page_size)
+            data = (object_list, page.has_next(), page.has_previous())
+            # A replica may lag behind the version token
+            if queryset.db == DEFAULT_DB_ALIAS:
+                cache.set_page(key, data)
+        object_list, has_next, has_previous = data
+        paginator = self.get_paginator(queryset, page_size)
+        page = KeysetPage(object_list, paginator, has_next, has_previous)
+        return (paginator, page, object_list, page.has_other_pages())
+
     def get_context_data(self, **kwargs):
         context = super(StudentHomeworkListView, self).get_context_data(**kwargs)
         context['today'] = date.today()
@@ -257,13 +459,12 @@ class AnswerCreateView(CreateView):
         context = super(AnswerCreateView, self).get_context_data(**kwargs)
         context['homework'] = self.homework
         # Check if student had previous answer and get latest
-        answers = Answer.objects.filter(
+        latest = LatestAnswer.objects.filter(
             homework=self.homework,
             student=self.request.user
-        )
-        if answers:
-            # Latest answer
-            context['last_answer'] = answers.order_by('-pub_date')[0]
+        ).select_related('answer').first()
+        if latest:
+            context['last_answer'] = latest.answer
         return context
 
     def get_success_url(self):
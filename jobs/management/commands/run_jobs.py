@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import run_pending
+
+
+class Command(BaseCommand):
+    help = "Run the background jobs as they become due."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help="Number of jobs claimed at once.")
+        parser.add_argument(
+            '--sleep', type=float, default=1,
+            help="Seconds to wait when no job is due.")
+        parser.add_argument(
+            '--name', action='append', dest='names',
+            help="Only run jobs of this name, can be repeated.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit as soon as no job is due.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            count = run_pending(options['batch_size'], options['names'])
+            total += count
+            if not count:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        self.stdout.write("Ran %d jobs." % total)
@@ -0,0 +1,40 @@
+import json
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+STATUS = (
+    ('pending', _('Pending')),
+    ('running', _('Running')),
+    ('done', _('Done')),
+    ('failed', _('Failed')),
+)
+
+
+class Job(models.Model):
+    name = models.CharField(_("Name"), max_length=100)
+    payload = models.TextField(_("Payload"), default='{}')
+    status = models.CharField(
+        _("Status"), max_length=10, choices=STATUS, default='pending')
+    attempts = models.PositiveIntegerField(_("Attempts"), default=0)
+    max_attempts = models.PositiveIntegerField(_("Max attempts"), default=5)
+    run_at = models.DateTimeField(_("Run at"), default=timezone.now)
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        index_together = [
+            # Claiming the next jobs due
+            ('status', 'run_at'),
+            ('locked_by', 'status'),
+        ]
+
+    def __str__(self):
+        return '%s #%s' % (self.name, self.id)
+
+    @property
+    def data(self):
+        return json.loads(self.payload)
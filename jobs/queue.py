@@ -0,0 +1,151 @@
+"""
+Background jobs stored in the database.
+
+Handlers are registered with `register` in the `tasks` module of an app,
+jobs are added with `enqueue`, usually within the transaction of the change
+they follow, and run by the `run_jobs` command.
+
+A worker claims due jobs by stamping them with its own token. On PostgreSQL
+the rows are selected FOR UPDATE SKIP LOCKED, so concurrent workers skip
+each other's rows instead of waiting for them. Other databases select the
+due ids first and claim them with an UPDATE that checks they are still due,
+so a job is never claimed twice.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job name: (handler, batch size)
+handlers = {}
+# Job name: function called with the payload of a job given up
+failure_handlers = {}
+
+
+def register(name, batch_size=1, on_failure=None):
+    """
+    Register the decorated function as the handler of `name` jobs. With a
+    `batch_size` above 1 it is called with a list of up to `batch_size`
+    payloads instead of a single payload. `on_failure` is called with the
+    payload of each job given up after its last attempt.
+    """
+    def decorator(func):
+        handlers[name] = (func, batch_size)
+        if on_failure is not None:
+            failure_handlers[name] = on_failure
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=None):
+    """Add a `name` job, `payload` must be JSON serializable."""
+    if name not in handlers:
+        raise ValueError("No handler registered for job %s" % name)
+    job = Job(name=name, payload=json.dumps(payload or {}))
+    if run_at is not None:
+        job.run_at = run_at
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    job.save()
+    return job
+
+
+def due_jobs(now, names=None):
+    """Pending jobs due at `now` and running jobs whose worker died."""
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    jobs = Job.objects.filter(
+        Q(status='pending', run_at__lte=now) |
+        Q(status='running', locked_at__lt=stale))
+    if names:
+        jobs = jobs.filter(name__in=names)
+    return jobs
+
+
+def claim(limit, names=None):
+    """Claim up to `limit` due jobs for this worker and return them."""
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    due = due_jobs(now, names)
+    next_ids = due.order_by('run_at', 'id').values_list('id', flat=True)
+
+    def stamp(ids):
+        due.filter(id__in=ids).update(
+            status='running', locked_by=token, locked_at=now,
+            attempts=F('attempts') + 1)
+
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            sql, params = next_ids[:limit].query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(sql + ' FOR UPDATE SKIP LOCKED', params)
+                stamp([row[0] for row in cursor.fetchall()])
+    else:
+        # The update checks the jobs are still due
+        stamp(list(next_ids[:limit]))
+    return list(Job.objects.filter(
+        locked_by=token, status='running').order_by('run_at', 'id'))
+
+
+def run_jobs(jobs):
+    """Run claimed `jobs` by batches of their handler, return the count."""
+    by_name = {}
+    for job in jobs:
+        by_name.setdefault(job.name, []).append(job)
+    for name, named_jobs in by_name.items():
+        if name not in handlers:
+            fail(named_jobs, "No handler registered for job %s" % name,
+                 retry=False)
+            continue
+        func, batch_size = handlers[name]
+        for start in range(0, len(named_jobs), batch_size):
+            batch = named_jobs[start:start + batch_size]
+            try:
+                with transaction.atomic():
+                    if batch_size > 1:
+                        func([job.data for job in batch])
+                    else:
+                        func(batch[0].data)
+            except Exception:
+                logger.exception("Job %s failed", name)
+                fail(batch, traceback.format_exc())
+            else:
+                Job.objects.filter(id__in=[job.id for job in batch]).update(
+                    status='done', locked_by='', last_error='')
+    return len(jobs)
+
+
+def fail(jobs, error, retry=True):
+    """Retry `jobs` later with an exponential backoff, or give up."""
+    now = timezone.now()
+    for job in jobs:
+        job.last_error = error
+        job.locked_by = ''
+        if retry and job.attempts < job.max_attempts:
+            job.status = 'pending'
+            job.run_at = now + timedelta(
+                seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = 'failed'
+        job.save(update_fields=['last_error', 'locked_by', 'status',
+                                'run_at'])
+        if job.status == 'failed' and job.name in failure_handlers:
+            try:
+                with transaction.atomic():
+                    failure_handlers[job.name](job.data)
+            except Exception:
+                logger.exception("Failure handler of job %s failed", job.name)
+
+
+def run_pending(limit=100, names=None):
+    """Claim and run one batch of due jobs, return the number run."""
+    return run_jobs(claim(limit, names))
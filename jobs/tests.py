@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from .models import Job
+from .queue import handlers, register, enqueue, claim, run_pending
+
+calls = []
+
+
+@register('test.single')
+def single(payload):
+    calls.append(payload)
+
+
+@register('test.batch', batch_size=3)
+def batch(payloads):
+    calls.append(payloads)
+
+
+def given_up(payload):
+    calls.append(('given up', payload))
+
+
+@register('test.broken', on_failure=given_up)
+def broken(payload):
+    Job.objects.create(name='written by a failed job')
+    raise RuntimeError("Broken")
+
+
+class QueueTests(TestCase):
+
+    def setUp(self):
+        del calls[:]
+
+    def test_run(self):
+        enqueue('test.single', {'value': 1})
+        enqueue('test.single', {'value': 2})
+        later = enqueue('test.single', {'value': 3},
+                        run_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, [{'value': 1}, {'value': 2}])
+        self.assertEqual(Job.objects.filter(status='done').count(), 2)
+        self.assertEqual(Job.objects.get(id=later.id).status, 'pending')
+        self.assertEqual(run_pending(), 0)
+
+    def test_batches(self):
+        for value in range(5):
+            enqueue('test.batch', {'value': value})
+        self.assertEqual(run_pending(), 5)
+        self.assertEqual([len(payloads) for payloads in calls], [3, 2])
+
+    def test_claim(self):
+        for value in range(5):
+            enqueue('test.single', {'value': value})
+        first = claim(3)
+        second = claim(3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(job.id for job in first) &
+                         set(job.id for job in second))
+        self.assertEqual(claim(3), [])
+        self.assertEqual(first[0].attempts, 1)
+        # Jobs of a worker that died are claimed again
+        Job.objects.filter(id=first[0].id).update(
+            locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([job.id for job in claim(3)], [first[0].id])
+
+    @override_settings(JOB_RETRY_DELAY=0)
+    def test_retries(self):
+        job = enqueue('test.broken', max_attempts=2)
+        run_pending()
+        job = Job.objects.get(id=job.id)
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('RuntimeError: Broken', job.last_error)
+        # The handler's writes are rolled back
+        self.assertFalse(Job.objects.filter(
+            name='written by a failed job').exists())
+        self.assertEqual(calls, [])
+        run_pending()
+        job = Job.objects.get(id=job.id)
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        # The failure handler only runs once the job is given up
+        self.assertEqual(calls, [('given up', {})])
+        self.assertEqual(run_pending(), 0)
+
+    def test_unknown_handler(self):
+        self.assertRaises(ValueError, enqueue, 'test.unknown')
+        Job.objects.create(name='test.unknown')
+        run_pending()
+        self.assertEqual(Job.objects.get().status, 'failed')
+
+    def test_command(self):
+        enqueue('test.single', {'value': 1})
+        enqueue('test.batch', {'value': 2})
+        out = StringIO()
+        call_command('run_jobs', once=True, names=['test.batch'],
+                     stdout=out)
+        self.assertEqual(out.getvalue(), "Ran 1 jobs.\n")
+        self.assertEqual(calls, [[{'value': 2}]])
+
+    def test_registered(self):
+        # Handlers of the apps' tasks modules are discovered
+        self.assertIn('homework.notify_assigned', handlers)
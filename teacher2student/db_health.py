@@ -0,0 +1,32 @@
+"""
+Health checks of the persistent database connections.
+
+With CONN_MAX_AGE, a connection is reused by the following requests of its
+worker until it gets too old. Django only checks that it still works after
+an error, so a connection dropped by the server or a proxy meanwhile fails
+the next request. ConnectionHealthMiddleware checks a reused connection
+before the view runs, at most every CONN_HEALTH_CHECK_INTERVAL seconds
+(a `SELECT 1` on PostgreSQL), and closes it when broken. Django then opens
+a new connection on the first query.
+"""
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+class ConnectionHealthMiddleware(object):
+    """Close the persistent connections that no longer work."""
+
+    def process_request(self, request):
+        now = time.time()
+        for connection in connections.all():
+            if (connection.connection is None or
+                    not connection.settings_dict['CONN_MAX_AGE'] or
+                    connection.in_atomic_block):
+                continue
+            checked_at = getattr(connection, 'health_checked_at', 0)
+            if now - checked_at >= settings.CONN_HEALTH_CHECK_INTERVAL:
+                if not connection.is_usable():
+                    connection.close()
+                connection.health_checked_at = now
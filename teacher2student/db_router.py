@@ -0,0 +1,82 @@
+"""
+Routing of the reads of the list views to read replicas.
+
+The replicas are the DATABASE_REPLICA_URLS databases, read only copies of
+the primary. ReplicaMiddleware lets the views named in REPLICA_VIEWS read
+from a random replica when the request is a GET or HEAD. Everything else
+goes to the primary: every write, every read of the other views and every
+read following a write in the same request.
+
+A replica may lag behind the primary, so after a request that wrote, the
+client gets a REPLICA_PIN_COOKIE for REPLICA_PIN_SECONDS seconds during
+which all its requests use the primary and it reads its own writes.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+state = threading.local()
+
+
+def use_replica():
+    return getattr(state, 'use_replica', False)
+
+
+def reset():
+    state.use_replica = False
+    state.wrote = False
+
+
+class ReplicaRouter(object):
+    """Send the reads to a replica when the middleware allows it."""
+
+    def db_for_read(self, model, **hints):
+        # A lagging replica would bring back sessions ended on the primary
+        if model._meta.app_label == 'sessions':
+            return 'default'
+        if settings.REPLICA_DATABASES and use_replica():
+            return random.choice(settings.REPLICA_DATABASES)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        # Read your writes for the rest of the request
+        state.use_replica = False
+        state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaMiddleware(object):
+    """
+    Route the reads of the REPLICA_VIEWS to the replicas, and pin the
+    clients to the primary for a while after they wrote.
+    """
+
+    def process_request(self, request):
+        reset()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state.use_replica = (
+            request.method in ('GET', 'HEAD') and
+            request.resolver_match.view_name in settings.REPLICA_VIEWS and
+            settings.REPLICA_PIN_COOKIE not in request.COOKIES)
+
+    def process_exception(self, request, exception):
+        state.use_replica = False
+
+    def process_response(self, request, response):
+        wrote = getattr(state, 'wrote', False) or request.method not in (
+            'GET', 'HEAD', 'OPTIONS')
+        if wrote and settings.REPLICA_DATABASES:
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True)
+        reset()
+        return response
@@ -0,0 +1,146 @@
+"""
+Memoized rendering of the floppyforms widgets and rows.
+
+Floppyforms renders every row and every widget with its own template,
+flattening the whole template context around the form for each widget.
+The HTML of an empty field only depends on its form class, so it is
+rendered once per process and then reused:
+
+- MemoizedRenderingMixin keeps the HTML of the widgets without a value
+  per form class.
+- The `formrow` tag of the `memoized_forms` template library, loaded after
+  `floppyforms`, keeps the HTML of the rows of unbound forms using the
+  mixin whose fields have no value, per tag and form class.
+
+The widget and row templates of the memoized forms must only use the
+context built by floppyforms (field, attrs, required...), not the template
+around the form. FORM_RENDER_CACHE = False turns the memoization off.
+"""
+import threading
+
+from django import template
+from django.conf import settings
+from django.forms.forms import BoundField
+from django.utils import translation
+from floppyforms.templatetags.floppyforms import FormRowNode
+
+register = template.Library()
+
+# Form class: {widget key: HTML}
+rendered_widgets = {}
+lock = threading.Lock()
+
+
+def widget_key(template_name, context):
+    """Hashable key of a widget context without value, else None."""
+    if context.get('value') not in (None, ''):
+        return None
+    items = []
+    for name, value in context.items():
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        elif isinstance(value, list):
+            value = tuple(value)
+        items.append((name, value))
+    key = (template_name, translation.get_language(), tuple(sorted(items)))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def memoized_render(widget, rendered):
+    """Wrap the `render` method of `widget` with the `rendered` memo."""
+    render = widget.render
+
+    def memoized(name, value, attrs=None, **kwargs):
+        if not settings.FORM_RENDER_CACHE:
+            return render(name, value, attrs=attrs, **kwargs)
+        key = widget_key(kwargs.get('template_name') or widget.template_name,
+                         widget.get_context(name, value, attrs=attrs or {}))
+        if key is None:
+            return render(name, value, attrs=attrs, **kwargs)
+        html = rendered.get(key)
+        if html is None:
+            html = rendered[key] = render(name, value, attrs=attrs, **kwargs)
+        return html
+    return memoized
+
+
+class MemoizedRenderingMixin(object):
+    """Memoize the rendering of the empty floppyforms widgets."""
+
+    def __init__(self, *args, **kwargs):
+        super(MemoizedRenderingMixin, self).__init__(*args, **kwargs)
+        rendered = rendered_widgets.get(type(self))
+        if rendered is None:
+            with lock:
+                rendered = rendered_widgets.setdefault(type(self), {})
+        # The fields and their widgets are copies owned by this form
+        for field in self.fields.values():
+            if callable(getattr(field.widget, 'get_context', None)):
+                field.widget.render = memoized_render(field.widget, rendered)
+
+
+class NotStatic(Exception):
+    """The row depends on a field value."""
+
+
+def freeze(value):
+    """Hashable version of a row context, raise NotStatic for values."""
+    if isinstance(value, BoundField):
+        if value.value() not in (None, ''):
+            raise NotStatic
+        return (value.html_name, value.auto_id)
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((name, freeze(item))
+                            for name, item in value.items()))
+    return value
+
+
+class MemoizedFormRowNode(FormRowNode):
+    """`formrow` tag reusing the HTML of the static rows."""
+
+    def __init__(self, *args, **kwargs):
+        super(MemoizedFormRowNode, self).__init__(*args, **kwargs)
+        # (form class, ...): HTML
+        self.rendered = {}
+
+    def row_key(self, context):
+        """Key of the row in `context` if it is static, else None."""
+        extra_context = self.get_extra_context(context)
+        fields = extra_context.get('fields') or []
+        if len(fields) != 1:
+            return None
+        form = fields[0].form
+        if form.is_bound or not isinstance(form, MemoizedRenderingMixin):
+            return None
+        if 'using' in self.options:
+            template_name = self.options['using'].resolve(context)
+        else:
+            template_name = self.get_template_name(context)
+        try:
+            key = (type(form), template_name, translation.get_language(),
+                   freeze(extra_context))
+            hash(key)
+        except (NotStatic, TypeError):
+            return None
+        return key
+
+    def render(self, context):
+        if not settings.FORM_RENDER_CACHE:
+            return super(MemoizedFormRowNode, self).render(context)
+        key = self.row_key(context)
+        if key is None:
+            return super(MemoizedFormRowNode, self).render(context)
+        html = self.rendered.get(key)
+        if html is None:
+            html = self.rendered[key] = super(
+                MemoizedFormRowNode, self).render(context)
+        return html
+
+
+register.tag('formrow', MemoizedFormRowNode.parse)
@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration, used by the Procfile::
+
+    gunicorn -c teacher2student/gunicorn_conf.py teacher2student.wsgi
+
+GUNICORN_WORKER_CLASS selects the worker model: `sync` workers serve one
+request at a time, `gthread` workers serve GUNICORN_THREADS requests at a
+time with one thread each, so requests waiting on the database do not hold
+a whole process. WEB_CONCURRENCY sets the number of worker processes.
+
+The application is loaded and warmed up in the master before it forks the
+workers, which share its memory and start serving at full speed. Set
+GUNICORN_PRELOAD=0 to load it in every worker instead.
+"""
+import multiprocessing
+import os
+
+bind = '0.0.0.0:%s' % os.environ.get('PORT', '8000')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.environ.get('WEB_CONCURRENCY',
+                             multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS',
+                             4 if worker_class == 'gthread' else 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# Idle connections kept open by the gthread workers
+keepalive = 5
+accesslog = '-'
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def when_ready(server):
+    """Called in the master with the application loaded, before forking."""
+    if not preload_app:
+        return
+    from teacher2student.warmup import warm_up
+    urls, templates = warm_up()
+    server.log.info("Warmed up %d URL patterns and %d templates", urls,
+                    templates)
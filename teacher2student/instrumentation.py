@@ -0,0 +1,201 @@
+"""
+Per view request instrumentation.
+
+ViewStatsMiddleware records for every resolved URL name the number of
+requests, SQL queries, SQL time, template render time and wall time of
+the last VIEW_STATS_WINDOW requests. The figures are served as JSON to
+staff users by `view_stats_json` and each response gets a Server-Timing header.
+Stats are kept per worker process.
+
+Queries are counted and timed by a thin wrapper around the cursors of each
+connection, without Django's debug cursor and its query log. Template time
+is only measured for views returning a TemplateResponse, which is rendered
+after the view. A template rendered within the view, e.g. by `render()`,
+counts in the wall time only.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('queries', 'sql_ms', 'template_ms', 'wall_ms')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = int(round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class ViewStats(object):
+    """Rolling window of request metrics per view name."""
+
+    def __init__(self, window):
+        self.window = window
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, flagged, **metrics):
+        with self.lock:
+            view = self.views.get(view_name)
+            if view is None:
+                view = self.views[view_name] = {
+                    'requests': 0,
+                    'flagged': 0,
+                    'samples': dict((metric, deque(maxlen=self.window))
+                                    for metric in METRICS),
+                }
+            view['requests'] += 1
+            view['flagged'] += int(flagged)
+            for metric in METRICS:
+                view['samples'][metric].append(metrics[metric])
+
+    def summary(self):
+        """Counts and p50/p95/p99 of every metric for each view."""
+        with self.lock:
+            views = dict(
+                (name, (view['requests'], view['flagged'],
+                        dict((metric, sorted(samples)) for metric, samples
+                             in view['samples'].items())))
+                for name, view in self.views.items())
+        summary = {}
+        for name, (requests, flagged, samples) in views.items():
+            summary[name] = {'requests': requests, 'flagged': flagged}
+            for metric, values in samples.items():
+                summary[name][metric] = {
+                    'p50': percentile(values, 0.50),
+                    'p95': percentile(values, 0.95),
+                    'p99': percentile(values, 0.99),
+                }
+        return summary
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+view_stats = ViewStats(settings.VIEW_STATS_WINDOW)
+
+
+class TimedCursor(object):
+    """Cursor wrapper adding its queries to the counters of `connection`."""
+
+    def __init__(self, wrapped, connection):
+        self.wrapped = wrapped
+        self.connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def __iter__(self):
+        return iter(self.wrapped)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.wrapped.__exit__(type, value, traceback)
+
+    def timed(self, method, *args):
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            self.connection.view_stats_queries += 1
+            self.connection.view_stats_sql_time += time.time() - start
+
+    def callproc(self, procname, params=None):
+        return self.timed(self.wrapped.callproc, procname, params)
+
+    def execute(self, sql, params=None):
+        return self.timed(self.wrapped.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self.timed(self.wrapped.executemany, sql, param_list)
+
+
+def instrument(connection):
+    """Wrap the cursors made by `connection` with TimedCursor, once."""
+    if hasattr(connection, 'view_stats_queries'):
+        return
+    connection.view_stats_queries = 0
+    connection.view_stats_sql_time = 0.0
+    make_cursor = connection.make_cursor
+    make_debug_cursor = connection.make_debug_cursor
+    connection.make_cursor = lambda cursor: TimedCursor(
+        make_cursor(cursor), connection)
+    connection.make_debug_cursor = lambda cursor: TimedCursor(
+        make_debug_cursor(cursor), connection)
+
+
+class ViewStatsMiddleware(object):
+    """Measure every request, it should come first in MIDDLEWARE_CLASSES."""
+
+    def process_request(self, request):
+        request._view_stats = {
+            'start': time.time(),
+            'template_ms': 0.0,
+            'connections': [],
+        }
+        for connection in connections.all():
+            instrument(connection)
+            request._view_stats['connections'].append(
+                (connection, connection.view_stats_queries,
+                 connection.view_stats_sql_time))
+
+    def process_template_response(self, request, response):
+        stats = getattr(request, '_view_stats', None)
+        if stats is not None:
+            # The response is rendered right after this middleware
+            render_start = time.time()
+
+            def rendered(response):
+                stats['template_ms'] += (time.time() - render_start) * 1000
+            response.add_post_render_callback(rendered)
+        return response
+
+    def process_response(self, request, response):
+        stats = getattr(request, '_view_stats', None)
+        if stats is None:
+            return response
+        queries = 0
+        sql_ms = 0.0
+        for connection, start_queries, start_time in stats['connections']:
+            queries += connection.view_stats_queries - start_queries
+            sql_ms += (connection.view_stats_sql_time - start_time) * 1000
+        wall_ms = (time.time() - stats['start']) * 1000
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else '<unresolved>'
+        flagged = queries > settings.VIEW_STATS_QUERY_THRESHOLD
+        if flagged:
+            logger.warning("%s ran %d queries for %s", view_name, queries,
+                           request.path)
+        view_stats.record(view_name, flagged, queries=queries, sql_ms=sql_ms,
+                          template_ms=stats['template_ms'], wall_ms=wall_ms)
+        response['Server-Timing'] = (
+            'sql;dur=%.1f;desc="%d queries", template;dur=%.1f, '
+            'total;dur=%.1f' % (sql_ms, queries, stats['template_ms'],
+                                wall_ms))
+        return response
+
+
+@login_required
+def view_stats_json(request):
+    """Stats of every view for staff users."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return JsonResponse({
+        'window': view_stats.window,
+        'query_threshold': settings.VIEW_STATS_QUERY_THRESHOLD,
+        'views': view_stats.summary(),
+    })
@@ -57,9 +57,13 @@ INSTALLED_APPS = [
     'floppyforms',
     'users',
     'homework',
+    'jobs',
 ]
 
 MIDDLEWARE_CLASSES = [
+    'teacher2student.instrumentation.ViewStatsMiddleware',
+    'teacher2student.db_health.ConnectionHealthMiddleware',
+    'teacher2student.db_router.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,11 +76,26 @@ MIDDLEWARE_CLASSES = [
 
 ROOT_URLCONF = 'teacher2student.urls'
 
+# Number of latest requests per view used for the percentiles of the view
+# stats, and number of queries above which a request is logged as suspect.
+VIEW_STATS_WINDOW = int(os.environ.get("VIEW_STATS_WINDOW", 1000))
+VIEW_STATS_QUERY_THRESHOLD = int(
+    os.environ.get("VIEW_STATS_QUERY_THRESHOLD", 30))
+
+# Templates are parsed once per process and kept by the cached loader in
+# production, they are read again on every render when DEBUG is on.
+template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    template_loaders = [
+        ('django.template.loaders.cached.Loader', template_loaders)]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(PROJECT_ROOT, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -84,10 +103,19 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': template_loaders,
+            'libraries': {
+                'memoized_forms': 'teacher2student.form_rendering',
+            },
         },
     },
 ]
 
+# Memoize the HTML of the empty fields of the forms using
+# teacher2student.form_rendering.
+FORM_RENDER_CACHE = os.environ.get(
+    "FORM_RENDER_CACHE", "True").lower() in ["true", "t", "1"]
+
 WSGI_APPLICATION = 'teacher2student.wsgi.application'
 
 
@@ -95,9 +123,131 @@ WSGI_APPLICATION = 'teacher2student.wsgi.application'
 # https://docs.djangoproject.com/en/1.9/ref/settings/#databases
 
 # Dtabase configuration for heroku.
+# Connections are kept open for CONN_MAX_AGE seconds and reused by the
+# following requests, 0 closes them at the end of every request. Reused
+# connections are checked every CONN_HEALTH_CHECK_INTERVAL seconds at most,
+# see db_health.
 import dj_database_url
+CONN_MAX_AGE = int(os.environ.get("CONN_MAX_AGE", 60))
+CONN_HEALTH_CHECK_INTERVAL = int(
+    os.environ.get("CONN_HEALTH_CHECK_INTERVAL", 10))
 DATABASES = {}
-DATABASES['default'] = dj_database_url.config()
+DATABASES['default'] = dj_database_url.config(conn_max_age=CONN_MAX_AGE)
+
+# Read replicas, a comma separated list of database URLs, see db_router.
+# Tests treat them as mirrors of the primary.
+REPLICA_DATABASES = []
+for index, url in enumerate(
+        filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(","))):
+    alias = 'replica%d' % (index + 1)
+    DATABASES[alias] = dj_database_url.parse(url.strip(),
+                                              conn_max_age=CONN_MAX_AGE)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['teacher2student.db_router.ReplicaRouter']
+
+# Views whose GET requests read from the replicas.
+REPLICA_VIEWS = [
+    'homework:list',
+    'homework:student_list_homework',
+    'homework:latest_answers',
+    'homework:student_answers',
+]
+# Cookie set after a write, the client reads from the primary while it lasts.
+REPLICA_PIN_COOKIE = 'db_pin'
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/1.9/topics/cache/
+
+# Local memory cache by default, file based cache shared by all the workers
+# of the server if CACHE_LOCATION is set.
+if os.environ.get("CACHE_LOCATION"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ["CACHE_LOCATION"],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# The local memory cache is private to each worker process
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith('LocMemCache')
+
+# Seconds a student homework list page stays cached, pages are also
+# invalidated as soon as the student's homework or answers change. They are
+# only cached with a shared cache, so that every worker sees invalidations.
+STUDENT_LIST_CACHE_TIMEOUT = int(
+    os.environ.get("STUDENT_LIST_CACHE_TIMEOUT", 300))
+
+# Seconds the duplicate answers of a homework stay cached, a new or deleted
+# answer computes them again.
+DUPLICATES_CACHE_TIMEOUT = int(
+    os.environ.get("DUPLICATES_CACHE_TIMEOUT", 600))
+
+
+# Sessions
+# https://docs.djangoproject.com/en/1.9/topics/http/sessions/
+
+# Sessions are read from the database by default. SESSION_BACKEND=cached_db
+# reads them from the cache and writes them through to the database, the
+# cache must then be shared by the workers, or a logout in one of them would
+# not end the session cached by the others. SESSION_BACKEND=signed_cookies
+# keeps them in the client.
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "db")
+if SESSION_BACKEND == 'cached_db' and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "SESSION_BACKEND=cached_db needs a cache shared by the workers, "
+        "set CACHE_LOCATION.")
+SESSION_ENGINE = 'django.contrib.sessions.backends.%s' % SESSION_BACKEND
+
+
+# Cache of the users loaded on every authenticated request, saves the user
+# query. 'local' keeps the users in a LRU of AUTH_USER_CACHE_SIZE users per
+# worker, 'shared' keeps them in the default cache. Invalidation goes through
+# the default cache, which must be shared by the workers: a password change
+# in one of them would not end the sessions served by the others.
+AUTH_USER_CACHE = os.environ.get("AUTH_USER_CACHE", "")
+if AUTH_USER_CACHE and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "AUTH_USER_CACHE needs a cache shared by the workers, "
+        "set CACHE_LOCATION.")
+AUTH_USER_CACHE_SIZE = int(os.environ.get("AUTH_USER_CACHE_SIZE", 1000))
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", 300))
+
+
+# Processes hashing the passwords of roster imports made from the web, 0
+# hashes them in the jobs worker running the import.
+ROSTER_IMPORT_WORKERS = int(os.environ.get("ROSTER_IMPORT_WORKERS", 0))
+
+# Uploaded files: the rosters waiting for their import job, so the storage
+# must be shared by the web and jobs processes.
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", os.path.join(BASE_DIR, 'media'))
+
+# Rows fetched per query by the answer exports.
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+
+
+# Background jobs, run by `manage.py run_jobs`
+# Seconds after which a running job is considered abandoned by its worker.
+JOB_LOCK_TIMEOUT = int(os.environ.get("JOB_LOCK_TIMEOUT", 600))
+# Seconds before the first retry of a failed job, doubled at each attempt.
+JOB_RETRY_DELAY = int(os.environ.get("JOB_RETRY_DELAY", 30))
+
+
+# Email
+# https://docs.djangoproject.com/en/1.9/topics/email/
+
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+DEFAULT_FROM_EMAIL = os.environ.get(
+    "DEFAULT_FROM_EMAIL", "noreply@teacher2student.herokuapp.com")
 
 
 # Password validation
@@ -119,6 +269,7 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 AUTH_USER_MODEL = 'users.SchoolUser'
+AUTHENTICATION_BACKENDS = ['users.backends.UsernameOrEmailBackend']
 LOGIN_URL = '/users/signin'
 
 # Internationalization
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from homework.cache import cache_stats
+from homework.models import Homework
+from teacher2student import db_router
+from users.models import SchoolUser
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTests(TestCase):
+    """
+    A second SQLite file stands in for the replica, rows are copied to it
+    by hand so that it can lag behind the primary.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(ReplicaRouterTests, cls).setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        with connections['replica'].schema_editor() as editor:
+            for model in apps.get_models():
+                editor.create_model(model)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+        shutil.rmtree(cls.directory)
+        super(ReplicaRouterTests, cls).tearDownClass()
+
+    def setUp(self):
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com',
+            email='teacher@test.com',
+            user_type='teacher',
+        )
+        self.teacher.set_password('1234')
+        self.teacher.save()
+        self.homework = Homework.objects.create(
+            title='Replicated homework', question='How are you?',
+            teacher=self.teacher, due_date=date.today())
+        self.replicate(self.teacher, self.homework)
+        # Not on the replica yet
+        Homework.objects.create(
+            title='Lagging homework', question='And you?',
+            teacher=self.teacher, due_date=date.today())
+        self.client.login(username=self.teacher.username, password='1234')
+
+    def tearDown(self):
+        for model in (Homework, SchoolUser):
+            model.objects.using('replica').all().delete()
+
+    def replicate(self, *objects):
+        for obj in objects:
+            type(obj).objects.using('replica').bulk_create([obj])
+
+    def test_list_reads_replica(self):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('homework:list'))
+        self.assertTrue(queries.captured_queries)
+        self.assertContains(response, 'Replicated homework')
+        self.assertNotContains(response, 'Lagging homework')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_replica_pages_not_cached(self):
+        student = SchoolUser.objects.create(username='student@test.com')
+        student.set_password('1234')
+        student.save()
+        self.homework.student.add(student)
+        self.replicate(student, *Homework.student.through.objects.all())
+        cache.clear()
+        self.client.login(username=student.username, password='1234')
+        url = reverse('homework:student_list_homework')
+        for i in range(2):
+            self.assertContains(self.client.get(url), 'Replicated homework')
+        self.assertEqual(cache_stats()['hits'], 0)
+        # Pages read from the primary are cached
+        self.client.cookies[settings.REPLICA_PIN_COOKIE] = '1'
+        for i in range(2):
+            self.assertContains(self.client.get(url), 'Replicated homework')
+        self.assertEqual(cache_stats()['hits'], 1)
+
+    def test_other_views_read_primary(self):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('homework:search'),
+                                       {'q': 'homework'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_pinned_after_write(self):
+        response = self.client.post(reverse('homework:create'), {
+            'title': 'New homework',
+            'question': 'Why?',
+            'due_date': date.today().isoformat(),
+            'teacher': self.teacher.id,
+        })
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = self.client.get(reverse('homework:list'))
+        self.assertEqual(queries.captured_queries, [])
+        self.assertContains(response, 'New homework')
+        self.assertContains(response, 'Lagging homework')
+
+    def test_reads_after_write_use_primary(self):
+        router = db_router.ReplicaRouter()
+        db_router.reset()
+        db_router.state.use_replica = True
+        self.assertEqual(router.db_for_read(Homework), 'replica')
+        self.assertEqual(router.db_for_write(Homework), 'default')
+        self.assertEqual(router.db_for_read(Homework), 'default')
+        self.assertTrue(db_router.state.wrote)
+        db_router.reset()
+
+    def test_no_replica(self):
+        with self.settings(REPLICA_DATABASES=[]):
+            response = self.client.get(reverse('homework:list'))
+            self.assertContains(response, 'Lagging homework')
+            response = self.client.post(reverse('homework:bulk_grade'),
+                                        '{}', content_type='application/json')
+            self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
@@ -0,0 +1,65 @@
+import copy
+
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from homework.forms import HomeworkCreateForm
+from teacher2student import form_rendering
+from users.forms import SignupForm, SigninForm
+
+LAYOUT = ('{% load floppyforms memoized_forms %}'
+          '{% form form using "floppyforms/layouts/bootstrap.html" %}')
+# The rows are memoized on the nodes of the cached templates
+CACHED_TEMPLATES = copy.deepcopy(settings.TEMPLATES)
+CACHED_TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader',
+     CACHED_TEMPLATES[0]['OPTIONS']['loaders'])]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class FormRenderingTests(SimpleTestCase):
+
+    def setUp(self):
+        form_rendering.rendered_widgets.clear()
+        for loader in engines['django'].engine.template_loaders:
+            loader.reset()
+        self.template = engines['django'].from_string(LAYOUT)
+
+    def render(self, form):
+        return self.template.render({'form': form})
+
+    def test_same_html(self):
+        for form_class, initial in ((SignupForm, {'user_type': 'student'}),
+                                    (SigninForm, {}),
+                                    (HomeworkCreateForm, {'teacher': 1})):
+            with self.settings(FORM_RENDER_CACHE=False):
+                expected = self.render(form_class(initial=initial))
+            self.assertEqual(self.render(form_class(initial=initial)),
+                             expected)
+            self.assertEqual(self.render(form_class(initial=initial)),
+                             expected)
+
+    def test_rows_memoized(self):
+        self.render(SigninForm())
+        widgets = form_rendering.rendered_widgets[SigninForm]
+        self.assertEqual(len(widgets), 2)
+        widgets.clear()
+        # The rows come from the memo, the widgets are not rendered again
+        self.render(SigninForm())
+        self.assertEqual(widgets, {})
+
+    def test_values_not_memoized(self):
+        html = self.render(SigninForm(data={'username_or_email': 'first'}))
+        self.assertIn('value="first"', html)
+        self.assertIn('errorlist', html)
+        html = self.render(SigninForm(data={'username_or_email': 'second'}))
+        self.assertIn('value="second"', html)
+        html = self.render(SignupForm(initial={'email': 'a@test.com'}))
+        self.assertIn('value="a@test.com"', html)
+        self.assertNotIn('a@test.com', self.render(SignupForm()))
+
+    @override_settings(FORM_RENDER_CACHE=False)
+    def test_disabled(self):
+        self.render(SigninForm())
+        self.assertEqual(form_rendering.rendered_widgets[SigninForm], {})
@@ -0,0 +1,75 @@
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from teacher2student.instrumentation import ViewStats, percentile, view_stats
+from users.models import SchoolUser
+
+
+class ViewStatsTests(TestCase):
+
+    def setUp(self):
+        view_stats.reset()
+        self.staff = SchoolUser.objects.create(
+            username='staff@test.com',
+            email='staff@test.com',
+            user_type='teacher',
+            is_staff=True,
+        )
+        self.staff.set_password('1234')
+        self.staff.save()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 51)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_window(self):
+        stats = ViewStats(window=2)
+        for wall_ms in (100, 1, 2):
+            stats.record('home', False, queries=1, sql_ms=0, template_ms=0,
+                         wall_ms=wall_ms)
+        summary = stats.summary()['home']
+        self.assertEqual(summary['requests'], 3)
+        self.assertEqual(summary['wall_ms']['p99'], 2)
+
+    def test_middleware(self):
+        self.client.login(username=self.staff.username, password='1234')
+        response = self.client.get(reverse('homework:list'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        response = self.client.get(reverse('view_stats'))
+        views = response.json()['views']
+        stats = views['homework:list']
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['flagged'], 0)
+        self.assertGreater(stats['queries']['p50'], 0)
+        self.assertGreater(stats['template_ms']['p50'], 0)
+
+    def test_no_debug_cursor(self):
+        """Queries are counted without Django's query log."""
+        self.client.login(username=self.staff.username, password='1234')
+        self.client.get(reverse('homework:list'))
+        self.assertFalse(connection.force_debug_cursor)
+        self.assertEqual(len(connection.queries_log), 0)
+        count = connection.view_stats_queries
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(connection.view_stats_queries, count + 1)
+        self.assertGreater(
+            view_stats.summary()['homework:list']['queries']['p50'], 0)
+
+    @override_settings(VIEW_STATS_QUERY_THRESHOLD=0)
+    def test_flagged(self):
+        self.client.login(username=self.staff.username, password='1234')
+        self.client.get(reverse('homework:list'))
+        self.assertEqual(
+            view_stats.summary()['homework:list']['flagged'], 1)
+
+    def test_staff_only(self):
+        self.staff.is_staff = False
+        self.staff.save()
+        self.client.login(username=self.staff.username, password='1234')
+        response = self.client.get(reverse('view_stats'))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,99 @@
+from django.test import SimpleTestCase, override_settings
+
+from teacher2student import db_health
+from teacher2student.warmup import warm_up
+
+
+class FakeConnection(object):
+
+    def __init__(self, usable, conn_max_age=60, in_atomic_block=False):
+        self.connection = object()
+        self.settings_dict = {'CONN_MAX_AGE': conn_max_age}
+        self.in_atomic_block = in_atomic_block
+        self.usable = usable
+        self.checks = 0
+
+    def is_usable(self):
+        self.checks += 1
+        return self.usable
+
+    def close(self):
+        self.connection = None
+
+
+class FrozenClock(object):
+    """Stands for the time module, the time only moves when told."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class FakeConnections(object):
+
+    def __init__(self, *connections):
+        self.connections = connections
+
+    def all(self):
+        return self.connections
+
+
+@override_settings(CONN_HEALTH_CHECK_INTERVAL=10)
+class ConnectionHealthTests(SimpleTestCase):
+
+    def check(self, *connections):
+        real_connections = db_health.connections
+        db_health.connections = FakeConnections(*connections)
+        try:
+            db_health.ConnectionHealthMiddleware().process_request(None)
+        finally:
+            db_health.connections = real_connections
+
+    def test_broken_connection_closed(self):
+        broken = FakeConnection(usable=False)
+        working = FakeConnection(usable=True)
+        self.check(broken, working)
+        self.assertIsNone(broken.connection)
+        self.assertIsNotNone(working.connection)
+
+    def test_checked_once_per_interval(self):
+        working = FakeConnection(usable=True)
+        self.check(working)
+        self.check(working)
+        self.assertEqual(working.checks, 1)
+        working.health_checked_at -= 10
+        self.check(working)
+        self.assertEqual(working.checks, 2)
+
+    def test_checked_again_after_interval(self):
+        """Requests more frequent than the interval do not delay the check."""
+        working = FakeConnection(usable=True)
+        real_time = db_health.time
+        db_health.time = clock = FrozenClock(1000)
+        try:
+            for seconds in range(0, 28, 4):
+                clock.now = 1000 + seconds
+                self.check(working)
+        finally:
+            db_health.time = real_time
+        # Checked at 0, 12 and 24 seconds
+        self.assertEqual(working.checks, 3)
+
+    def test_skipped_connections(self):
+        connections = [
+            FakeConnection(usable=False, conn_max_age=0),
+            FakeConnection(usable=False, in_atomic_block=True),
+        ]
+        self.check(*connections)
+        for skipped in connections:
+            self.assertEqual(skipped.checks, 0)
+
+
+class WarmUpTests(SimpleTestCase):
+
+    def test_warm_up(self):
+        urls, templates = warm_up()
+        self.assertGreater(urls, 20)
+        self.assertGreater(templates, 20)
@@ -17,6 +17,8 @@ from django.conf.urls import url, include
 from django.contrib import admin
 from django.views.generic import TemplateView
 
+from teacher2student.instrumentation import view_stats_json
+
 urlpatterns = [
     url(r'^admin/', admin.site.urls),
     url(r'^$', TemplateView.as_view(template_name="home.html"), name='home'),
@@ -24,4 +26,6 @@ urlpatterns = [
     url(r'^users/', include("users.urls", namespace="users")),
     # Homework
     url(r'^homework/', include("homework.urls", namespace="homework")),
+    # Per view request stats for staff
+    url(r'^stats/views$', view_stats_json, name='view_stats'),
 ]
@@ -0,0 +1,75 @@
+"""
+Warm up of the application before the server forks its workers.
+
+Called from the gunicorn master (see gunicorn_conf.py) once the application
+is loaded: the URL resolvers are populated and every template is loaded, so
+that the workers inherit them instead of building them on their first
+requests. Templates are only kept when the cached template loader is used.
+"""
+import logging
+import os
+
+from django.core.urlresolvers import RegexURLResolver, get_resolver
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def populate(resolver):
+    """Populate `resolver` and its included resolvers, count the patterns."""
+    # Populates the reverse, namespace and app dicts
+    resolver.reverse_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.regex
+        if isinstance(pattern, RegexURLResolver):
+            count += populate(pattern)
+        else:
+            count += 1
+    return count
+
+
+def loader_dirs(loaders):
+    """Template directories of `loaders` and of the loaders they wrap."""
+    for loader in loaders:
+        if hasattr(loader, 'loaders'):
+            for directory in loader_dirs(loader.loaders):
+                yield directory
+        elif hasattr(loader, 'get_dirs'):
+            for directory in loader.get_dirs():
+                yield directory
+
+
+def template_names(directories):
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            for name in files:
+                yield os.path.relpath(os.path.join(root, name), directory)
+
+
+def load_templates():
+    """Load every template of every engine, return the number loaded."""
+    count = 0
+    for engine in engines.all():
+        directories = loader_dirs(engine.engine.template_loaders)
+        for name in sorted(set(template_names(directories))):
+            try:
+                engine.get_template(name.replace(os.sep, '/'))
+            except (TemplateDoesNotExist, TemplateSyntaxError,
+                    UnicodeDecodeError) as error:
+                logger.warning("Template %s not loaded: %s", name, error)
+            else:
+                count += 1
+    return count
+
+
+def warm_up():
+    """Warm up the URLs and templates, return the counts loaded."""
+    urls = populate(get_resolver())
+    templates = load_templates()
+    # The workers must not share the master's connections
+    for connection in connections.all():
+        connection.close()
+    logger.info("Warmed up %d URL patterns and %d templates", urls, templates)
+    return urls, templates
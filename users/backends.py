@@ -0,0 +1,42 @@
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+from users import user_cache
+from users.models import SchoolUser, normalize_email
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """
+    Authenticate with either the username or the email address, resolved
+    in a single query on the unique username and normalized email indexes.
+    """
+
+    def authenticate(self, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(SchoolUser.USERNAME_FIELD)
+        if not username:
+            return None
+        users = list(SchoolUser.objects.filter(
+            Q(username=username) |
+            Q(email_normalized=normalize_email(username)))[:2])
+        if not users:
+            # Run the hasher anyway so unknown users take as long to reject
+            SchoolUser().set_password(password)
+            return None
+        # A username match wins over another user's email
+        users.sort(key=lambda user: user.username != username)
+        user = users[0]
+        if user.check_password(password):
+            return user
+
+    def get_user(self, user_id):
+        """Load the user of the session, from the user cache if enabled."""
+        if not user_cache.is_enabled():
+            return super(UsernameOrEmailBackend, self).get_user(user_id)
+        version = user_cache.user_version(user_id)
+        user = user_cache.get_user(user_id, version)
+        if user is None:
+            user = super(UsernameOrEmailBackend, self).get_user(user_id)
+            if user is not None:
+                user_cache.set_user(user, version)
+        return user
@@ -1,8 +1,13 @@
-from users.models import SchoolUser
+import codecs
+
+from homework.models import Homework
+from users.models import SchoolUser, normalize_email
 import floppyforms.__future__ as forms
 from floppyforms.widgets import PasswordInput, TextInput, HiddenInput
 
-class SignupForm(forms.ModelForm):
+from teacher2student.form_rendering import MemoizedRenderingMixin
+
+class SignupForm(MemoizedRenderingMixin, forms.ModelForm):
     """Form for signing up new users."""
 
     def __init__(self, *args, **kwargs):
@@ -22,11 +27,12 @@ class SignupForm(forms.ModelForm):
     def clean_email(self):
         """Make sure the email doesn't exist already."""
         data = self.cleaned_data['email']
-        if SchoolUser.objects.filter(email=data).exists():
+        if SchoolUser.objects.filter(
+                email_normalized=normalize_email(data)).exists():
             raise forms.ValidationError("This email already used")
         return data
 
-class SigninForm(forms.ModelForm):
+class SigninForm(MemoizedRenderingMixin, forms.ModelForm):
     """Form for signing in the user."""
     username_or_email = forms.CharField(
         max_length=250,
@@ -58,3 +64,42 @@ class UserUpdateForm(forms.ModelForm):
     class Meta:
         model = SchoolUser
         fields = ('email', 'first_name', 'last_name')
+
+    def clean_email(self):
+        """Make sure the email isn't used by another user."""
+        data = self.cleaned_data['email']
+        if data and SchoolUser.objects.filter(
+                email_normalized=normalize_email(data)
+        ).exclude(id=self.instance.id).exists():
+            raise forms.ValidationError("This email already used")
+        return data
+
+
+class RosterImportForm(forms.Form):
+    """Form for importing users from a CSV file."""
+    roster = forms.FileField(
+        label="CSV file",
+        help_text="Columns: email, password, first_name, last_name, "
+                  "user_type (student by default).")
+    homework = forms.ModelChoiceField(
+        queryset=None, required=False,
+        label="Assign the students to")
+
+    def __init__(self, *args, **kwargs):
+        teacher = kwargs.pop('teacher')
+        super(RosterImportForm, self).__init__(*args, **kwargs)
+        self.fields['homework'].queryset = Homework.objects.filter(
+            teacher=teacher)
+
+    def clean_roster(self):
+        """Check the file is UTF-8 encoded, a chunk at a time."""
+        roster = self.cleaned_data['roster']
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for chunk in roster.chunks():
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise forms.ValidationError("The file is not UTF-8 encoded")
+        roster.seek(0)
+        return roster
@@ -0,0 +1,51 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import reverse
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from users.models import SchoolUser
+
+ENGINES = ('db', 'cached_db', 'signed_cookies')
+
+
+class Command(BaseCommand):
+    help = ("Count the queries of authenticated page views with each "
+            "session engine. Runs in a rolled back transaction.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help="Number of page views per engine.")
+
+    def handle(self, *args, **options):
+        self.stdout.write("%-16s %16s %16s" % (
+            "Engine", "Queries/request", "Session queries"))
+        for engine in ENGINES:
+            total, session = self.benchmark(engine, options['requests'])
+            self.stdout.write("%-16s %16.2f %16.2f" % (
+                engine, float(total) / options['requests'],
+                float(session) / options['requests']))
+
+    def benchmark(self, engine, requests):
+        """Return the total and session queries of `requests` page views."""
+        engine_settings = override_settings(
+            SESSION_ENGINE='django.contrib.sessions.backends.%s' % engine,
+            ALLOWED_HOSTS=['testserver'])
+        with engine_settings, transaction.atomic():
+            user = SchoolUser(username='benchmark_sessions',
+                              user_type='student')
+            user.set_password('benchmark')
+            user.save()
+            client = Client()
+            client.login(username=user.username, password='benchmark')
+            # The first page view warms up the caches
+            client.get(reverse('users:profile'))
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(requests):
+                    client.get(reverse('users:profile'))
+            transaction.set_rollback(True)
+        table = Session._meta.db_table
+        session = [query for query in queries if table in query['sql']]
+        return len(queries), len(session)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.roster import RosterImporter, read_csv
+
+
+class Command(BaseCommand):
+    help = ("Import teachers and students from a CSV file with email, "
+            "password and optional first_name, last_name, user_type columns.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument(
+            '--homework', type=int,
+            help="Assign the imported students to this homework id.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help="Password hashing processes, defaults to the CPU count.")
+
+    def handle(self, *args, **options):
+        from homework.models import Homework
+        homework = None
+        if options['homework']:
+            try:
+                homework = Homework.objects.get(id=options['homework'])
+            except Homework.DoesNotExist:
+                raise CommandError(
+                    "Homework %d does not exist." % options['homework'])
+        importer = RosterImporter(homework=homework,
+                                  batch_size=options['batch_size'],
+                                  workers=options['workers'])
+        with open(options['csv_file'], 'rb') as csv_file:
+            try:
+                report = importer.run(read_csv(csv_file))
+            except ValueError as error:
+                raise CommandError("Import stopped: %s." % error)
+        for line, message in report.errors:
+            self.stderr.write("Line %d: %s" % (line, message))
+        self.stdout.write(
+            "Imported %d users (%d assigned), %d errors in %.1fs "
+            "(%.0f rows/s)." % (report.created, report.assigned,
+                                len(report.errors), report.elapsed,
+                                report.rows_per_second))
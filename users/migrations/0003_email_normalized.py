@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 13:37
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def backfill_email_normalized(apps, schema_editor):
+    """
+    Fill the lower case emails. An email used by several accounts with
+    different cases would leave all but one of them unable to save, so
+    the migration fails with the list of conflicting accounts instead: the
+    duplicates must be merged or their emails changed first.
+    """
+    SchoolUser = apps.get_model('users', 'SchoolUser')
+    accounts = {}
+    users = SchoolUser.objects.order_by('id').values_list(
+        'id', 'username', 'email')
+    for user_id, username, email in users.iterator():
+        email = (email or '').strip().lower() or None
+        if email is not None:
+            accounts.setdefault(email, []).append((user_id, username))
+    conflicts = sorted((email, users) for email, users in accounts.items()
+                       if len(users) > 1)
+    if conflicts:
+        raise ValueError(
+            "Emails used by several accounts, merge them or change their "
+            "emails before migrating:\n%s" % "\n".join(
+                "%s: %s" % (email, ", ".join(
+                    "%s (id %d)" % (username, user_id)
+                    for user_id, username in users))
+                for email, users in conflicts))
+    for email, users in accounts.items():
+        SchoolUser.objects.filter(id=users[0][0]).update(
+            email_normalized=email)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schooluser',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=254, null=True),
+        ),
+        migrations.RunPython(
+            backfill_email_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='schooluser',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=254, null=True, unique=True),
+        ),
+    ]
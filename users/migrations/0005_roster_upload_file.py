@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.5 on 2026-10-18 16:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_roster_upload'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='rosterupload',
+            name='content',
+        ),
+        migrations.AddField(
+            model_name='rosterupload',
+            name='roster',
+            field=models.FileField(default='', upload_to=users.models.roster_path),
+            preserve_default=False,
+        ),
+    ]
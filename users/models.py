@@ -1,4 +1,6 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser 
 from django.utils.translation import ugettext_lazy as _
 from django.core.urlresolvers import reverse
@@ -8,14 +10,34 @@ TYPE_USER = (
     ('student', _('Student')),
 )
 
+
+def normalize_email(email):
+    """Case insensitive form of an email address, None if empty."""
+    email = (email or '').strip().lower()
+    return email or None
+
+
 class SchoolUser(AbstractUser):
     """Custom user that can represent a Teacher or a Student"""
     # Type of User
     user_type = models.CharField(_('Type'), choices=TYPE_USER, max_length=20, default='student')
+    # Lower case email kept in sync with `email`, indexed for sign in lookups
+    email_normalized = models.CharField(
+        max_length=254, unique=True, null=True, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        index_together = [
+            # Students list when assigning homework
+            ('user_type', 'last_name'),
+        ]
 
     def __str__(self):
         return "%s %s" % (self.first_name, self.last_name)
 
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize_email(self.email)
+        super(SchoolUser, self).save(*args, **kwargs)
+
     def get_homework_url(self):
         if self.user_type == 'student':
             return reverse('homework:student_list_homework')
@@ -28,3 +50,27 @@ class SchoolUser(AbstractUser):
     def is_student(self):
         return self.user_type == 'student'
 
+
+
+def roster_path(instance, filename):
+    # The name of the uploaded file is not kept
+    return 'rosters/%s.csv' % uuid.uuid4().hex
+
+
+class RosterUpload(models.Model):
+    """
+    CSV roster waiting for its import job. The file holds passwords, it is
+    deleted with the upload once imported or when the import is given up.
+    """
+    user = models.ForeignKey(SchoolUser, related_name='roster_uploads')
+    roster = models.FileField(upload_to=roster_path)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def discard(self):
+        """Delete the upload and its file once the transaction commits."""
+        self.delete()
+        roster = self.roster
+        transaction.on_commit(lambda: roster.delete(save=False))
+
+    def __str__(self):
+        return 'Roster of %s #%s' % (self.user, self.id)
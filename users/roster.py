@@ -0,0 +1,179 @@
+"""
+Bulk import of users from a CSV roster.
+
+The CSV file needs an `email` and a `password` column, `first_name`,
+`last_name` and `user_type` (teacher or student, student by default) are
+optional. Rows are read as a stream and processed by batches: emails are
+checked against the database with one query per batch, passwords are
+hashed in a process pool and users are inserted with one bulk insert.
+"""
+import codecs
+import csv
+import multiprocessing
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.utils import six
+
+from users.models import SchoolUser, TYPE_USER, normalize_email
+
+USER_TYPES = [user_type for user_type, label in TYPE_USER]
+
+
+def read_csv(lines):
+    """
+    Yield the line number and a dict of each row of utf-8 CSV lines, raise
+    ValueError on a line that is not utf-8.
+    """
+    if six.PY2:
+        reader = csv.DictReader(lines)
+        rows = (dict((key.decode('utf-8'), (value or '').decode('utf-8'))
+                     for key, value in row.items() if key)
+                for row in reader)
+    else:
+        reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8'))
+        rows = (dict((key, value or '') for key, value in row.items() if key)
+                for row in reader)
+    try:
+        for row in rows:
+            yield reader.line_num, row
+    except UnicodeDecodeError:
+        # Python 3 decodes the line before reading it, Python 2 after
+        raise ValueError("Line %d is not utf-8 encoded" % (
+            reader.line_num + (0 if six.PY2 else 1)))
+
+
+class RosterReport(object):
+    """Outcome of a roster import."""
+
+    def __init__(self):
+        self.created = 0
+        self.assigned = 0
+        self.errors = []
+        self.start = time.time()
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return self.created + len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+
+class RosterImporter(object):
+    """
+    Import users from `read_csv` rows, optionally assigning the students to
+    `homework`. Set `allowed_types` to restrict the user types imported.
+    """
+
+    def __init__(self, homework=None, allowed_types=USER_TYPES,
+                 batch_size=500, workers=None):
+        self.homework = homework
+        self.allowed_types = allowed_types
+        self.batch_size = batch_size
+        self.workers = (multiprocessing.cpu_count() if workers is None
+                        else workers)
+        self.username_length = SchoolUser._meta.get_field(
+            'username').max_length
+        # Emails seen earlier in the file
+        self.seen = set()
+
+    def run(self, rows):
+        report = RosterReport()
+        pool = multiprocessing.Pool(self.workers) if self.workers > 1 else None
+        try:
+            batch = []
+            for line, row in rows:
+                user = self.clean_row(line, row, report)
+                if user is not None:
+                    batch.append(user)
+                if len(batch) == self.batch_size:
+                    self.save_batch(batch, pool, report)
+                    batch = []
+            self.save_batch(batch, pool, report)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        report.errors.sort()
+        report.elapsed = time.time() - report.start
+        return report
+
+    def clean_row(self, line, row, report):
+        """Return (line, user, password) for a valid row, else None."""
+        email = row.get('email', '').strip()
+        password = row.get('password', '')
+        user_type = row.get('user_type', '').strip().lower() or 'student'
+        email_normalized = normalize_email(email)
+        error = None
+        try:
+            validate_email(email)
+        except ValidationError:
+            error = "Invalid email: %r" % email
+        if error is None:
+            if len(email) > self.username_length:
+                error = "Email longer than %d characters: %s" % (
+                    self.username_length, email)
+            elif not password:
+                error = "Missing password for %s" % email
+            elif user_type not in self.allowed_types:
+                error = "User type not allowed: %s" % user_type
+            elif email_normalized in self.seen:
+                error = "Duplicate email in file: %s" % email
+        if error is not None:
+            report.error(line, error)
+            return None
+        self.seen.add(email_normalized)
+        user = SchoolUser(
+            username=email, email=email, email_normalized=email_normalized,
+            first_name=row.get('first_name', '').strip(),
+            last_name=row.get('last_name', '').strip(),
+            user_type=user_type)
+        return (line, user, password)
+
+    def save_batch(self, batch, pool, report):
+        if not batch:
+            return
+        # One query to find the emails already used
+        emails = [user.email_normalized for line, user, password in batch]
+        usernames = [user.username for line, user, password in batch]
+        existing = set()
+        for username, email in SchoolUser.objects.filter(
+                Q(email_normalized__in=emails) | Q(username__in=usernames)
+        ).values_list('username', 'email_normalized'):
+            existing.update((username, email))
+        new = []
+        for line, user, password in batch:
+            if user.email_normalized in existing or user.username in existing:
+                report.error(line, "Email already used: %s" % user.email)
+            else:
+                new.append((user, password))
+        if not new:
+            return
+        passwords = [password for user, password in new]
+        if pool is not None:
+            hashes = pool.map(make_password, passwords)
+        else:
+            hashes = [make_password(password) for password in passwords]
+        users = []
+        for (user, password), encoded in zip(new, hashes):
+            user.password = encoded
+            users.append(user)
+        with transaction.atomic():
+            SchoolUser.objects.bulk_create(users)
+            report.created += len(users)
+            students = [user.username for user in users
+                        if user.user_type == 'student']
+            if self.homework is not None and students:
+                self.homework.assign_students(
+                    SchoolUser.objects.filter(username__in=students))
+                report.assigned += len(students)
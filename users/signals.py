@@ -0,0 +1,20 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from users import user_cache
+from users.models import SchoolUser
+
+
+@receiver(post_save, sender=SchoolUser)
+@receiver(post_delete, sender=SchoolUser)
+def user_changed(sender, instance, **kwargs):
+    """Saving covers profile and password changes as well as logins."""
+    if user_cache.is_enabled():
+        user_cache.invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    if user is not None and user_cache.is_enabled():
+        user_cache.invalidate_user(user.pk)
@@ -0,0 +1,57 @@
+"""Background jobs of the users app, see jobs.queue."""
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.translation import ugettext as _
+
+from jobs.queue import register
+from .models import RosterUpload
+from .roster import RosterImporter, read_csv
+
+
+def roster_import_failed(payload):
+    """Discard the roster of an import given up and tell its uploader."""
+    upload = RosterUpload.objects.select_related('user').filter(
+        id=payload['upload_id']).first()
+    if upload is None:
+        return
+    upload.discard()
+    if upload.user.email:
+        send_mail(_("Roster import failed"),
+                  _("Your roster could not be imported, please upload it "
+                    "again."), None, [upload.user.email])
+
+
+@register('users.import_roster', on_failure=roster_import_failed)
+def import_roster(payload):
+    """Import an uploaded roster and email the report to its uploader."""
+    from homework.models import Homework
+    upload = RosterUpload.objects.select_related('user').filter(
+        id=payload['upload_id']).first()
+    if upload is None:
+        return
+    homework = None
+    if payload.get('homework_id'):
+        # The homework may have been deleted since
+        homework = Homework.objects.filter(id=payload['homework_id']).first()
+    importer = RosterImporter(homework=homework,
+                              allowed_types=payload['allowed_types'],
+                              workers=settings.ROSTER_IMPORT_WORKERS)
+    upload.roster.open('rb')
+    try:
+        report = importer.run(read_csv(upload.roster))
+    finally:
+        upload.roster.close()
+    upload.discard()
+    if not upload.user.email:
+        return
+    lines = [_("%(created)d users imported (%(assigned)d assigned), "
+               "%(errors)d errors in %(elapsed).1fs.") % {
+                   'created': report.created,
+                   'assigned': report.assigned,
+                   'errors': len(report.errors),
+                   'elapsed': report.elapsed,
+               }]
+    lines.extend(_("Line %(line)d: %(error)s") % {
+        'line': line, 'error': message} for line, message in report.errors)
+    send_mail(_("Roster import report"), '\n'.join(lines), None,
+              [upload.user.email])
@@ -0,0 +1,39 @@
+from django.contrib.auth import authenticate
+from django.test import TestCase
+
+from .models import SchoolUser
+
+
+class UsernameOrEmailBackendTests(TestCase):
+
+    def setUp(self):
+        self.student = SchoolUser.objects.create(
+            username='student',
+            email='Student@Test.com',
+            user_type='student',
+        )
+        self.student.set_password('1234')
+        self.student.save()
+
+    def test_normalized_email(self):
+        self.assertEqual(self.student.email_normalized, 'student@test.com')
+        user = SchoolUser.objects.create(username='noemail')
+        self.assertIsNone(user.email_normalized)
+
+    def test_authenticate(self):
+        self.assertEqual(
+            authenticate(username='student', password='1234'), self.student)
+        # Email lookup is case insensitive and a single query
+        with self.assertNumQueries(1):
+            user = authenticate(username='STUDENT@test.com', password='1234')
+        self.assertEqual(user, self.student)
+        self.assertIsNone(authenticate(username='student', password='bad'))
+        self.assertIsNone(authenticate(username='nobody', password='1234'))
+
+    def test_username_wins(self):
+        """A username matching another user's email logs that user in."""
+        other = SchoolUser.objects.create(username='student@test.com')
+        other.set_password('1234')
+        other.save()
+        self.assertEqual(
+            authenticate(username='student@test.com', password='1234'), other)
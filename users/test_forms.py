@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from .forms import SignupForm, UserUpdateForm
+from .models import SchoolUser
+
+
+class FormsTests(TestCase):
+
+    def setUp(self):
+        self.student = SchoolUser.objects.create(
+            username='student@test.com',
+            email='student@test.com',
+            user_type='student',
+        )
+
+    def test_signup_duplicate_email(self):
+        """Emails differing only by case are duplicates."""
+        form = SignupForm(data={
+            'email': 'Student@Test.com', 'first_name': 'Tom',
+            'last_name': 'Student', 'user_type': 'student',
+            'password': '1234'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+
+    def test_update_email(self):
+        teacher = SchoolUser.objects.create(
+            username='teacher@test.com',
+            email='teacher@test.com',
+            user_type='teacher',
+        )
+        data = {'email': 'STUDENT@test.com', 'first_name': 'John',
+                'last_name': 'Teacher'}
+        form = UserUpdateForm(data=data, instance=teacher)
+        self.assertFalse(form.is_valid())
+        # Keeping its own email is fine
+        data['email'] = 'Teacher@test.com'
+        form = UserUpdateForm(data=data, instance=teacher)
+        self.assertTrue(form.is_valid())
@@ -1,3 +1,6 @@
+from importlib import import_module
+
+from django.apps import apps
 from django.test import TestCase
 from django.core.urlresolvers import reverse
 from .models import SchoolUser
@@ -48,3 +51,21 @@ class UsersTests(TestCase):
             self.teacher.get_homework_url(),
             reverse('homework:list')
         )
+
+    def test_email_normalized_backfill(self):
+        """The backfill migration fills the emails or reports conflicts."""
+        migration = import_module('users.migrations.0003_email_normalized')
+        SchoolUser.objects.update(email_normalized=None)
+        migration.backfill_email_normalized(apps, None)
+        self.assertEqual(
+            SchoolUser.objects.get(id=self.student.id).email_normalized,
+            'student@test.com')
+        SchoolUser.objects.update(email_normalized=None)
+        SchoolUser.objects.filter(id=self.teacher.id).update(
+            email='Student@Test.com')
+        with self.assertRaises(ValueError) as raised:
+            migration.backfill_email_normalized(apps, None)
+        self.assertIn('student@test.com: student@test.com (id %d), '
+                      'teacher@test.com (id %d)' % (
+                          self.student.id, self.teacher.id),
+                      str(raised.exception))
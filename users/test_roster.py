@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TransactionTestCase
+from django.utils.six import StringIO
+
+from homework.models import Homework
+from jobs.models import Job
+from jobs.queue import run_pending
+from . import tasks
+from .models import SchoolUser, RosterUpload
+from .roster import RosterImporter, read_csv
+
+ROSTER = (
+    u"email,password,first_name,last_name,user_type\n"
+    u"ana@test.com,secret1,Ana,Martín,student\n"
+    u"bob@test.com,secret2,Bob,Smith,\n"
+    u"BOB@test.com,secret3,Bob,Twice,student\n"
+    u"taken@test.com,secret4,Tom,Taken,student\n"
+    u"not an email,secret5,No,Email,student\n"
+    u"tim@test.com,,Tim,Nopass,student\n"
+    u"tina@test.com,secret6,Tina,Teacher,teacher\n"
+).encode('utf-8')
+
+
+# The roster files are deleted on commit, which TestCase never does
+class RosterImportTests(TransactionTestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.settings_override = self.settings(MEDIA_ROOT=media)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        SchoolUser.objects.create(username='Taken@test.com',
+                                  email='Taken@test.com')
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com',
+            email='teacher@test.com',
+            user_type='teacher',
+        )
+        self.teacher.set_password('1234')
+        self.teacher.save()
+        self.homework = Homework.objects.create(
+            title='Homework #1',
+            question='How are you?',
+            teacher=self.teacher,
+            due_date='2016-04-08',
+        )
+
+    def rosters(self):
+        """Names of the roster files kept in the storage."""
+        if not default_storage.exists('rosters'):
+            return []
+        return default_storage.listdir('rosters')[1]
+
+    def test_importer(self):
+        importer = RosterImporter(homework=self.homework, batch_size=2,
+                                  workers=0)
+        report = importer.run(read_csv(ROSTER.splitlines(True)))
+        self.assertEqual(report.created, 3)
+        self.assertEqual(report.assigned, 2)
+        self.assertEqual([line for line, message in report.errors],
+                         [4, 5, 6, 7])
+        ana = SchoolUser.objects.get(username='ana@test.com')
+        self.assertEqual(ana.last_name, u'Martín')
+        self.assertTrue(ana.check_password('secret1'))
+        self.assertEqual(
+            SchoolUser.objects.get(username='tina@test.com').user_type,
+            'teacher')
+        self.assertEqual(
+            sorted(self.homework.student.values_list('username', flat=True)),
+            ['ana@test.com', 'bob@test.com'])
+
+    def test_process_pool(self):
+        importer = RosterImporter(workers=2)
+        report = importer.run(read_csv(ROSTER.splitlines(True)))
+        self.assertEqual(report.created, 3)
+        self.assertTrue(SchoolUser.objects.get(
+            username='bob@test.com').check_password('secret2'))
+
+    def test_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'roster.csv')
+        with open(path, 'wb') as roster:
+            roster.write(ROSTER)
+        out, err = StringIO(), StringIO()
+        call_command('import_roster', path, homework=self.homework.id,
+                     workers=0, stdout=out, stderr=err)
+        self.assertIn('Imported 3 users (2 assigned), 4 errors',
+                      out.getvalue())
+        self.assertIn('Line 5: Email already used', err.getvalue())
+
+    def test_view(self):
+        url = reverse('users:roster_import')
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.post(url, {
+            'roster': SimpleUploadedFile('roster.csv', ROSTER),
+            'homework': self.homework.id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['queued'])
+        # The import runs in the jobs worker
+        self.assertFalse(SchoolUser.objects.filter(
+            username='ana@test.com').exists())
+        self.assertEqual(len(self.rosters()), 1)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(self.rosters(), [])
+        # Teachers can only import students
+        self.assertEqual(SchoolUser.objects.filter(
+            username__in=['ana@test.com', 'bob@test.com', 'tina@test.com']
+        ).count(), 2)
+        self.assertEqual(self.homework.student.count(), 2)
+        self.assertFalse(RosterUpload.objects.exists())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.teacher.email])
+        self.assertIn('2 users imported (2 assigned), 5 errors',
+                      mail.outbox[0].body)
+        self.assertIn('User type not allowed: teacher', mail.outbox[0].body)
+        student = SchoolUser.objects.create(username='student@test.com')
+        student.set_password('1234')
+        student.save()
+        self.client.login(username=student.username, password='1234')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_view_failure(self):
+        """A roster whose import is given up is deleted."""
+        self.client.login(username=self.teacher.username, password='1234')
+        self.client.post(reverse('users:roster_import'), {
+            'roster': SimpleUploadedFile('roster.csv', ROSTER),
+        })
+        Job.objects.update(max_attempts=1)
+        run = tasks.RosterImporter.run
+        tasks.RosterImporter.run = lambda importer, rows: 1 / 0
+        try:
+            run_pending()
+        finally:
+            tasks.RosterImporter.run = run
+        self.assertEqual(Job.objects.get().status, 'failed')
+        self.assertFalse(RosterUpload.objects.exists())
+        self.assertEqual(self.rosters(), [])
+        self.assertEqual(mail.outbox[0].subject, 'Roster import failed')
+
+    def test_not_utf8(self):
+        roster = ROSTER.decode('utf-8').encode('latin-1')
+        self.client.login(username=self.teacher.username, password='1234')
+        response = self.client.post(reverse('users:roster_import'), {
+            'roster': SimpleUploadedFile('roster.csv', roster),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response, 'form', 'roster',
+                             'The file is not UTF-8 encoded')
+        self.assertFalse(Job.objects.exists())
+        with self.assertRaisesRegexp(ValueError, 'Line 2 '):
+            list(read_csv(roster.splitlines(True)))
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+
+class SessionsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_clear_expired_sessions(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key='expired%d' % i,
+                                   session_data='',
+                                   expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='valid', session_data='',
+                               expire_date=now + timedelta(days=1))
+        out = StringIO()
+        call_command('clear_expired_sessions', batch_size=2, stdout=out)
+        self.assertIn('Deleted 5 expired sessions', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['valid'])
+
+    def test_benchmark_sessions(self):
+        """Cached and cookie sessions do no session query per page view."""
+        out = StringIO()
+        call_command('benchmark_sessions', requests=3, stdout=out)
+        lines = dict((line.split()[0], line.split()[1:])
+                     for line in out.getvalue().splitlines()[1:])
+        self.assertEqual(float(lines['db'][1]), 1)
+        self.assertEqual(float(lines['cached_db'][1]), 0)
+        self.assertEqual(float(lines['signed_cookies'][1]), 0)
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .models import SchoolUser
+from .user_cache import LRUCache, local_users, user_version
+
+
+class UserCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.teacher = SchoolUser.objects.create(
+            username='teacher@test.com',
+            email='teacher@test.com',
+            user_type='teacher',
+            first_name='John',
+        )
+        self.teacher.set_password('1234')
+        self.teacher.save()
+
+    def user_queries(self):
+        """Load the home page, return it and the queries on the users."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        table = SchoolUser._meta.db_table
+        return response, [query for query in queries
+                          if 'FROM "%s"' % table in query['sql']]
+
+    def check_cache(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.context['request'].user, self.teacher)
+        # Profile changes are visible on the next request
+        self.teacher.first_name = 'Jack'
+        self.teacher.save()
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Welcome Jack')
+        # Password changes log the user out
+        self.teacher.set_password('5678')
+        self.teacher.save()
+        response, queries = self.user_queries()
+        self.assertFalse(response.context['request'].user.is_authenticated())
+
+    @override_settings(AUTH_USER_CACHE='local')
+    def test_local_cache(self):
+        self.check_cache()
+
+    @override_settings(AUTH_USER_CACHE='shared')
+    def test_shared_cache(self):
+        self.check_cache()
+
+    def test_disabled(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        self.user_queries()
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+
+    @override_settings(AUTH_USER_CACHE='local')
+    def test_logout(self):
+        self.client.login(username=self.teacher.username, password='1234')
+        self.user_queries()
+        version = user_version(self.teacher.pk)
+        self.client.get(reverse('users:logout'))
+        self.assertNotEqual(user_version(self.teacher.pk), version)
+
+    def test_lru(self):
+        lru = LRUCache(2)
+        lru.set(1, 'a')
+        lru.set(2, 'b')
+        lru.get(1)
+        lru.set(3, 'c')
+        self.assertIsNone(lru.get(2))
+        self.assertEqual(lru.get(1), 'a')
+        self.assertEqual(lru.get(3), 'c')
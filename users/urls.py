@@ -32,4 +32,10 @@ urlpatterns = [
         view=views.UserUpdateView.as_view(),
         name='profile'
     ),
+    # URL pattern for CSV roster import view
+    url(
+        regex=r'^roster/import$',
+        view=views.RosterImportView.as_view(),
+        name='roster_import'
+    ),
 ]
@@ -0,0 +1,97 @@
+"""
+Cache of the users loaded by the authentication backend on every request.
+
+Each user has a version stamp in the default cache, replaced whenever the
+user is saved, deleted or logs out. Cached users are only served while
+their stamp is current. With AUTH_USER_CACHE = 'local' the users are kept
+in a bounded LRU in each worker, with 'shared' they are kept in the
+default cache itself. Either way the stamps must be seen by every worker,
+so the settings refuse AUTH_USER_CACHE without a shared default cache.
+"""
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'users:auth_user:version:%s'
+USER_KEY = 'users:auth_user:%s:%s'
+
+
+class LRUCache(object):
+    """Thread safe dict keeping only the `size` most recently used items."""
+
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.pop(key, None)
+            if value is not None:
+                self.items[key] = value
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+local_users = LRUCache(settings.AUTH_USER_CACHE_SIZE)
+
+
+def is_enabled():
+    return settings.AUTH_USER_CACHE in ('local', 'shared')
+
+
+def user_version(user_id):
+    """Current version stamp of `user_id`, created if missing."""
+    version = cache.get(VERSION_KEY % user_id)
+    if version is None:
+        version = invalidate_user(user_id)
+    return version
+
+
+def invalidate_user(user_id):
+    """Give `user_id` a new version stamp, returned."""
+    version = uuid.uuid4().hex
+    cache.set(VERSION_KEY % user_id, version, None)
+    return version
+
+
+def get_user(user_id, version):
+    """Cached copy of the user at `version` or None."""
+    if settings.AUTH_USER_CACHE == 'local':
+        cached = local_users.get(user_id)
+        if cached is None or cached[0] != version:
+            return None
+        data = cached[1]
+    else:
+        data = cache.get(USER_KEY % (user_id, version))
+        if data is None:
+            return None
+    # Each request gets its own copy of the user
+    return pickle.loads(data)
+
+
+def set_user(user, version):
+    """
+    Cache `user` at the `version` read before loading it from the database,
+    so a change made meanwhile is never hidden by this copy.
+    """
+    data = pickle.dumps(user, pickle.HIGHEST_PROTOCOL)
+    if settings.AUTH_USER_CACHE == 'local':
+        local_users.set(user.pk, (version, data))
+    else:
+        cache.set(USER_KEY % (user.pk, version), data,
+                  settings.AUTH_USER_CACHE_TIMEOUT)
@@ -7,9 +7,14 @@ from django.http import HttpResponseRedirect
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
 
-from users.models import SchoolUser
-from users.forms import SignupForm, SigninForm, UserUpdateForm
+from jobs.queue import enqueue
+from users.models import SchoolUser, RosterUpload
+from users.forms import (SignupForm, SigninForm, UserUpdateForm,
+                         RosterImportForm)
+from users.roster import USER_TYPES
 
 logger = logging.getLogger(__name__)
 
@@ -90,33 +95,23 @@ class SigninView(FormView):
     def form_valid(self, form):
         username_or_email = form.cleaned_data['username_or_email']
         password = form.cleaned_data['password']
-        try:
-            # Looks up user by username
-            user = SchoolUser.objects.get(username=username_or_email)
-        except:
-            # Tries with email
-            try:
-                user = SchoolUser.objects.get(email=username_or_email)
-            except:
-                user = None
-
-        if user:
-            user = authenticate(username=user.username, password=password)
-            if user is not None:
-                if user.is_active:
-                    login(self.request, user)
-                    # Redirects to the original page
-                    next = self.request.GET.get('next')
-                    if next:
-                        return HttpResponseRedirect(next)
-                    # Ridirects to the profile edit page
-                    return HttpResponseRedirect(reverse('home'))
-                else:
-                    # Returns a 'disabled account' error message.
-                    msg = "Your account has been Disabled."
-                    form._errors['__all__'] = form.error_class([msg])
-                    return self.render_to_response(
-                        self.get_context_data(form=form))
+        # Looks up user by username or email in one query
+        user = authenticate(username=username_or_email, password=password)
+        if user is not None:
+            if user.is_active:
+                login(self.request, user)
+                # Redirects to the original page
+                next = self.request.GET.get('next')
+                if next:
+                    return HttpResponseRedirect(next)
+                # Ridirects to the profile edit page
+                return HttpResponseRedirect(reverse('home'))
+            else:
+                # Returns a 'disabled account' error message.
+                msg = "Your account has been Disabled."
+                form._errors['__all__'] = form.error_class([msg])
+                return self.render_to_response(
+                    self.get_context_data(form=form))
 
         msg = "Please enter a correct Username/Email and password."
         form._errors['__all__'] = form.error_class([msg])
@@ -147,3 +142,37 @@ class UserUpdateView(UpdateView):
 
     def get_success_url(self):
         return reverse('users:profile')
+
+
+class RosterImportView(FormView):
+    """Teachers import students from a CSV file, staff can import teachers."""
+    form_class = RosterImportForm
+    template_name = 'users/roster_import.html'
+
+    @method_decorator(login_required)
+    def dispatch(self, request, *args, **kwargs):
+        if not (request.user.is_staff or request.user.user_type == 'teacher'):
+            raise PermissionDenied
+        return super(RosterImportView, self).dispatch(
+            request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super(RosterImportView, self).get_form_kwargs()
+        kwargs['teacher'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        """Queue the import, hashing the passwords takes too long here."""
+        allowed_types = USER_TYPES if self.request.user.is_staff else ['student']
+        homework = form.cleaned_data['homework']
+        with transaction.atomic():
+            upload = RosterUpload.objects.create(
+                user=self.request.user, roster=form.cleaned_data['roster'])
+            enqueue('users.import_roster', {
+                'upload_id': upload.id,
+                'homework_id': homework.id if homework else None,
+                'allowed_types': allowed_types,
+            })
+        return self.render_to_response(
+            self.get_context_data(form=self.get_form_class()(
+                teacher=self.request.user), queued=True))